@@ -1,9 +1,14 @@
 """IR generator tool."""
 from base64 import b64encode, b64decode
-from itertools import islice
+from array import array
 from functools import wraps
 import logging
+import warnings
+from . import bits
+from . import instrument
+from . import irp
 from . import raw
+from . import registry
 from .exceptions import IrgenInputError
 
 LOG = logging.getLogger(__name__)
@@ -27,22 +32,33 @@ gen_raw_rc6_protocols = ['rc6']
 
 gen_raw_rca38_protocols = ['rca38']
 
+gen_raw_irp_protocols = ['sirc12', 'sirc15', 'sirc20', 'samsung32', 'jvc']
+
 gen_raw_protocols = [
     *gen_raw_nec_protocols,
     *gen_raw_rc5_protocols,
     *gen_raw_rc6_protocols,
-    *gen_raw_rca38_protocols
+    *gen_raw_rca38_protocols,
+    *gen_raw_irp_protocols,
 ]
 
 
 def uX_to_bin(v, x):
-    """Create a binary set of valued."""
+    """Create a binary set of valued.
+
+    Deprecated, codecs use the integer helpers of irgen.bits.
+    """
+    warnings.warn("uX_to_bin is deprecated, use irgen.bits.gen_bits",
+                  DeprecationWarning, stacklevel=2)
     if(v < 0):
         v += (1 << x)
     return bin(v)[2:].rjust(x, '0')
 
 
 def bin_to_uX(v):
+    """Deprecated, use irgen.bits.from_bits."""
+    warnings.warn("bin_to_uX is deprecated, use irgen.bits.from_bits",
+                  DeprecationWarning, stacklevel=2)
     return int("".join(v), 2)
  
 def gen_bitstream_from_raw(data, logical_bit):
@@ -75,38 +91,13 @@ def gen_raw_from_bitified_decorator(logical_bits):
     return inner_2
 
 
-@gen_raw_from_bitified_decorator(889.0)
+@instrument.stage("encode.rc5")
 def gen_raw_rc5(device, function, toggle):
     """Generate a raw list from rc5 parameters."""
-    def encode_bit(s):
-        if s == '1':
-            yield -1
-            yield 1
-        else:
-            yield 1
-            yield -1
-
-    def encode(x, l):
-        for s in uX_to_bin(x, l):
-            yield from encode_bit(s)
-
-    yield from encode(1, 1)  # start
-    if function < 64:
-        yield from encode(1, 1)  # field (function 0-63)
-    else:
-        yield from encode(0, 1)  # field (function 64-127)
-    yield from encode(toggle, 1)  # toggle
-
-    # address
-    yield from encode(device, 5)
-
-    # command
-    yield from encode(function % 64, 6)
-
-    # trailing silence
-    yield -100
+    yield from irp.protocols['rc5'].encode(D=device, F=function, T=toggle)
 
 
+@instrument.stage("decode.rc5", errors=IrgenInputError)
 def dec_raw_rc5(data, **kwargs):
     v = gen_bitstream_from_raw(data, 889.0)
 
@@ -114,14 +105,14 @@ def dec_raw_rc5(data, **kwargs):
         x1 = next(x)
         x2 = next(x)
         if x1 < 0 and x2 > 0:
-            return '1'
+            return 1
         elif x1 > 0 and x2 < 0:
-            return '0'
+            return 0
         else:
             raise IrgenInputError(f"Unexpected pair {x1} and {x2}")
 
     def decode(x, l):
-        return bin_to_uX([decode_bit(x) for _ in range(l)])
+        return bits.from_bits([decode_bit(x) for _ in range(l)])
 
     # look for start bit
     while next(v) == -1:
@@ -132,7 +123,7 @@ def dec_raw_rc5(data, **kwargs):
     address = decode(v, 5)
     command = decode(v, 6)
 
-    if function == '0':
+    if function == 0:
         command += 64
 
     # verify trailing silence
@@ -143,67 +134,30 @@ def dec_raw_rc5(data, **kwargs):
     except StopIteration:
         pass
 
-    return (address, command, int(toggle))
+    return (address, command, toggle)
 
 
-@gen_raw_from_bitified_decorator(444.0)
+@instrument.stage("encode.rc6")
 def gen_raw_rc6(device, function, toggle=0, mode=0):
     """Generate a raw list from rc6 parameters."""
-
-    def encode_bit(s):
-        if s == '1':
-            yield 1
-            yield -1
-        else:
-            yield -1
-            yield 1
-
-    def encode(x, l):
-        for s in uX_to_bin(x, l):
-            yield from encode_bit(s)
-
-    # LS
-    yield 6
-    yield -2
-
-    # SB
-    yield from encode(1, 1)
-
-    # Mode
-    yield from encode(mode, 3)
-
-    # TB
-    if toggle:
-        yield 2
-        yield -2
-    else:
-        yield -2
-        yield 2
-
-    # Control
-    yield from encode(device, 8)
-
-    # Information
-    yield from encode(function, 8)
-
-    # Signal Free
-    yield -6
+    yield from irp.protocols['rc6'].encode(D=device, F=function, T=toggle, M=mode)
 
 
+@instrument.stage("decode.rc6", errors=IrgenInputError)
 def dec_raw_rc6(data, **kwargs):
 
     def decode_bit(x):
         x1 = next(x)
         x2 = next(x)
         if x1 < 0 and x2 > 0:
-            return '0'
+            return 0
         elif x1 > 0 and x2 < 0:
-            return '1'
+            return 1
         else:
             raise IrgenInputError(f"Unexpected pair {x1} and {x2}")
 
     def decode(x, l):
-        return bin_to_uX([decode_bit(x) for _ in range(l)])
+        return bits.from_bits([decode_bit(x) for _ in range(l)])
 
     v = gen_bitstream_from_raw(data, 444.0)
 
@@ -218,8 +172,8 @@ def dec_raw_rc6(data, **kwargs):
             raise IrgenInputError("Expected leading space")
 
     sb = decode_bit(v)
-    if sb != '1':
-        raise IrgenInputError(f"Expected start bit '1', got '{sb}'")
+    if sb != 1:
+        raise IrgenInputError(f"Expected start bit 1, got {sb}")
 
     mode = decode(v, 3)
     toggle_raw = [next(v) for _ in range(4)]
@@ -228,7 +182,7 @@ def dec_raw_rc6(data, **kwargs):
     elif toggle_raw == [-1, -1, 1, 1]:
         toggle = 0
     else:
-        raise Exception(f"Unexpected toggle {toggle_raw}")
+        raise IrgenInputError(f"Unexpected toggle {toggle_raw}")
 
     device = decode(v, 8)
     function = decode(v, 8)
@@ -245,10 +199,9 @@ def dec_raw_rc6(data, **kwargs):
     return (device, function, toggle, mode)
 
 
-def dec_raw_nec(data, protocol=None, **kwargs):
-    """Decode raw nec format"""
-    protocol_base, protocol_suffix = (protocol.split('-') + [None])[:2]
-
+@instrument.stage("decode.nec.bytes", errors=IrgenInputError)
+def dec_raw_nec_bytes(data, leading_burst_count):
+    """Decode raw nec data into its four data bytes, None for repeat."""
     def decode_bit(x):
         x1 = next(x)
         x2 = next(x)
@@ -257,17 +210,12 @@ def dec_raw_nec(data, protocol=None, **kwargs):
         if x2 not in (-1, -3):
             raise IrgenInputError(f"Bit value unexpected {x2}")
         if x2 == -3:
-            return '1'
+            return 1
         else:
-            return '0'
+            return 0
 
     def decode(x):
-        return bin_to_uX(reversed([decode_bit(x) for _ in range(8)]))
-
-    if protocol_base in ('nec1', 'necx1'):
-        leading_burst_count = 16
-    else:
-        leading_burst_count = 8
+        return bits.from_bits([decode_bit(x) for _ in range(8)], lsb=True)
 
     data = raw.simplify(data)
     leading_burst = next(data)
@@ -282,199 +230,296 @@ def dec_raw_nec(data, protocol=None, **kwargs):
     if space not in (-8, -4):
         raise IrgenInputError("Space after burst failed with value {} with logical_bit {}".format(space, logical_bit))
 
-
     if space == -8:
         # Normal data
-        device = decode(data)
-        device_2 = decode(data)
-
-        if protocol_base.startswith("necx"):
-            device |= device_2 << 8
-        else:
-            if device_2 != device ^ 0xFF:
-                raise IrgenInputError("Not expected inverted device data {:02X} {:02X}".format(device, device_2))
-
-        function = decode(data)
-        function_2 = decode(data)
-        if protocol_suffix == 'y1':
-            if (function ^ 0x7F) != function_2:
-                raise IrgenInputError("Not yamaha special version 1: {:02X} {:02X}".format(function, function_2))
-        elif protocol_suffix == 'y2':
-            if (function ^ 0xFE) != function_2:
-                raise IrgenInputError("Not yamaha special version 2: {:02X} {:02X}".format(function, function_2))
-        elif protocol_suffix == 'y3':
-            if (function ^ 0x7E) != function_2:
-                raise IrgenInputError("Not yamaha special version 2: {:02X} {:02X}".format(function, function_2))
-        elif protocol_suffix == 'f16':
-            function |= function_2 << 8
-        else:
-            if (function ^ 0xFF) != function_2:
-                raise IrgenInputError("Not expected inverted data {:02X} {:02X}".format(function, function_2))
-
-        return (device, function, 0)
+        return tuple([decode(data) for _ in range(4)])
     else:
         # Repeat
         eos = next(data)
         if eos != 1:
             raise IrgenInputError("Invalid end of space for repeat {}".format(eos))
-        return (0, 0, 1)
+        return None
 
 
-@gen_raw_from_bitified_decorator(562.5)
-def gen_raw_nec(protocol, device, function):
-    """Generate a raw list from nec parameters."""
+def dec_nec_variant(protocol, values):
+    """Verify and combine nec data bytes for given nec variant."""
     protocol_base, protocol_suffix = (protocol.split('-') + [None])[:2]
+    device, device_2, function, function_2 = values
 
-    def encode_bit(s):
-        yield 1  # burst
-        if s == '1':
-            yield -3  # one  is encoded by 3 length
-        else:
-            yield -1  # zero is encoded by 1 lengths
+    if protocol_base.startswith("necx"):
+        device |= device_2 << 8
+    else:
+        if device_2 != device ^ 0xFF:
+            raise IrgenInputError("Not expected inverted device data {:02X} {:02X}".format(device, device_2))
+
+    if protocol_suffix == 'y1':
+        if (function ^ 0x7F) != function_2:
+            raise IrgenInputError("Not yamaha special version 1: {:02X} {:02X}".format(function, function_2))
+    elif protocol_suffix == 'y2':
+        if (function ^ 0xFE) != function_2:
+            raise IrgenInputError("Not yamaha special version 2: {:02X} {:02X}".format(function, function_2))
+    elif protocol_suffix == 'y3':
+        if (function ^ 0x7E) != function_2:
+            raise IrgenInputError("Not yamaha special version 2: {:02X} {:02X}".format(function, function_2))
+    elif protocol_suffix == 'f16':
+        function |= function_2 << 8
+    else:
+        if (function ^ 0xFF) != function_2:
+            raise IrgenInputError("Not expected inverted data {:02X} {:02X}".format(function, function_2))
 
-    def encode(value):
-        b = uX_to_bin(value, 8)
-        for s in reversed(b):
-            yield from encode_bit(s)
+    return (device, function, 0)
 
-    if protocol_base in ('nec1', 'necx1'):
-        yield 16  # leading burst
+
+def dec_nec_leading_burst_count(protocol):
+    if protocol.split('-')[0] in ('nec1', 'necx1'):
+        return 16
     else:
-        yield 8   # leading burst
+        return 8
 
-    yield -8      # space before data
 
-    yield from encode(device & 0xFF)
-    device_high = (device >> 8) & 0xFF
-    if protocol_base.startswith("necx"):
-        yield from encode(device_high)
-    else:
-        if device_high != 0:
-            raise IrgenInputError("16 bit device not supported")
-        yield from encode(~device)
-
-    yield from encode(function & 0xFF)
-    if protocol_suffix == 'y1':     # Yamaha special version 1
-        yield from encode(function ^ 0x7F)
-    elif protocol_suffix == 'y2':   # Yamaha special version 2
-        yield from encode(function ^ 0xFE)
-    elif protocol_suffix == 'y3':   # Yamaha special version 3
-        yield from encode(function ^ 0x7E)
-    elif protocol_suffix == 'f16':  # 16 bit function
-        yield from encode((function >> 8) & 0xFF)
-    else:                           # Standard invert
-        yield from encode(function ^ 0xFF)
-
-    yield 1   # Trailing burst
-    yield -3  # Trailing zero to separate
-
-
-@gen_raw_from_bitified_decorator(460.0)
+@instrument.stage("decode.nec", errors=IrgenInputError)
+def dec_raw_nec(data, protocol=None, **kwargs):
+    """Decode raw nec format"""
+    values = dec_raw_nec_bytes(data, dec_nec_leading_burst_count(protocol))
+    if values is None:
+        return (0, 0, 1)
+    return dec_nec_variant(protocol, values)
+
+
+@instrument.stage("encode.nec")
+def gen_raw_nec(protocol, device, function):
+    """Generate a raw list from nec parameters."""
+    yield from irp.protocols[protocol.lower()].encode(D=device, F=function)
+
+
+@instrument.stage("encode.rca38")
 def gen_raw_rca38(device, function):
     """Generate a raw list from rca38 parameters."""
+    yield from irp.protocols['rca38'].encode(D=device, F=function)
 
-    def encode_bit(s):
-        if s == '1':
-            yield 1
-            yield -4
-        else:
-            yield 1
-            yield -2
 
-    def rev_encode_bit(s):
-        if s == '1':
-            yield from encode_bit('0')
-        else:
-            yield from encode_bit('1')
+@instrument.stage("encode.irp")
+def gen_raw_irp(protocol, device, function, subdevice=0, toggle=0, mode=0):
+    """Generate a raw list for a declaratively defined protocol."""
+    yield from irp.protocols[protocol.lower()].encode(
+        D=device, F=function, S=subdevice, T=toggle, M=mode)
+
+
+@instrument.stage("decode.irp", errors=IrgenInputError)
+def dec_raw_irp(data, protocol=None, **kwargs):
+    """Decode a declaratively defined protocol into device, function and others."""
+    definition = irp.protocols[protocol.lower()]
+    params = definition.decode(data)
+    order = sorted(definition.params, key="DFTMS".index)
+    return tuple(params.get(name, 0) for name in order)
 
-    def encode(x, l, f):
-        for s in uX_to_bin(x, l):
-            yield from f(s)
 
-    # Starting burst
-    yield 8
-    yield -8
+def gen_raw_general_nec(protocol, device, function, **kwargs):
+    yield from gen_raw_nec(protocol,
+                           int(str(device), 0),
+                           int(str(function), 0))
 
-    # Device and function
-    yield from encode(device, 4, encode_bit)
-    yield from encode(function, 8, encode_bit)
 
-    # Reversed device and function
-    yield from encode(device, 4, rev_encode_bit)
-    yield from encode(function, 8, rev_encode_bit)
+def gen_raw_general_rc5(protocol, device, function, **kwargs):
+    yield from gen_raw_rc5(device=int(str(device), 0),
+                           function=int(str(function), 0),
+                           toggle=kwargs.get("toggle", 0))
 
-    # Ending burst
-    yield 1
-    yield -16
+
+def gen_raw_general_rc6(protocol, device, function, **kwargs):
+    yield from gen_raw_rc6(device=int(str(device), 0),
+                           function=int(str(function), 0),
+                           toggle=kwargs.get("toggle", 0),
+                           mode=kwargs.get("mode", 0))
+
+
+def gen_raw_general_rca38(protocol, device, function, **kwargs):
+    yield from gen_raw_rca38(device=int(str(device), 0),
+                             function=int(str(function), 0))
+
+
+def gen_raw_general_irp(protocol, device, function, **kwargs):
+    yield from gen_raw_irp(protocol,
+                           int(str(device), 0),
+                           int(str(function), 0),
+                           subdevice=int(str(kwargs.get("subdevice", 0)), 0),
+                           toggle=kwargs.get("toggle", 0),
+                           mode=kwargs.get("mode", 0))
+
+
+def register_encoders(protocols, encoder):
+    """Register a general encoder for a list of protocols."""
+    for protocol in protocols:
+        registry.encoders.register(protocol, encoder)
+
+
+# built-in codecs register by target string like the formats, resolved on first use
+register_encoders(gen_raw_nec_protocols, 'irgen:gen_raw_general_nec')
+register_encoders(gen_raw_rc5_protocols, 'irgen:gen_raw_general_rc5')
+register_encoders(gen_raw_rc6_protocols, 'irgen:gen_raw_general_rc6')
+register_encoders(gen_raw_rca38_protocols, 'irgen:gen_raw_general_rca38')
+register_encoders(gen_raw_irp_protocols, 'irgen:gen_raw_general_irp')
 
 
 def gen_raw_general(protocol, device, function, **kwargs):
-    if protocol.lower() in gen_raw_nec_protocols:
-        yield from gen_raw_nec(protocol.lower(),
-                               int(str(device), 0),
-                               int(str(function), 0))
+    """Generate raw data for any registered protocol."""
+    protocol = protocol.lower()
+    yield from registry.encoders.get(protocol)(protocol, device, function, **kwargs)
 
-    if protocol.lower() in gen_raw_rc5_protocols:
-        yield from gen_raw_rc5(device=int(str(device), 0),
-                               function=int(str(function), 0),
-                               toggle=kwargs.get("toggle", 0))
 
-    if protocol.lower() in gen_raw_rc6_protocols:
-        yield from gen_raw_rc6(device=int(str(device), 0),
-                               function=int(str(function), 0),
-                               toggle=kwargs.get("toggle", 0),
-                               mode=kwargs.get("mode", 0))
+gen_raw_protocols_frequency = {
+    **{protocol: 38000 for protocol in gen_raw_nec_protocols},
+    **{protocol: 36000 for protocol in gen_raw_rc5_protocols},
+    **{protocol: 36000 for protocol in gen_raw_rc6_protocols},
+    **{protocol: 58000 for protocol in gen_raw_rca38_protocols},
+    **{protocol: irp.protocols[protocol].frequency for protocol in gen_raw_irp_protocols},
+}
 
-    if protocol.lower() in gen_raw_rca38_protocols:
-        yield from gen_raw_rca38(device=int(str(device), 0),
-                                 function=int(str(function), 0))
+gen_raw_protocols_period = {
+    **{protocol: 108000.0 for protocol in gen_raw_nec_protocols},
+    **{protocol: 128 * 889.0 for protocol in gen_raw_rc5_protocols},
+    **{protocol: 107000.0 for protocol in gen_raw_rc6_protocols},
+    **{protocol: irp.protocols[protocol].period for protocol in gen_raw_irp_protocols},
+}
 
 
-def gen_raw_from_broadlink(data):
-    """Genearate raw values from broadling data."""
-    v = iter(data)
-    code = next(v)
-    next(v)  # repeat
+@gen_raw_from_bitified_decorator(562.5)
+def gen_raw_nec_repeat(protocol):
+    """Generate the short nec repeat frame."""
+    yield 16  # leading burst
+    yield -4  # short space marks repeat
+    yield 1   # trailing burst
+
 
+def gen_raw_period(data, period):
+    """Extend trailing space of a frame so the frame lasts period microseconds."""
+    total = 0.0
+    last = None
+    for value in data:
+        if last is not None:
+            yield last
+        total += abs(value)
+        last = value
+
+    if last is None:
+        return
+
+    remain = period - total
+    if remain > 0:
+        if last < 0:
+            last -= remain
+        else:
+            yield last
+            last = -remain
+    yield last
+
+
+def gen_raw_repeated(protocol, device, function, repeats=1, **kwargs):
+    """Generate a code held for repeats frames, at the protocol frame period.
+
+    nec1 and necx1 send the short repeat frame after the first frame, other
+    protocols repeat the full frame. The toggle of rc5 and rc6 is kept for
+    all repeats, since it only changes between separate key presses. Frames
+    are generated once and streamed, so long holds use constant memory.
+    """
+    protocol = protocol.lower()
+    period = gen_raw_protocols_period.get(protocol)
+
+    def padded(data):
+        if period:
+            return tuple(gen_raw_period(data, period))
+        return tuple(data)
+
+    frame = padded(gen_raw_general(protocol, device, function, **kwargs))
+    if repeats < 1:
+        return
+    yield from frame
+
+    if protocol.split('-')[0] in ('nec1', 'necx1'):
+        frame = padded(gen_raw_nec_repeat(protocol))
+
+    for _ in range(repeats - 1):
+        yield from frame
+
+
+def gen_signal_general(protocol, device, function, **kwargs):
+    """Generate a compact raw signal with carrier frequency."""
+    return raw.RawSignal(
+        raw.paired(raw.simplify(
+            gen_raw_general(protocol, device, function, **kwargs))),
+        frequency=gen_raw_protocols_frequency.get(protocol.lower()))
+
+
+broadlink_decode_table = [round(x * 8192 / 269, 0) for x in range(256)]
+
+
+@instrument.stage("parse.broadlink", errors=IrgenInputError)
+def gen_raw_array_from_broadlink(data):
+    """Decode broadlink data into an array of raw values in a single scan."""
+    try:
+        view = memoryview(data).cast('B')
+    except TypeError:
+        view = memoryview(bytes(data))
+
+    if len(view) < 4:
+        raise IrgenInputError("Broadlink data too short, expected at least header length 4")
+
+    code = view[0]
     if code != 0x26:
         raise IrgenInputError(f"Expected broadlink IR code 0x26, got {code:#x}")
 
-    length = int.from_bytes(islice(v, 2), byteorder='little')
+    length = int.from_bytes(view[2:4], byteorder='little')
     if length < 3:
         raise IrgenInputError("Broadlink data too short, expected at least trailer length 3")
- 
-    def decode_one(x):
-        return round(x * 8192 / 269, 0)
 
-    def decode_iter(x):
-        sign = 1
-        while True:
-            try:
-                d = next(x)
-            except StopIteration:
-                return
-            if d == 0:
-                d = int.from_bytes(islice(x, 2), byteorder='big')
-            
-            yield sign * decode_one(d)
-            sign = sign * -1
-    
-    yield from decode_iter(islice(v, length))
-
-    rem = bytes(v)
+    payload = view[4:4 + length]
+    result = array('d')
+    table = broadlink_decode_table
+    sign = 1
+    index = 0
+    end = len(payload)
+    while index < end:
+        d = payload[index]
+        index += 1
+        if d == 0:
+            d = int.from_bytes(payload[index:index + 2], byteorder='big')
+            index += 2
+            result.append(sign * round(d * 8192 / 269, 0))
+        else:
+            result.append(sign * table[d])
+        sign = -sign
+
+    rem = view[4 + length:]
     if any(rem):
         LOG.warning("Ignored extra data: %s", rem.hex())
 
+    if instrument.enabled:
+        instrument.add("parse.broadlink", calls=0, bytes=len(view))
+
+    return result
+
+
+def gen_raw_from_broadlink(data):
+    """Genearate raw values from broadling data."""
+    yield from gen_raw_array_from_broadlink(data)
+
 
 def gen_raw_from_broadlink_base64(data):
     """Generate raw data from a base 64 encoded broadlink data."""
-    yield from gen_raw_from_broadlink(b64decode(data))
+    from . import cache
+    yield from cache.cached_conversion(
+        'broadlink_base64', data, 'raw', (),
+        lambda: gen_raw_array_from_broadlink(b64decode(data)).tolist())
 
 
-def gen_broadlink_from_raw(data, repeat=0):
-    """Generate broadlink datat from a raw values."""
-    yield from b'\x26'  # IR
-    yield from repeat.to_bytes(1, byteorder='big')  # Repeat
+def gen_raw_arrays_from_broadlink_base64(datas):
+    """Decode a list of base 64 encoded broadlink data into raw arrays."""
+    return [gen_raw_array_from_broadlink(b64decode(data)) for data in datas]
+
+
+@instrument.stage("format.broadlink")
+def gen_broadlink_bytes_from_raw(data, repeat=0):
+    """Encode raw values into a preallocated broadlink bytearray."""
 
     # all broadlink ir captures will end with
     # 0x00 0x0d 0x05, which is just a long
@@ -483,36 +528,153 @@ def gen_broadlink_from_raw(data, repeat=0):
     # our data ends with silence.
     trailing_silience = -101502.0
 
-    def encode_one(x):
-        # v = abs(int(i / 32.84))
-        v = abs(round(x * 269 / 8192))
+    values = [abs(round(x * 269 / 8192))
+              for x in raw.paired(raw.simplify(data), trailing_silience)]
+    count = sum(3 if v > 255 else 1 for v in values)
+
+    # calculate total length for padding
+    total = count + 4  # header+len+trailer
+    padding = (total + 4) % 16  # rm.send_data() 4 byte header (not seen here)
+    if padding:
+        total += 16 - padding
+
+    result = bytearray(total)
+    result[0] = 0x26  # IR
+    result[1] = repeat
+    result[2:4] = count.to_bytes(2, byteorder='little')
+
+    index = 4
+    for v in values:
         if v > 255:
-            yield from b'\x00'
-            yield from v.to_bytes(2, byteorder='big')
+            result[index + 1:index + 3] = v.to_bytes(2, byteorder='big')
+            index += 3
         else:
-            yield from v.to_bytes(1, byteorder='big')
+            result[index] = v
+            index += 1
 
-    def encode_list(x):
-        for i in raw.paired(raw.simplify(x), trailing_silience):
-            yield from encode_one(i)
+    if instrument.enabled:
+        instrument.add("format.broadlink", calls=0, bytes=total)
+    return result
 
-    c = bytearray(encode_list(data))
-    count = len(c)
-    yield from count.to_bytes(2, byteorder='little')
-    yield from c
 
-    # calculate total length for padding
-    count += 4  # header+len+trailer
-    count += 4  # rm.send_data() 4 byte header (not seen here)
-    if count % 16:
-        yield from bytearray(16 - (count % 16))
+def gen_broadlink_from_raw(data, repeat=0):
+    """Generate broadlink datat from a raw values."""
+    yield from gen_broadlink_bytes_from_raw(data, repeat)
 
 
 def gen_broadlink_base64_from_raw(data, repeat=0):
     """Generate broadlink base64 encoded from raw data."""
-    return b64encode(bytes(gen_broadlink_from_raw(data, repeat)))
+    return b64encode(gen_broadlink_bytes_from_raw(data, repeat))
+
+
+def gen_broadlink_base64_from_raw_arrays(datas, repeat=0):
+    """Encode a list of raw values into base 64 encoded broadlink data."""
+    return [b64encode(gen_broadlink_bytes_from_raw(data, repeat)) for data in datas]
 
 
+pronto_short_rc5 = 0x5000
+pronto_short_rc5x = 0x5001
+pronto_short_rc6 = 0x6000
+pronto_short_nec = 0x900A
+
+pronto_short_nec_suffixes = {
+    None: 0xFF,
+    'y1': 0x7F,
+    'y2': 0xFE,
+    'y3': 0x7E,
+}
+
+
+def dec_pronto_short(data):
+    """Decode pronto predefined format into (protocol, device, function)."""
+    v = list(data)
+    if len(v) < 6:
+        raise IrgenInputError(f"Pronto short format too short, got {len(v)} words")
+    kind = v[0]
+
+    if kind == pronto_short_rc5:
+        device, function = v[4], v[5]
+        if device > 31 or function > 127:
+            raise IrgenInputError(f"Pronto rc5 values out of range {device} {function}")
+        return ('rc5', device, function)
+
+    if kind == pronto_short_rc6:
+        device, function = v[4], v[5]
+        if device > 255 or function > 255:
+            raise IrgenInputError(f"Pronto rc6 values out of range {device} {function}")
+        return ('rc6', device, function)
+
+    if kind == pronto_short_nec:
+        device, device_2 = v[4] >> 8, v[4] & 0xFF
+        function, function_2 = v[5] >> 8, v[5] & 0xFF
+        if device_2 == device ^ 0xFF:
+            protocol = 'nec1'
+        else:
+            protocol = 'necx1'
+            device |= device_2 << 8
+        for suffix, invert in pronto_short_nec_suffixes.items():
+            if function_2 == function ^ invert:
+                return (protocol if suffix is None else f"{protocol}-{suffix}", device, function)
+        return (protocol + '-f16', device, function | function_2 << 8)
+
+    if kind == pronto_short_rc5x:
+        raise IrgenInputError("Pronto rc5x format 5001 is not supported")
+
+    raise IrgenInputError(f"Unsupported pronto format {kind:04x}")
+
+
+def gen_pronto_short_int(protocol, device, function, **kwargs):
+    """Generate pronto predefined format ints from protocol parameters."""
+    protocol = protocol.lower()
+    device = int(str(device), 0)
+    function = int(str(function), 0)
+
+    if protocol in gen_raw_rc5_protocols:
+        if device > 31 or function > 127:
+            raise IrgenInputError(f"Rc5 values out of range {device} {function}")
+        yield from (pronto_short_rc5, 0x0073, 0x0000, 0x0001, device, function)
+
+    elif protocol in gen_raw_rc6_protocols:
+        if kwargs.get("mode", 0):
+            raise IrgenInputError("Pronto rc6 format only supports mode 0")
+        if device > 255 or function > 255:
+            raise IrgenInputError(f"Rc6 values out of range {device} {function}")
+        yield from (pronto_short_rc6, 0x0073, 0x0000, 0x0002, device, function)
+
+    elif protocol in gen_raw_nec_protocols:
+        protocol_base, protocol_suffix = (protocol.split('-') + [None])[:2]
+        if protocol_base not in ('nec1', 'necx1'):
+            raise IrgenInputError(f"Pronto nec format not supported for {protocol}")
+
+        if protocol_base == 'nec1':
+            if device > 255:
+                raise IrgenInputError("16 bit device not supported")
+            device_2 = device ^ 0xFF
+        else:
+            device, device_2 = device & 0xFF, (device >> 8) & 0xFF
+
+        if protocol_suffix == 'f16':
+            function, function_2 = function & 0xFF, (function >> 8) & 0xFF
+        else:
+            if function > 255:
+                raise IrgenInputError("16 bit function not supported")
+            function_2 = function ^ pronto_short_nec_suffixes[protocol_suffix]
+
+        yield from (pronto_short_nec, 0x006D, 0x0000, 0x0001,
+                    device << 8 | device_2,
+                    function << 8 | function_2)
+
+    else:
+        raise IrgenInputError(f"No pronto predefined format for {protocol}")
+
+
+def gen_pronto_short(protocol, device, function, **kwargs):
+    """Generate pronto predefined format from protocol parameters."""
+    for value in gen_pronto_short_int(protocol, device, function, **kwargs):
+        yield "{0:0{1}x}".format(value, 4)
+
+
+@instrument.stage("parse.pronto", errors=IrgenInputError)
 def gen_raw_from_pronto(data):
     """Generate raw values from a pronto pair list."""
     clock = 0.241246  # Pronto clock base: 1000000 / (32768 * 506 / 4)
@@ -520,7 +682,9 @@ def gen_raw_from_pronto(data):
     v = iter(data)
     zero = next(v)
     if zero != 0:
-        raise IrgenInputError(f"Pronto data must start with 0, got {zero}")
+        protocol, device, function = dec_pronto_short([zero, *v])
+        yield from gen_raw_general(protocol, device, function)
+        return
     base = next(v)
     freq = 1.0 / (base * clock)
 
@@ -536,10 +700,16 @@ def gen_raw_from_pronto(data):
         yield -round(next(v) / freq, 1)
 
 
+@instrument.stage("format.pronto")
 def gen_pronto_from_raw_int(seq1, seq2, base=None, freq=None):
     """Generate pronto pair ints from raw."""
     clock = 0.241246  # Pronto clock base: 1000000 / (32768 * 506 / 4)
 
+    if freq is None and base is None:
+        frequency = getattr(seq2, 'frequency', None) or getattr(seq1, 'frequency', None)
+        if frequency:
+            freq = frequency / 1000000
+
     if freq is None:
         if base is None:
             freq = 0.040
@@ -570,9 +740,18 @@ def gen_pronto_from_raw_int(seq1, seq2, base=None, freq=None):
 
 def gen_pronto_from_raw(seq1, seq2, base=None, freq=None):
     """Generate pronto pair list from raw."""
-    data = gen_pronto_from_raw_int(seq1, seq2, base, freq)
-    for value in data:
-        yield "{0:0{1}x}".format(value, 4)
+    if freq is None and base is None:
+        frequency = getattr(seq2, 'frequency', None) or getattr(seq1, 'frequency', None)
+        if frequency:
+            freq = frequency / 1000000
+    seq1, seq2 = list(seq1), list(seq2)
+
+    def convert():
+        data = gen_pronto_from_raw_int(seq1, seq2, base, freq)
+        return ["{0:0{1}x}".format(value, 4) for value in data]
+
+    from . import cache
+    yield from cache.cached_conversion('raw', [seq1, seq2], 'pronto', (base, freq), convert)
 
 
 dec_raw_protocols_nec = {
@@ -580,9 +759,108 @@ dec_raw_protocols_nec = {
     for protocol in gen_raw_nec_protocols
 }
 
+dec_raw_protocols_irp = {
+    protocol: dec_raw_irp
+    for protocol in [*gen_raw_rca38_protocols, *gen_raw_irp_protocols]
+}
+
 dec_raw_protocols = {
     'rc5': dec_raw_rc5,
     'rc6': dec_raw_rc6,
 }
 
 dec_raw_protocols.update(dec_raw_protocols_nec)
+dec_raw_protocols.update(dec_raw_protocols_irp)
+
+
+def register_decoders(protocols):
+    """Register decoders from a protocol to decoder mapping."""
+    for protocol, decoder in protocols.items():
+        registry.decoders.register(protocol, decoder)
+
+
+register_decoders({protocol: f"irgen:{decoder.__name__}"
+                   for protocol, decoder in dec_raw_protocols.items()})
+
+
+def _near(value, expected, tolerance=0.2):
+    return abs((value - expected) / expected) < tolerance
+
+
+def _is_unit_multiple(data, logical_bit, tolerance=0.3):
+    """Check that all durations are close to a multiple of logical bit."""
+    for duration in data:
+        units = abs(duration) / logical_bit
+        if units < 0.5 or abs(units - round(units)) >= tolerance:
+            return False
+    return True
+
+
+@instrument.stage("decode.auto", errors=IrgenInputError)
+def dec_raw_auto(data, frame_gap=10000.0, **kwargs):
+    """Decode a single frame of unknown protocol.
+
+    The frame ends at the first space longer than frame_gap. It is
+    classified from its leading burst and timing, and only the plausible
+    decoders are tried. All nec variants are verified from a single bit
+    extraction. Returns list of (protocol, decoded) candidates.
+    """
+    frame = []
+    for duration in raw.simplify(data):
+        frame.append(duration)
+        if duration <= -frame_gap:
+            break
+
+    if len(frame) < 2:
+        raise IrgenInputError("Frame too short for protocol detection")
+
+    leading_burst, leading_space = frame[0], frame[1]
+    candidates = []
+
+    for leading_burst_count in (16, 8):
+        if not _near(leading_burst / leading_burst_count, 562.5):
+            continue
+        protocols = [protocol for protocol in gen_raw_nec_protocols
+                     if dec_nec_leading_burst_count(protocol) == leading_burst_count]
+        try:
+            values = dec_raw_nec_bytes(iter(frame), leading_burst_count)
+        except (IrgenInputError, StopIteration):
+            continue
+        if values is None:
+            candidates.extend((protocol, (0, 0, 1))
+                              for protocol in protocols if '-' not in protocol)
+            continue
+        for protocol in protocols:
+            try:
+                candidates.append((protocol, dec_nec_variant(protocol, values)))
+            except IrgenInputError:
+                pass
+
+    # ignore the trailing silence for timing check
+    body = frame[:-1] if frame[-1] < 0 else frame
+
+    for protocol in gen_raw_irp_protocols:
+        definition = irp.protocols[protocol]
+        if _near(leading_burst, definition.items[0][1] * definition.unit):
+            try:
+                candidates.append((protocol, dec_raw_irp(iter(frame), protocol=protocol)))
+            except (IrgenInputError, StopIteration):
+                pass
+
+    if (_near(leading_burst, 6 * 444.0) and _near(leading_space, -2 * 444.0)
+            and _is_unit_multiple(body, 444.0)):
+        try:
+            candidates.append(('rc6', dec_raw_rc6(iter(frame))))
+        except (IrgenInputError, StopIteration):
+            pass
+
+    if ((_near(leading_burst, 889.0) or _near(leading_burst, 2 * 889.0))
+            and _is_unit_multiple(body, 889.0)):
+        try:
+            candidates.append(('rc5', dec_raw_rc5(iter(frame))))
+        except (IrgenInputError, StopIteration):
+            pass
+
+    if not candidates:
+        raise IrgenInputError("No protocol matched frame")
+    return candidates
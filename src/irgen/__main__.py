@@ -1,42 +1,128 @@
-import itertools
-import irgen
 import sys
-from . import raw
-from irgen.exceptions import IrgenInputError
+from . import convert
+from .exceptions import IrgenInputError
+from .export import gen_hass_entityname  # noqa: F401
 
-def gen_hass_entityname(text):
-    text = text.lower()
-    text = text.replace(" ", "_")
-    text = text.replace(":", "_")
-    text = text.replace("+", "_plus_")
-    text = text.replace("-", "_minus_")
-    text = text.replace("__", "_")
-    text = text.strip("_")
-    return text
+
+def print_results(results):
+    for ok, text in results:
+        if isinstance(text, bytes):
+            # binary formats such as wav
+            sys.stdout.flush()
+            sys.stdout.buffer.write(text)
+            sys.stdout.buffer.flush()
+            continue
+        print(text, file=sys.stdout if ok else sys.stderr, flush=not ok)
+
+
+def main_batch(args):
+    from . import batch
+
+    if args.batch == '-':
+        file = sys.stdin
+    else:
+        file = open(args.batch, newline='')
+
+    batch_format = args.batch_format
+    if batch_format is None:
+        batch_format = 'csv' if args.batch.endswith('.csv') else 'jsonl'
+
+    with file:
+        if batch_format == 'csv':
+            rows = batch.gen_rows_from_csv(file)
+        else:
+            rows = batch.gen_rows_from_jsonl(file)
+
+        for results in batch.gen_batch(rows,
+                                       input=args.input,
+                                       output=args.output,
+                                       workers=args.jobs,
+                                       chunksize=args.chunk_size):
+            print_results(results)
+
+
+def main_export(args):
+    from . import export
+
+    codes = convert.gen_codes(args.input, args.data, args.path, args.irdb)
+    name = args.export_name
+    if name is None and args.input == 'device' and args.data:
+        name = args.data[0]
+
+    kwargs = dict(encoding=args.export_encoding, layout=args.export_layout, name=name,
+                  manufacturer=args.export_manufacturer, workers=args.jobs,
+                  chunksize=args.chunk_size)
+    if args.export == '-':
+        count = export.write_export(sys.stdout, codes, **kwargs)
+    else:
+        with open(args.export, 'w', encoding='utf-8') as file:
+            count = export.write_export(file, codes, **kwargs)
+    print("Exported {} commands".format(count), file=sys.stderr)
+
+
+def main_segment(args):
+    from itertools import chain
+    from . import segment
+
+    codes = convert.gen_codes(args.input, args.data, args.path, args.irdb)
+    data = list(chain.from_iterable(code['raw'] for code in codes))
+    for result in segment.gen_decoded_segments(data, args.output, args.segment,
+                                               workers=args.jobs, chunksize=args.chunk_size):
+        if result.error:
+            print("frame {} at {:.0f}us: Error '{}'".format(
+                result.index, result.time, result.error), file=sys.stderr)
+        else:
+            print("frame {} at {:.0f}us: {}".format(result.index, result.time, result.value))
+
+
+def main_wav(args):
+    """Render all codes into a single wav file, streamed as it is rendered."""
+    from itertools import chain
+    from . import registry
+
+    codes = list(convert.gen_codes_repeated(
+        convert.gen_codes(args.input, args.data, args.path, args.irdb), args.repeats))
+    code = {
+        'functionname': 'wav',
+        'raw': chain.from_iterable(code['raw'] for code in codes),
+        'frequency': next((frequency for frequency in
+                           (code.get('frequency') or getattr(code['raw'], 'frequency', None)
+                            for code in codes)
+                           if frequency), None),
+    }
+    results = registry.outputs.get('wav')([code], carrier=args.carrier, rate=args.rate,
+                                          channels=args.channels, duty=args.duty, chunked=True)
+
+    if args.wav_file:
+        with open(args.wav_file, 'wb') as file:
+            for ok, chunk in results:
+                if not ok:
+                    raise IrgenInputError(chunk)
+                file.write(chunk)
+    else:
+        for ok, chunk in results:
+            if not ok:
+                raise IrgenInputError(chunk)
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
 
 
 def main():
+    if sys.argv[1:2] == ['serve']:
+        from . import serve
+        serve.main(sys.argv[2:])
+        return
+
     import argparse
     parser = argparse.ArgumentParser(description='Generate IR code')
     parser.add_argument('-i', dest='input', type=str,
-                        required=True,
                         help='Input protocol',
-                        choices=[*irgen.gen_raw_protocols,
-                                 'raw',
-                                 'irdb',
-                                 'broadlink',
-                                 'broadlink_base64',
-                                 'pronto'])
+                        choices=convert.input_formats())
     parser.add_argument('-o', dest='output', type=str,
-                        required=True,
                         help='Output protocol',
-                        choices=[*irgen.dec_raw_protocols.keys(),
-                                 'broadlink',
-                                 'broadlink_base64',
-                                 'raw',
-                                 'pronto'])
+                        choices=convert.output_formats())
     parser.add_argument('-r', dest='repeats',
-                              help='Number of repeats',
+                              help='Number of repeats, using protocol repeat frames where known',
                               default=1,
                               type=int)
 
@@ -45,104 +131,169 @@ def main():
                         help='Data')
 
     parser.add_argument('-p', '--path', dest='path',
-                        help='Device path used for irdb download')
+                        help='Device path used for irdb lookup, '
+                             '<manufacturer>/<type>/<device>,<subdevice>.csv')
+    parser.add_argument('--irdb', dest='irdb',
+                        help='Path of irdb index, defaults to user cache directory')
+    parser.add_argument('--irdb-import', dest='irdb_import',
+                        help='Import irdb checkout directory into the index')
+
+    parser.add_argument('--segment', dest='segment', type=float, metavar='GAP',
+                        help='Split input into frames on spaces of at least GAP microseconds '
+                             'and decode them in parallel with -j workers, output must be '
+                             'a protocol or auto')
+
+    parser.add_argument('--export', dest='export', metavar='FILE',
+                        help='Export all codes of the input as a json code set for Home Assistant, '
+                             '- for stdout, encoded in parallel with -j workers')
+    parser.add_argument('--export-layout', dest='export_layout', default='smartir',
+                        choices=['smartir', 'hass'],
+                        help='SmartIR device file or Broadlink remote codes')
+    parser.add_argument('--export-encoding', dest='export_encoding', default='broadlink_base64',
+                        choices=['broadlink_base64', 'pronto', 'raw'],
+                        help='Encoding of exported codes')
+    parser.add_argument('--export-name', dest='export_name',
+                        help='Device name of export, default the device with -i device')
+    parser.add_argument('--export-manufacturer', dest='export_manufacturer',
+                        help='Manufacturer of SmartIR export')
+
+    parser.add_argument('--list-devices', dest='list_devices', action='store_true',
+                        help='List devices and commands of the device library, used with -i device')
+
+    parser.add_argument('-b', '--batch', dest='batch',
+                        help='Convert codes from csv or json lines file, - for stdin. '
+                             'Rows may set input, output, data, repeats and path, '
+                             'defaulting to -i and -o')
+    parser.add_argument('--batch-format', dest='batch_format',
+                        choices=['csv', 'jsonl'],
+                        help='Format of batch file, default from file extension')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int,
+                        help='Number of worker processes for batch conversion or segmenting')
+    parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=64,
+                        help='Number of rows or frames per worker task in batch conversion or segmenting')
+
+    parser.add_argument('--carrier', type=float,
+                        help='Carrier frequency of wav output, default from protocol or 38000')
+    parser.add_argument('--rate', type=int, default=192000,
+                        help='Sample rate of wav output')
+    parser.add_argument('--duty', type=float, default=1 / 3,
+                        help='Carrier duty cycle of wav output')
+    parser.add_argument('--channels', type=int, choices=[1, 2], default=1,
+                        help='Channels of wav output, the second channel is inverted')
+    parser.add_argument('--wav-file', dest='wav_file',
+                        help='File to write wav output to, default stdout')
+
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true',
+                        help='Do not use the persistent conversion cache in the user cache directory')
+    parser.add_argument('--cache-size', dest='cache_size', type=int, default=64,
+                        help='Size limit of the persistent conversion cache in MB')
+
+    parser.add_argument('--profile', action='store_true',
+                        help='Print time spent per stage to stderr, '
+                             'worker processes of batch conversion are not included')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help='With --profile, also print cProfile statistics')
+    parser.add_argument('--profile-tracemalloc', action='store_true',
+                        help='With --profile, also print top memory allocations')
 
     args = parser.parse_args()
 
-    codes = []
-
-    # Parse input data
-    if args.input in 'irdb':
-        import csv
-        import requests
-
-        base = 'http://cdn.rawgit.com/probonopd/irdb/master/codes'
-        with requests.Session() as s:
-            download = s.get('{}/{}'.format(base, args.path))
-            content = download.content.decode('utf-8')
-            for row in csv.DictReader(content.splitlines(), delimiter=','):
-                code = {'functionname': row['functionname'],
-                        'raw': irgen.gen_raw_general(**row)}
-                codes.append(code)
-
-    elif args.input == 'raw':
-        code = {
-            'functionname': 'raw',
-            'raw': [float(x) for x in args.data]
-        }
-        codes.append(code)
-    elif args.input == 'broadlink':
-        code = {
-            'functionname': 'broadlink',
-            'raw': irgen.gen_raw_from_broadlink(bytes.fromhex(args.data[0]))
-        }
-        codes.append(code)
-    elif args.input == 'broadlink_base64':
-        code = {
-            'functionname': 'base64',
-            'raw': irgen.gen_raw_from_broadlink_base64(args.data[0].encode())
-        }
-        codes.append(code)
-    elif args.input == 'pronto':
-        code = {
-            'functionname': 'pronto',
-            'raw': irgen.gen_raw_from_pronto(int(x, base=16) for x in args.data)
-        }
-        codes.append(code)
+    if args.profile:
+        run_profiled(args, lambda: run(parser, args))
     else:
-        code = {
-            'functionname': '{}({})'.format(args.input,
-                                            ','.join(map(str, args.data))),
-            'raw': raw.paired(
-                raw.simplify(
-                irgen.gen_raw_general(args.input, *args.data)))
-        }
-        codes.append(code)
-
-    # Process raw data
-    if args.repeats > 1:
-        for code in codes:
-            code['raw'] = list(code['raw'])*(args.repeats)
-
-    # Generate output data
-    if args.output == 'broadlink':
-        for r in codes:
-            v = bytes(irgen.gen_broadlink_from_raw(code['raw']))
-            print(v.hex())
-
-    elif args.output == 'broadlink_base64':
-        for r in codes:
-            v = bytes(irgen.gen_broadlink_base64_from_raw(code['raw']))
-            print(v.decode('ascii'))
-
-    elif args.output == 'raw':
-        def signed(x):
-            for v in x:
-                if v > 0:
-                    yield "+{}".format(v)
-                else:
-                    yield "{}".format(v)
-        for code in codes:
-            print(" ".join(signed(code['raw'])))
-
-    elif args.output == "pronto":
-        for code in codes:
-            print(" ".join(irgen.gen_pronto_from_raw([], code['raw'], base=0x73)))
-
-    elif args.output in irgen.dec_raw_protocols:
-        parser = irgen.dec_raw_protocols[args.output]
-        for code in codes:
-            d = iter(list(code['raw']))
-            while True:
-                b, d = itertools.tee(d)
-                try:
-                    print(parser(b, protocol=args.output))
-                    d = b
-                except StopIteration:
-                    break
-                except IrgenInputError as exc:
-                    print( "Error '{}' while decoding {}".format(str(exc), list(d)), file=sys.stderr )
+        run(parser, args)
+
+
+def run_profiled(args, func):
+    from . import instrument
+
+    instrument.enable()
+    if args.profile_tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    if args.profile_cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        func()
+    finally:
+        if args.profile_cprofile:
+            import pstats
+            profiler.disable()
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+        if args.profile_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print("Peak traced memory {} bytes".format(peak), file=sys.stderr)
+            for statistic in snapshot.statistics('lineno')[:10]:
+                print(statistic, file=sys.stderr)
+        instrument.disable()
+        print(instrument.format_report(), file=sys.stderr)
+
+
+def run(parser, args):
+    if not args.no_cache and args.cache_size > 0:
+        from . import cache
+        cache.enable_disk_cache(max_size=args.cache_size << 20)
+
+    if args.irdb_import:
+        from .irdb import Irdb
+        with Irdb(args.irdb) as db:
+            count = db.import_tree(args.irdb_import)
+        print("Imported {} codes into {}".format(count, db.path), file=sys.stderr)
+        if args.input is None and args.batch is None:
+            return
+
+    if args.list_devices:
+        from .devices import Library
+        library = Library()
+        for device in library.devices():
+            print("{}: {}".format(device, ", ".join(library.commands(device))))
+        return
+
+    if args.batch:
+        main_batch(args)
+        return
+
+    if args.export:
+        if args.input is None:
+            parser.error("the following arguments are required: -i")
+        try:
+            main_export(args)
+        except IrgenInputError as exc:
+            parser.exit(1, "Error '{}'\n".format(str(exc)))
+        return
+
+    if args.input is None or args.output is None:
+        parser.error("the following arguments are required: -i, -o")
+
+    if args.segment:
+        try:
+            main_segment(args)
+        except IrgenInputError as exc:
+            parser.exit(1, "Error '{}'\n".format(str(exc)))
+        return
+
+    if args.output == 'wav':
+        try:
+            main_wav(args)
+        except IrgenInputError as exc:
+            parser.exit(1, "Error '{}'\n".format(str(exc)))
+        return
+
+    try:
+        print_results(convert.convert(args.input,
+                                      args.output,
+                                      args.data,
+                                      repeats=args.repeats,
+                                      path=args.path,
+                                      irdb=args.irdb))
+    except IrgenInputError as exc:
+        parser.exit(1, "Error '{}'\n".format(str(exc)))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
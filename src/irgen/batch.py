@@ -0,0 +1,79 @@
+"""Batch conversion of many codes across a worker pool."""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import csv
+import json
+import os
+from .convert import convert
+from .exceptions import IrgenError
+
+
+def gen_rows_from_csv(lines):
+    """Parse batch rows from csv with columns input, output, data and repeats."""
+    for row in csv.DictReader(lines):
+        row = {key: value for key, value in row.items() if value not in (None, '')}
+        if 'data' in row:
+            row['data'] = row['data'].split()
+        yield row
+
+
+def gen_rows_from_jsonl(lines):
+    """Parse batch rows from json lines."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        if isinstance(row.get('data'), str):
+            row['data'] = row['data'].split()
+        yield row
+
+
+def convert_row(row, input=None, output=None):
+    """Convert a single batch row, returning list of (ok, text)."""
+    try:
+        return list(convert(row.get('input', input),
+                            row.get('output', output),
+                            [str(x) for x in row.get('data', [])],
+                            repeats=int(row.get('repeats', 1)),
+                            path=row.get('path')))
+    except (IrgenError, ValueError, KeyError, IndexError, StopIteration) as exc:
+        return [(False, "Error '{}' while converting {}".format(str(exc) or type(exc).__name__, row))]
+
+
+def convert_chunk(rows, input=None, output=None):
+    """Convert a chunk of batch rows."""
+    return [convert_row(row, input, output) for row in rows]
+
+
+def gen_chunks(rows, chunksize):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def gen_batch(rows, input=None, output=None, workers=None, chunksize=64):
+    """Convert rows across a process pool, yielding results in input order.
+
+    Only a bounded window of chunks is in flight at any time, so results
+    are streamed as they finish without reading all rows up front.
+    """
+    if workers == 1:
+        for row in rows:
+            yield convert_row(row, input, output)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = workers * 2
+        pending = deque()
+        for chunk in gen_chunks(rows, chunksize):
+            pending.append(executor.submit(convert_chunk, chunk, input, output))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,230 @@
+"""Benchmarks for codecs and converters.
+
+Run with ``python -m irgen.bench``. Results are printed as a table and can
+be written as JSON with ``--output`` for comparison between releases.
+"""
+from base64 import b64decode
+import gc
+import glob
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+import irgen
+from . import raw
+from . import stream
+from .environment import version
+
+broadlink_vectors = [
+    b"JgDgAAABKpEVERQRFREUERURFBEVERQRFTUVNhQ2FTYUNhU1FTYUNhURFBEVERQ2FTYUERURFBEVNRU2FDYVERQRFTUVNhQ2FQAFJAABKkkUAAxqAAEqRhcADGoAASpJFAAMagABK0gVAAxqAAEqSRQADGsAASpIFQAMagABKkcWAAxqAAEqSRQADGoAASpJFAAMagABK0YXAAxqAAEqSRQADGoAAStIFQAMagABK0gVAAxpAAErSBUADGoAASpIFQAMagABKkkUAAxrAAEqSRQADGoAAStIFQAMagABK0gVAA0FAAAAAAAAAAA=",
+    b"JgA6AJdPJhwPHCYcJxw+HAACGxwOHA8cDhwPHA8bDxwPGwAHIxw+HFYcJxw+HCYcPxs/HCYcJwAChJ4ADQUAAAAAAAAAAAAAAAAAAA==",
+    b"JgBYAFYhDh4MEBANDCEaEA8ODw4PDg8ODw4PDg8ODw4PDg4PDg8eDg0eDBEOAArPViEMHwwRDg8NIBoQDg8ODw4PDg8ODw4PDg8PDg8ODg8PDh4NDh8ODgwADQU=",
+    b"JgBYAAABKJURFBITEjgVERMSFBESExIUEjgSOBQREzcSOBI4EzcWNRITEhMWDxM3FRESExITEhMSOBI4EjkSExI4ETkRORI4EwAFEAABKEsTAAxPAAEoSxMADQU=",
+    b"JgAaAB0dOh0dHR0dHR0dHR0dHR0dOh0dOh0dAA0FAAAAAAAAAAAAAAAAAAA=",
+]
+
+protocol_limits = {
+    'rc5': (32, 128),
+    'rc6': (256, 256),
+    'rca38': (16, 256),
+    'sirc12': (32, 128),
+    'sirc15': (256, 128),
+    'sirc20': (32, 128),
+}
+
+
+def default_devices_path():
+    """Location of the device descriptions shipped as package data."""
+    from .devices import default_directory
+    return default_directory()
+
+
+def gen_broadlink_from_devices(path):
+    """Extract base64 broadlink codes from device description files."""
+    pattern = re.compile(r'"[^"]*"\s*:\s*"(Jg[A-Za-z0-9+/=]+)"')
+    for name in sorted(glob.glob(os.path.join(path, "*.txt"))):
+        with open(name, encoding="utf-8") as file:
+            for match in pattern.finditer(file.read()):
+                yield match.group(1).encode()
+
+
+def gen_params(protocol, count):
+    """Generate count (device, function) pairs valid for protocol."""
+    devices, functions = protocol_limits.get(protocol, (256, 256))
+    for index in range(count):
+        yield (index // functions) % devices, index % functions
+
+
+def measure(func, repeat):
+    """Return best time of repeat runs and peak traced memory of func."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def gen_benchmarks(count, devices_path=None):
+    """Generate (name, codes, function) benchmark definitions."""
+    for protocol in irgen.gen_raw_protocols:
+        params = list(gen_params(protocol, count))
+
+        def encode(protocol=protocol, params=params):
+            for device, function in params:
+                list(irgen.gen_raw_general(protocol, device, function))
+        yield f"encode/{protocol}", len(params), encode
+
+    for protocol, decoder in irgen.dec_raw_protocols.items():
+        frames = [list(irgen.gen_raw_general(protocol, device, function))
+                  for device, function in gen_params(protocol, count)]
+
+        def decode(protocol=protocol, decoder=decoder, frames=frames):
+            for frame in frames:
+                decoder(iter(frame), protocol=protocol)
+        yield f"decode/{protocol}", len(frames), decode
+
+        if protocol not in stream.stream_protocols:
+            continue
+        data = [duration for frame in frames for duration in frame]
+
+        def decode_stream(protocol=protocol, data=data):
+            for _ in stream.gen_decoded_from_raw(data, protocol):
+                pass
+        yield f"decode_stream/{protocol}", len(frames), decode_stream
+
+    try:
+        from . import vector
+    except ImportError:
+        vector = None
+
+    if vector:
+        for protocol in vector.gen_raw_batch_protocols:
+            devices, functions = zip(*gen_params(protocol, count))
+
+            def encode_batch(protocol=protocol, devices=devices, functions=functions):
+                vector.gen_raw_batch(protocol, devices, functions)
+            yield f"encode_batch/{protocol}", len(devices), encode_batch
+
+        for protocol in vector.dec_raw_batch_protocols:
+            devices, functions = zip(*gen_params(protocol, count))
+            frames = vector.gen_raw_batch(protocol, devices, functions)
+
+            def decode_batch(protocol=protocol, frames=frames):
+                vector.dec_raw_batch(protocol, frames)
+            yield f"decode_batch/{protocol}", len(frames), decode_batch
+
+    vectors = list(broadlink_vectors)
+    if devices_path and os.path.isdir(devices_path):
+        vectors.extend(gen_broadlink_from_devices(devices_path))
+    vectors = (vectors * (count // len(vectors) + 1))[:count]
+    raws = [list(irgen.gen_raw_from_broadlink_base64(data)) for data in vectors]
+    blobs = [b64decode(data) for data in vectors]
+
+    def broadlink_base64_to_raw():
+        for data in vectors:
+            list(irgen.gen_raw_from_broadlink_base64(data))
+    yield "convert/broadlink_base64_to_raw", len(vectors), broadlink_base64_to_raw
+
+    def broadlink_to_raw():
+        for data in blobs:
+            irgen.gen_raw_array_from_broadlink(data)
+    yield "convert/broadlink_to_raw", len(blobs), broadlink_to_raw
+
+    def raw_to_broadlink_base64():
+        for data in raws:
+            irgen.gen_broadlink_base64_from_raw(data)
+    yield "convert/raw_to_broadlink_base64", len(raws), raw_to_broadlink_base64
+
+    def raw_to_pronto():
+        for data in raws:
+            list(irgen.gen_pronto_from_raw([], data, base=0x73))
+    yield "convert/raw_to_pronto", len(raws), raw_to_pronto
+
+    prontos = [list(irgen.gen_pronto_from_raw_int([], data, base=0x73)) for data in raws]
+
+    def pronto_to_raw():
+        for data in prontos:
+            list(irgen.gen_raw_from_pronto(data))
+    yield "convert/pronto_to_raw", len(prontos), pronto_to_raw
+
+    def raw_simplify_paired():
+        for data in raws:
+            list(raw.paired(raw.simplify(data)))
+    yield "convert/raw_simplify_paired", len(raws), raw_simplify_paired
+
+    params = list(gen_params('rc5', count))
+
+    def pronto_short():
+        for device, function in params:
+            list(irgen.gen_pronto_short('rc5', device, function))
+    yield "convert/pronto_short", len(params), pronto_short
+
+
+def run(count=256, repeat=3, select=None, devices_path=None):
+    """Run benchmarks, returning list of result dicts."""
+    results = []
+    for name, codes, func in gen_benchmarks(count, devices_path):
+        if select and not any(pattern in name for pattern in select):
+            continue
+        seconds, peak = measure(func, repeat)
+        results.append({
+            'name': name,
+            'codes': codes,
+            'seconds': seconds,
+            'codes_per_second': codes / seconds if seconds else None,
+            'peak_bytes': peak,
+        })
+    return results
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark IR codecs and converters')
+    parser.add_argument('-n', '--count', type=int, default=256,
+                        help='Number of codes per benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Number of timed runs, best is reported')
+    parser.add_argument('-k', '--select', action='append',
+                        help='Only run benchmarks with names containing this, may be repeated')
+    parser.add_argument('--devices', default=default_devices_path(),
+                        help='Directory with device descriptions used as corpus')
+    parser.add_argument('-o', '--output',
+                        help='Write JSON results to file')
+    args = parser.parse_args(argv)
+
+    results = run(args.count, args.repeat, args.select, args.devices)
+
+    for result in results:
+        print("{name:40} {codes:8d} {codes_per_second:14.0f}/s {peak_bytes:12d} B".format(**result))
+
+    if args.output:
+        report = {
+            'irgen': version(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'count': args.count,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Integer bit field helpers.
+
+Bit fields are handled with shifts and masks only. Fields are sent most
+significant bit first unless ``lsb`` is set.
+"""
+from functools import lru_cache
+from itertools import chain
+
+reverse_table = tuple(int(format(value, '08b')[::-1], 2) for value in range(256))
+
+
+def mask(width):
+    return (1 << width) - 1
+
+
+def reverse(value, width):
+    """Reverse the order of the lowest width bits of value."""
+    result = 0
+    for shift in range(0, width, 8):
+        result = (result << 8) | reverse_table[(value >> shift) & 0xFF]
+    return result >> (-width % 8)
+
+
+def gen_bits(value, width, lsb=False):
+    """Generate the bits of a field as integers in send order."""
+    order = range(width) if lsb else range(width - 1, -1, -1)
+    for bit in order:
+        yield (value >> bit) & 1
+
+
+def from_bits(bits, lsb=False):
+    """Combine bits in send order into an integer."""
+    value = 0
+    width = 0
+    for bit in bits:
+        value = (value << 1) | bit
+        width += 1
+    if lsb:
+        value = reverse(value, width)
+    return value
+
+
+def split_chunks(width, lsb=False):
+    """Split a field into (shift, width) chunks of at most a byte, in send order."""
+    if lsb:
+        return [(shift, min(8, width - shift)) for shift in range(0, width, 8)]
+    first = width % 8 or 8
+    chunks = [(width - first, first)]
+    for shift in range(width - first - 8, -1, -8):
+        chunks.append((shift, 8))
+    return chunks
+
+
+@lru_cache(maxsize=None)
+def pattern_table(zero, one, lsb=False, width=8, unit=1.0):
+    """Durations of every value of width bits, given the durations of a zero and one bit."""
+    patterns = (tuple(x * unit for x in zero), tuple(x * unit for x in one))
+    return tuple(tuple(chain.from_iterable(patterns[bit] for bit in gen_bits(value, width, lsb)))
+                 for value in range(1 << width))
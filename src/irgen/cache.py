@@ -0,0 +1,334 @@
+"""Memoizing caches for generated raw codes and conversions.
+
+``EncodeCache`` keeps generated timings in memory. ``DiskCache`` persists
+conversion results in a sqlite file in the user cache directory, so they
+survive between processes. It is keyed by a digest of input format,
+payload, output format, options and irgen version, bounded in total size
+with least recently used entries evicted.
+"""
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+import glob
+from hashlib import blake2b
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock, local
+from . import raw
+from .environment import cache_dir, version
+
+LOG = logging.getLogger(__name__)
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+def normalize_key(protocol, device, function, toggle=0, mode=0, subdevice=0):
+    """Create a normalized cache key from generator parameters."""
+    return (protocol.lower(),
+            int(str(device), 0),
+            int(str(function), 0),
+            int(str(toggle), 0),
+            int(str(mode), 0),
+            int(str(subdevice), 0))
+
+
+class EncodeCache:
+    """Bounded LRU cache of simplified and paired raw timings."""
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive, got {maxsize}")
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        if value < 1:
+            raise ValueError(f"Cache size must be positive, got {value}")
+        with self._lock:
+            self._maxsize = value
+            self._evict()
+
+    def _evict(self):
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def get(self, protocol, device, function, toggle=0, mode=0, subdevice=0):
+        """Return the raw timing tuple for the given parameters."""
+        key = normalize_key(protocol, device, function, toggle, mode, subdevice)
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._data.move_to_end(key)
+                return value
+
+        from . import gen_raw_general
+        value = tuple(raw.paired(raw.simplify(
+            gen_raw_general(key[0], key[1], key[2], toggle=key[3], mode=key[4],
+                            subdevice=key[5]))))
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+        return value
+
+    def invalidate(self, protocol=None, device=None, function=None):
+        """Drop cached entries matching the given parameters.
+
+        Parameters left as None match any value. Returns number of entries removed.
+        """
+        def match(key):
+            return ((protocol is None or key[0] == protocol.lower()) and
+                    (device is None or key[1] == int(str(device), 0)) and
+                    (function is None or key[2] == int(str(function), 0)))
+
+        with self._lock:
+            keys = [key for key in self._data if match(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self):
+        """Return hit/miss/eviction statistics."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._maxsize, len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return normalize_key(*key) in self._data
+
+
+default_cache = EncodeCache()
+
+
+def gen_raw_general_cached(protocol, device, function, **kwargs):
+    """Cached variant of gen_raw_general returning simplified, paired timings."""
+    return default_cache.get(protocol, device, function,
+                             toggle=kwargs.get("toggle", 0),
+                             mode=kwargs.get("mode", 0),
+                             subdevice=kwargs.get("subdevice", 0))
+
+
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    key BLOB PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversions_accessed ON conversions (accessed);
+"""
+
+
+def default_disk_path():
+    """Default location of the conversion cache, in the user cache directory."""
+    return os.path.join(cache_dir(), "conversions.sqlite")
+
+
+def _payload(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data).hex()
+    if isinstance(data, str):
+        return data
+    return [_payload(x) if isinstance(x, (bytes, str, list, tuple)) else x for x in data]
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Version of the installed code, with a digest of the package sources.
+
+    Source checkouts and editable installs report no or the same version
+    across edits, so the size and modification time of every module is
+    part of it.
+    """
+    digest = blake2b(digest_size=8)
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return f"{version()}+{digest.hexdigest()}"
+
+
+def disk_key(input, data, output, options=()):
+    """Digest of a conversion, from its input format, payload, output format and options."""
+    payload = blake2b(json.dumps(_payload(data)).encode(), digest_size=16).hexdigest()
+    key = json.dumps([input, payload, output, list(options), code_version()], default=str)
+    return blake2b(key.encode(), digest_size=16).digest()
+
+
+class DiskCache:
+    """Persistent LRU cache of json values in a sqlite file, bounded to max_size bytes."""
+
+    def __init__(self, path=None, max_size=64 << 20):
+        if max_size < 1:
+            raise ValueError(f"Cache size must be positive, got {max_size}")
+        self.path = path or default_disk_path()
+        self.max_size = max_size
+        self._lock = Lock()
+        self._db = None
+        self._pid = None
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _connect(self):
+        # connections are not carried over into forked workers
+        if self._db is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            # concurrent readers while batch workers write
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(DISK_SCHEMA)
+            self._pid = os.getpid()
+            self._size = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM conversions").fetchone()[0]
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+    def get(self, key):
+        """Return the value stored under key, or None."""
+        with self._lock:
+            try:
+                db = self._connect()
+                row = db.execute("SELECT value FROM conversions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return None
+                with db:
+                    db.execute("UPDATE conversions SET accessed = ? WHERE key = ?",
+                               (time.time(), key))
+            except (OSError, sqlite3.Error) as exc:
+                LOG.debug("Conversion cache %s unavailable: %s", self.path, exc)
+                return None
+            self._hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store a json serializable value under key, evicting old entries when full."""
+        value = json.dumps(value)
+        size = len(value) + len(key)
+        if size > self.max_size:
+            return
+        with self._lock:
+            try:
+                db = self._connect()
+                with db:
+                    previous = db.execute("SELECT size FROM conversions WHERE key = ?",
+                                          (key,)).fetchone()
+                    db.execute("INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?)",
+                               (key, value, size, time.time()))
+                    self._size += size - (previous[0] if previous else 0)
+                    if self._size > self.max_size:
+                        self._evict(db)
+            except (OSError, sqlite3.Error) as exc:
+                LOG.debug("Conversion cache %s unavailable: %s", self.path, exc)
+
+    def _evict(self, db):
+        # evict down to 90% to not evict on every insert
+        target = self.max_size * 9 // 10
+        excess = self._size - target
+        keys = []
+        for key, size in db.execute("SELECT key, size FROM conversions ORDER BY accessed"):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+        db.executemany("DELETE FROM conversions WHERE key = ?", keys)
+        self._evictions += len(keys)
+        self._size = db.execute("SELECT COALESCE(SUM(size), 0) FROM conversions").fetchone()[0]
+
+    def clear(self):
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM conversions")
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self):
+        """Return hit/miss/eviction statistics, with size in bytes."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self.max_size, self._size)
+
+
+disk_cache = None
+
+_state = local()
+
+
+def enable_disk_cache(path=None, max_size=64 << 20):
+    """Enable the persistent conversion cache, used by convert and the library converters."""
+    global disk_cache
+    disk_cache = DiskCache(path, max_size)
+    return disk_cache
+
+
+def disable_disk_cache():
+    global disk_cache
+    if disk_cache is not None:
+        disk_cache.close()
+    disk_cache = None
+
+
+class bypass_disk_cache:
+    """Context in which nested conversions skip the persistent cache.
+
+    Used while computing a result that is cached as a whole, so a
+    conversion is only looked up and stored once.
+    """
+
+    def __enter__(self):
+        _state.bypass = getattr(_state, 'bypass', 0) + 1
+
+    def __exit__(self, *args):
+        _state.bypass -= 1
+
+
+def cached_conversion(input, data, output, options, func):
+    """Return the json value of func(), through the persistent cache when enabled."""
+    if disk_cache is None or getattr(_state, 'bypass', 0):
+        return func()
+    key = disk_key(input, data, output, options)
+    value = disk_cache.get(key)
+    if value is None:
+        value = func()
+        disk_cache.put(key, value)
+    return value
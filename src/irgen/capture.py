@@ -0,0 +1,146 @@
+"""Extraction of raw durations from sampled captures.
+
+Requires numpy. Wav files and raw binary sample dumps are memory mapped
+and processed in blocks, so captures larger than memory can be read. Each
+block is thresholded into on/off samples, demodulated by treating any on
+sample within ``gap`` microseconds as part of the same burst, and reduced
+to run lengths with vectorized edge detection. Only the resulting durations
+become python objects.
+"""
+import os
+import struct
+import numpy as np
+from .exceptions import IrgenInputError
+
+wav_format_pcm = 1
+wav_format_float = 3
+wav_format_extensible = 0xFFFE
+
+wav_dtypes = {
+    (wav_format_pcm, 8): ('u1', 128, 127),
+    (wav_format_pcm, 16): ('<i2', 0, 32767),
+    (wav_format_pcm, 32): ('<i4', 0, 2147483647),
+    (wav_format_float, 32): ('<f4', 0, 1.0),
+}
+
+
+def gen_raw_from_samples(samples, rate, level=0, center=0, bit=None, invert=False,
+                         gap=100.0, blocksize=1 << 20):
+    """Generate durations in microseconds from a sample array.
+
+    Samples are on when their distance from center exceeds level, or when
+    the given bit is set. Leading silence is skipped.
+    """
+    gap = max(1, round(gap * rate / 1e6))
+    shift = gap - 1
+    scale = 1e6 / rate
+    tail = np.zeros(shift, dtype=bool)
+    state = None
+    run = 0
+
+    def emit(state, run):
+        # the envelope extends bursts by shift samples, move them to the space
+        if state:
+            return (run - shift) * scale
+        return -(run + shift) * scale
+
+    for start in range(0, len(samples), blocksize):
+        block = np.asarray(samples[start:start + blocksize])
+        if bit is not None:
+            on = ((block >> bit) & 1).astype(bool)
+        else:
+            on = np.abs(block.astype(np.float64) - center) > level
+        if invert:
+            on = ~on
+
+        extended = np.concatenate((tail, on))
+        tail = extended[len(extended) - shift:]
+        counts = np.concatenate(([0], np.cumsum(extended, dtype=np.int64)))
+        envelope = (counts[gap:] - counts[:-gap]) > 0
+
+        boundaries = np.concatenate(([0], np.flatnonzero(envelope[1:] != envelope[:-1]) + 1,
+                                     [len(envelope)]))
+        lengths = np.diff(boundaries).tolist()
+        levels = envelope[boundaries[:-1]].tolist()
+
+        for length, value in zip(lengths, levels):
+            if value == state:
+                run += length
+                continue
+            if state is not None:
+                yield emit(state, run)
+                run = length
+            elif value:
+                run = length
+            else:
+                # leading silence
+                continue
+            state = value
+
+    if state is not None:
+        yield emit(state, run)
+
+
+def open_wav(path, channel=0):
+    """Memory map samples of a wav channel, returns (samples, rate, center, full scale)."""
+    with open(path, 'rb') as file:
+        header = file.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise IrgenInputError(f"Not a wav file {path}")
+
+        fmt = None
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                raise IrgenInputError(f"No data chunk in wav file {path}")
+            name, size = struct.unpack('<4sI', chunk)
+            if name == b'fmt ':
+                fmt = file.read(size)
+                file.seek(size & 1, 1)
+            elif name == b'data':
+                offset = file.tell()
+                break
+            else:
+                file.seek(size + (size & 1), 1)
+
+    if fmt is None:
+        raise IrgenInputError(f"No format chunk in wav file {path}")
+
+    tag, channels, rate, _, align, width = struct.unpack('<HHIIHH', fmt[:16])
+    if tag == wav_format_extensible and len(fmt) >= 26:
+        tag = struct.unpack('<H', fmt[24:26])[0]
+    try:
+        dtype, center, scale = wav_dtypes[(tag, width)]
+    except KeyError:
+        raise IrgenInputError(f"Unsupported wav format {tag} with {width} bits") from None
+    if not 0 <= channel < channels:
+        raise IrgenInputError(f"Channel {channel} out of range, wav has {channels}")
+
+    frames = min(size, os.path.getsize(path) - offset) // align
+    return _memmap(path, dtype, offset, frames, channels)[:, channel], rate, center, scale
+
+
+def _memmap(path, dtype, offset, frames, channels):
+    if frames <= 0:
+        raise IrgenInputError(f"No samples in {path}")
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+
+
+def open_samples(path, dtype='u1', channels=1, channel=0, offset=0):
+    """Memory map a raw binary sample dump."""
+    dtype = np.dtype(dtype)
+    frames = (os.path.getsize(path) - offset) // (dtype.itemsize * channels)
+    return _memmap(path, dtype, offset, frames, channels)[:, channel]
+
+
+def gen_raw_from_wav(path, channel=0, threshold=0.25, **kwargs):
+    """Generate durations from a wav capture, threshold relative to full scale."""
+    samples, rate, center, scale = open_wav(path, channel)
+    yield from gen_raw_from_samples(samples, rate, level=threshold * scale,
+                                    center=center, **kwargs)
+
+
+def gen_raw_from_sample_dump(path, rate, dtype='u1', bit=None, level=0, **kwargs):
+    """Generate durations from a raw sample dump, such as a logic analyzer export."""
+    samples = open_samples(path, dtype)
+    yield from gen_raw_from_samples(samples, rate, level=level, bit=bit, **kwargs)
@@ -0,0 +1,366 @@
+"""Conversion between input and output formats."""
+from itertools import chain, repeat
+import logging
+import irgen
+from . import cache
+from . import raw
+from . import registry
+from . import stream
+from .exceptions import IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+
+def input_formats():
+    """Names of all input formats, including protocols."""
+    return [*registry.encoders.names(), *registry.inputs.names()]
+
+
+def output_formats():
+    """Names of all output formats, including decodable protocols."""
+    return [*registry.decoders.names(), *registry.outputs.names()]
+
+
+def gen_codes_from_irdb(data, path=None, irdb=None, **kwargs):
+    from .irdb import Irdb, resolve_protocol
+
+    with Irdb(irdb) as db:
+        rows = db.lookup_path(path or '', functionname=" ".join(data) if data else None)
+    if not rows:
+        raise IrgenInputError(f"No codes found in irdb index for {path}, import a checkout with --irdb-import")
+
+    for row in rows:
+        if row['raw'] is None:
+            LOG.warning("Unsupported protocol %s for %s", row['protocol'], row['functionname'])
+            continue
+        protocol, device, subdevice = resolve_protocol(row['protocol'], row['device'], row['subdevice'])
+        code = {'functionname': row['functionname'],
+                'raw': row['raw']}
+        # params have no place for a subdevice, such codes are repeated from raw
+        if not subdevice:
+            code['params'] = (protocol, device, row['function'])
+        yield code
+
+
+def gen_codes_from_table(data, **kwargs):
+    """Codes of a command table file, in irdb csv layout.
+
+    Columns are functionname, protocol, device, subdevice and function,
+    subdevice may be left out or -1.
+    """
+    import csv
+    from .irdb import resolve_protocol
+
+    if not data:
+        raise IrgenInputError("Expected command table file")
+    with open(data[0], newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            try:
+                protocol, device, subdevice = resolve_protocol(row['protocol'],
+                                                               int(row['device'], 0),
+                                                               int(row.get('subdevice') or '-1', 0))
+                function = int(row['function'], 0)
+            except (KeyError, TypeError, ValueError):
+                raise IrgenInputError(f"Invalid command table row {row}") from None
+            if protocol not in registry.encoders:
+                LOG.warning("Unsupported protocol %s for %s", protocol, row['functionname'])
+                continue
+            kwargs = {'subdevice': subdevice} if subdevice else {}
+            try:
+                signal = irgen.gen_signal_general(protocol, device, function, **kwargs)
+            except IrgenInputError as exc:
+                LOG.warning("Skipping %s: %s", row['functionname'], exc)
+                continue
+            code = {'functionname': row['functionname'],
+                    'raw': signal}
+            if not subdevice:
+                code['params'] = (protocol, device, function)
+            yield code
+
+
+def gen_codes_from_raw(data, **kwargs):
+    code = {
+        'functionname': 'raw',
+        'raw': [float(x) for x in data]
+    }
+    yield code
+
+
+def gen_codes_from_broadlink(data, **kwargs):
+    code = {
+        'functionname': 'broadlink',
+        'raw': irgen.gen_raw_from_broadlink(bytes.fromhex(data[0]))
+    }
+    yield code
+
+
+def gen_codes_from_broadlink_base64(data, **kwargs):
+    code = {
+        'functionname': 'base64',
+        'raw': irgen.gen_raw_from_broadlink_base64(data[0].encode())
+    }
+    yield code
+
+
+def gen_codes_from_pronto(data, **kwargs):
+    data = [int(x, base=16) for x in data]
+    if data[0] != 0:
+        params = irgen.dec_pronto_short(data)
+        code = {
+            'functionname': 'pronto',
+            'params': params,
+            'raw': irgen.gen_signal_general(*params)
+        }
+    else:
+        code = {
+            'functionname': 'pronto',
+            'raw': irgen.gen_raw_from_pronto(data)
+        }
+    yield code
+
+
+def gen_codes_from_wav(data, **kwargs):
+    from . import capture
+
+    code = {
+        'functionname': 'wav',
+        'raw': raw.RawSignal(capture.gen_raw_from_wav(
+            data[0], channel=int(data[1]) if len(data) > 1 else 0))
+    }
+    yield code
+
+
+def gen_codes_from_samples(data, **kwargs):
+    from . import capture
+
+    if len(data) < 2:
+        raise IrgenInputError("Expected sample file, sample rate, optionally bit of "
+                              "channel and 'low' for active low captures")
+    code = {
+        'functionname': 'samples',
+        'raw': raw.RawSignal(capture.gen_raw_from_sample_dump(
+            data[0], float(data[1]),
+            bit=int(data[2]) if len(data) > 2 else None,
+            invert=len(data) > 3 and data[3] == 'low'))
+    }
+    yield code
+
+
+def gen_codes_from_device(data, **kwargs):
+    from .devices import Library
+
+    if not data:
+        raise IrgenInputError("Expected device name and optionally command names")
+    library = Library()
+    for command in data[1:] or library.commands(data[0]):
+        compiled = library.lookup(data[0], command)
+        code = {
+            'functionname': command,
+            'raw': compiled['durations'],
+            'formats': compiled['formats'],
+        }
+        if compiled['params']:
+            code['params'] = tuple(compiled['params'])
+        yield code
+
+
+def gen_codes_from_protocol(protocol, data):
+    code = {
+        'functionname': '{}({})'.format(protocol,
+                                        ','.join(map(str, data))),
+        'params': (protocol, *data),
+        'raw': irgen.gen_signal_general(protocol, *data)
+    }
+    yield code
+
+
+def gen_codes(input, data, path=None, irdb=None):
+    """Parse input data into code dicts with raw data."""
+    if input in registry.inputs:
+        yield from registry.inputs.get(input)(data, path=path, irdb=irdb)
+    elif input in registry.encoders:
+        yield from gen_codes_from_protocol(input, data)
+    else:
+        raise IrgenInputError(f"Unknown input format {input}")
+
+
+def gen_output_broadlink(codes):
+    for code in codes:
+        v = bytes(irgen.gen_broadlink_from_raw(code['raw']))
+        yield True, v.hex()
+
+
+def gen_output_broadlink_base64(codes):
+    for code in codes:
+        v = bytes(irgen.gen_broadlink_base64_from_raw(code['raw']))
+        yield True, v.decode('ascii')
+
+
+def gen_output_raw(codes):
+    def signed(x):
+        for v in x:
+            if v > 0:
+                yield "+{}".format(v)
+            else:
+                yield "{}".format(v)
+    for code in codes:
+        yield True, " ".join(signed(code['raw']))
+
+
+def gen_output_pronto(codes):
+    for code in codes:
+        yield True, " ".join(irgen.gen_pronto_from_raw([], code['raw'], base=0x73))
+
+
+def gen_output_pronto_short(codes):
+    def gen_params(code):
+        if 'params' in code:
+            yield code['params']
+        else:
+            for protocol, decoded in irgen.dec_raw_auto(code['raw']):
+                if protocol in irgen.gen_raw_rc6_protocols:
+                    yield (protocol, decoded[0], decoded[1], decoded[3])
+                else:
+                    yield (protocol, decoded[0], decoded[1])
+
+    for code in codes:
+        try:
+            for protocol, device, function, *mode in gen_params(code):
+                try:
+                    yield True, " ".join(irgen.gen_pronto_short(
+                        protocol, device, function, mode=mode[0] if mode else 0))
+                    break
+                except IrgenInputError:
+                    continue
+            else:
+                raise IrgenInputError("No pronto predefined format for code")
+        except IrgenInputError as exc:
+            yield False, "Error '{}' while encoding".format(str(exc))
+
+
+def gen_output_auto(codes):
+    for code in codes:
+        try:
+            for protocol, frame in irgen.dec_raw_auto(code['raw']):
+                yield True, "{} {}".format(protocol, frame)
+        except IrgenInputError as exc:
+            yield False, "Error '{}' while decoding".format(str(exc))
+
+
+def gen_output_decoded(protocol, codes):
+    errors = []
+
+    def on_error(exc, frame):
+        errors.append("Error '{}' while decoding {}".format(str(exc), frame))
+
+    try:
+        stream.create_stream_decoder(protocol)
+    except IrgenInputError:
+        # no stream decoder, decode each code as a single frame
+        decoder = registry.decoders.get(protocol)
+        for code in codes:
+            try:
+                yield True, str(decoder(iter(code['raw']), protocol=protocol))
+            except (IrgenInputError, StopIteration) as exc:
+                yield False, "Error '{}' while decoding".format(str(exc))
+        return
+
+    for code in codes:
+        for frame in stream.gen_decoded_from_raw(code['raw'], protocol, on_error):
+            yield from ((False, error) for error in errors)
+            errors.clear()
+            yield True, str(frame)
+        yield from ((False, error) for error in errors)
+        errors.clear()
+
+
+def gen_output(output, codes):
+    """Generate output for codes as (ok, text) tuples.
+
+    Errors are reported with ok set to False instead of raising, so one
+    failing code does not abort the rest.
+    """
+    if output in registry.outputs:
+        formatter = registry.outputs.get(output)
+    elif output in registry.decoders:
+        def formatter(codes):
+            return gen_output_decoded(output.lower(), codes)
+    else:
+        raise IrgenInputError(f"Unknown output format {output}")
+
+    for code in codes:
+        # precompiled codes from the device library
+        try:
+            yield True, code['formats'][output]
+        except KeyError:
+            yield from formatter([code])
+
+
+def gen_code_repeated(code, repeats):
+    """Repeat a code, using protocol repeat frames when parameters are known.
+
+    The repeated durations are generated lazily from a single frame, the
+    carrier frequency is kept in the code as 'frequency'.
+    """
+    if 'params' in code:
+        protocol = code['params'][0]
+        data = raw.paired(raw.simplify(irgen.gen_raw_repeated(*code['params'], repeats=repeats)))
+        frequency = irgen.gen_raw_protocols_frequency.get(protocol.lower())
+    else:
+        frame = code['raw']
+        frequency = getattr(frame, 'frequency', None)
+        if iter(frame) is frame:
+            frame = tuple(frame)
+        data = chain.from_iterable(repeat(frame, repeats))
+    code = {**code, 'raw': data}
+    if frequency:
+        code['frequency'] = frequency
+    code.pop('formats', None)
+    return code
+
+
+def gen_codes_repeated(codes, repeats):
+    """Apply repeats to codes."""
+    if repeats > 1:
+        return (gen_code_repeated(code, repeats) for code in codes)
+    return codes
+
+
+# inputs fully described by their data, others read files that may change
+cached_inputs = ['raw', 'broadlink', 'broadlink_base64', 'pronto']
+# outputs depending on the device library, or of bytes that are not stored as json
+uncached_outputs = ['identify', 'wav']
+
+
+def data_input(input):
+    """Whether an input is fully described by its data, without reading files."""
+    return input in cached_inputs or input in registry.encoders
+
+
+def cacheable(input, output):
+    """Whether conversion results may be kept in the persistent cache."""
+    return data_input(input) and output not in uncached_outputs
+
+
+def convert(input, output, data, repeats=1, path=None, irdb=None):
+    """Convert data from input to output format, generating (ok, text) tuples.
+
+    Results are taken from and stored in the persistent cache when enabled,
+    unless a code failed to convert.
+    """
+    store = cache.disk_cache
+    if store is None or not cacheable(input, output):
+        codes = gen_codes_repeated(gen_codes(input, data, path, irdb), repeats)
+        yield from gen_output(output, codes)
+        return
+
+    key = cache.disk_key(input, data, output, (repeats,))
+    results = store.get(key)
+    if results is None:
+        with cache.bypass_disk_cache():
+            codes = gen_codes_repeated(gen_codes(input, data, path, irdb), repeats)
+            results = list(gen_output(output, codes))
+        if all(ok for ok, _ in results):
+            store.put(key, results)
+    for ok, text in results:
+        yield ok, text
@@ -0,0 +1,252 @@
+"""Library of known devices and their codes.
+
+Device descriptions shipped as package data in ``data/devices`` are
+parsed into devices with named commands, and every command is compiled
+once into all output formats. The compiled library is stored as json in the user cache
+directory and rebuilt when a description changes, so listing and sending
+commands of a known device is a lookup.
+
+Two description styles are understood: markdown with a table of remotes
+and their addresses plus a table of commands, for a protocol named in the
+title, and lines of ``"command": "<broadlink base64>"``.
+"""
+from collections import namedtuple
+import glob
+from importlib.resources import files
+import json
+import logging
+import os
+import re
+import irgen
+from . import raw
+from .convert import gen_output
+from .environment import cache_dir, version
+from .exceptions import IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+Device = namedtuple("Device", ["name", "protocol", "commands"])
+Command = namedtuple("Command", ["name", "params", "raw"])
+
+compiled_formats = ['raw', 'pronto', 'broadlink', 'broadlink_base64']
+
+protocol_patterns = [
+    (re.compile(r"\bnec\s*(?:32\s*)?ext", re.IGNORECASE), 'necx1'),
+    (re.compile(r"\bnec\b", re.IGNORECASE), 'nec1'),
+    (re.compile(r"\brc-?5\b", re.IGNORECASE), 'rc5'),
+    (re.compile(r"\brc-?6\b", re.IGNORECASE), 'rc6'),
+]
+
+_broadlink_pattern = re.compile(r'"([^"]+)"\s*:\s*"(Jg[A-Za-z0-9+/=]+)"')
+
+
+def default_directory():
+    """Location of the device descriptions shipped as package data."""
+    return str(files(__package__).joinpath("data", "devices"))
+
+
+def default_path():
+    """Default location of the compiled library, in the user cache directory."""
+    return os.path.join(cache_dir(), "devices.json")
+
+
+def parse_number(text):
+    """Parse numbers written as 3412h, 0x3412 or decimal."""
+    text = text.strip()
+    try:
+        if text.lower().endswith('h'):
+            return int(text[:-1], 16)
+        return int(text, 0)
+    except ValueError:
+        raise IrgenInputError(f"Invalid number {text}") from None
+
+
+def gen_tables(lines):
+    """Generate markdown tables as lists of row dicts keyed by lower case header."""
+    table = None
+    for line in [*lines, ""]:
+        line = line.strip()
+        if not line.startswith('|'):
+            if table:
+                yield table
+            table = None
+            continue
+        cells = [cell.strip() for cell in line.strip('|').split('|')]
+        if table is None:
+            header = [cell.lower() for cell in cells]
+            table = []
+        elif not all(re.fullmatch(r":?-+:?", cell) for cell in cells):
+            table.append(dict(zip(header, cells)))
+
+
+def parse_protocol(text):
+    for pattern, protocol in protocol_patterns:
+        if pattern.search(text):
+            return protocol
+    return None
+
+
+def parse_markdown(name, text):
+    """Parse a markdown description into one device per remote address."""
+    protocol = parse_protocol(text)
+    if protocol is None:
+        raise IrgenInputError(f"No known protocol in description of {name}")
+
+    remotes = []
+    commands = []
+    for table in gen_tables(text.splitlines()):
+        for row in table:
+            if 'address' in row:
+                remotes.append((row.get('remote', ''), parse_number(row['address'])))
+            elif 'command' in row and 'hex' in row:
+                commands.append((row['command'], parse_number(row['hex'])))
+
+    if not remotes or not commands:
+        raise IrgenInputError(f"Expected address and command tables in description of {name}")
+
+    for remote, address in remotes:
+        yield Device(" ".join(filter(None, (name, remote))), protocol,
+                     [Command(command, (protocol, address, function),
+                              list(raw.paired(raw.simplify(
+                                  irgen.gen_raw_general(protocol, address, function)))))
+                      for command, function in commands])
+
+
+def parse_broadlink(name, text):
+    """Parse a description with broadlink base64 codes into a device."""
+    commands = []
+    for command, data in _broadlink_pattern.findall(text):
+        data = list(irgen.gen_raw_from_broadlink_base64(data.encode()))
+        try:
+            protocol, values = irgen.dec_raw_auto(data)[0]
+            params = (protocol, values[0], values[1])
+        except IrgenInputError:
+            params = None
+        commands.append(Command(command, params, data))
+
+    protocols = {command.params[0] for command in commands if command.params}
+    yield Device(name, protocols.pop() if len(protocols) == 1 else None, commands)
+
+
+def parse_device_file(path):
+    """Parse a device description file into devices."""
+    name = os.path.basename(path).rsplit('.', 1)[0]
+    name = re.sub(r"\s*-\s*IRCODES$", "", name, flags=re.IGNORECASE)
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    if _broadlink_pattern.search(text):
+        return list(parse_broadlink(name, text))
+    return list(parse_markdown(name, text))
+
+
+def gen_device_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "*.txt")))
+
+
+def compile_command(command):
+    """Compile a command into all output formats."""
+    code = {'functionname': command.name, 'raw': command.raw}
+    formats = {}
+    for output in compiled_formats:
+        (_, formats[output]), = gen_output(output, [code])
+    return {
+        'params': list(command.params) if command.params else None,
+        'durations': list(command.raw),
+        'formats': formats,
+    }
+
+
+def compile_devices(devices):
+    return {
+        device.name: {
+            'protocol': device.protocol,
+            'commands': {command.name: compile_command(command) for command in device.commands},
+        }
+        for device in devices
+    }
+
+
+def _sources(directory):
+    return {os.path.basename(path): os.path.getmtime(path) for path in gen_device_files(directory)}
+
+
+class Library:
+    """Compiled device library, rebuilt from descriptions when stale."""
+
+    def __init__(self, path=None, directory=None):
+        self.path = path or default_path()
+        self.directory = directory or default_directory()
+        self._data = None
+
+    def _load(self):
+        sources = _sources(self.directory) if os.path.isdir(self.directory) else None
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+            if (data.get('version') == version() and
+                    (sources is None or data.get('sources') == sources)):
+                return data
+        except (OSError, ValueError):
+            pass
+
+        if sources is None:
+            raise IrgenInputError(f"No compiled device library at {self.path}")
+        return self.build()
+
+    def build(self):
+        """Compile all descriptions and store the library."""
+        devices = []
+        for path in gen_device_files(self.directory):
+            try:
+                devices.extend(parse_device_file(path))
+            except IrgenInputError as exc:
+                LOG.warning("Skipping %s: %s", path, exc)
+
+        data = {
+            'version': version(),
+            'sources': _sources(self.directory),
+            'devices': compile_devices(devices),
+        }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+        except OSError as exc:
+            LOG.warning("Unable to store device library %s: %s", self.path, exc)
+        self._data = data
+        return data
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def devices(self):
+        return list(self.data['devices'])
+
+    def _device(self, device):
+        devices = self.data['devices']
+        try:
+            return devices[device]
+        except KeyError:
+            matches = [name for name in devices if name.lower() == device.lower()]
+            if not matches:
+                raise IrgenInputError(f"Unknown device {device}") from None
+            return devices[matches[0]]
+
+    def commands(self, device):
+        return list(self._device(device)['commands'])
+
+    def lookup(self, device, command):
+        """Return compiled formats of a command."""
+        commands = self._device(device)['commands']
+        try:
+            return commands[command]
+        except KeyError:
+            matches = [name for name in commands if name.lower() == command.lower()]
+            if not matches:
+                raise IrgenInputError(f"Unknown command {command} for {device}") from None
+            return commands[matches[0]]
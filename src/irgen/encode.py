@@ -0,0 +1,286 @@
+"""Encoding into caller provided buffers.
+
+For transmit loops that send codes repeatedly, the functions here write
+into preallocated buffers instead of building lists and generators:
+durations into a buffer of doubles, such as ``array('d')`` or a float64
+numpy array, and broadlink or pronto data into a ``bytearray`` or writable
+memoryview. Each returns the number of values or bytes written.
+
+Encoders are compiled once per protocol from the declarative definitions,
+with the timings of every byte value held as buffers, so encoding a frame
+is a handful of slice copies. Encoders keep their parameters in place and
+are not shared between threads, ``get_encoder`` returns one per thread.
+"""
+from array import array
+import threading
+from . import irp
+from . import registry
+from .exceptions import IrgenInputError
+
+broadlink_trailing_silence = -101502.0
+pronto_base = 0x73
+pronto_clock = 0.241246  # Pronto clock base: 1000000 / (32768 * 506 / 4)
+pronto_frequency = 1.0 / (pronto_base * pronto_clock)
+
+_hex_digits = b"0123456789abcdef"
+
+
+def _double_view(out):
+    view = memoryview(out)
+    if view.ndim != 1 or view.readonly or view.itemsize != 8 or view.format.lstrip('@=<') != 'd':
+        raise IrgenInputError(f"Expected a writable buffer of doubles, got format {view.format}")
+    if view.format != 'd':
+        view = view.cast('B').cast('d')
+    return view
+
+
+def _byte_view(out):
+    view = memoryview(out)
+    if view.readonly:
+        raise IrgenInputError("Expected a writable byte buffer")
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+class Encoder:
+    """Reusable encoder of a declaratively defined protocol."""
+
+    def __init__(self, protocol):
+        protocol = protocol.lower()
+        try:
+            self.definition = irp.protocols[protocol]
+        except KeyError:
+            raise IrgenInputError(f"Unknown protocol {protocol}") from None
+        self.protocol = protocol
+        self.params = dict.fromkeys(irp.param_names, 0)
+        self.limits = list(self.definition.limits.items())
+        self.program = []
+        self.size = 0
+
+        tables = {}
+        for kind, item in self.definition.items:
+            if kind == 'literal':
+                self.program.append((kind, item * self.definition.unit, None))
+                self.size += 1
+            elif kind == 'field':
+                chunks = []
+                for shift, table in item.chunks:
+                    if id(table) not in tables:
+                        tables[id(table)] = ([memoryview(array('d', entry)) for entry in table],
+                                             [sum(abs(x) for x in entry) for entry in table])
+                    views, totals = tables[id(table)]
+                    chunks.append((shift, len(table) - 1, views, totals))
+                    self.size += len(table[0])
+                self.program.append((kind, item, chunks))
+            else:
+                self.program.append((kind, item, None))
+                self.size += 1
+
+        # scratch buffer for formats encoded from durations
+        self.buffer = array('d', bytes(8 * self.size))
+
+    def encode_into(self, out, device, function, subdevice=0, toggle=0, mode=0, offset=0):
+        """Write durations in microseconds into out at offset, returns the count written."""
+        params = self.params
+        params['D'] = device
+        params['F'] = function
+        params['S'] = subdevice
+        params['T'] = toggle
+        params['M'] = mode
+        for name, width in self.limits:
+            if params[name] >> width:
+                raise IrgenInputError(
+                    f"{irp.param_names[name].capitalize()} {params[name]} "
+                    f"exceeds {width} bits for {self.protocol}")
+
+        view = _double_view(out)
+        position = offset
+        total = 0.0
+        try:
+            for kind, item, chunks in self.program:
+                if kind == 'literal':
+                    view[position] = item
+                    position += 1
+                    total += abs(item)
+                elif kind == 'field':
+                    value = item.value(params)
+                    for shift, mask, views, totals in chunks:
+                        index = (value >> shift) & mask
+                        entry = views[index]
+                        view[position:position + len(entry)] = entry
+                        position += len(entry)
+                        total += totals[index]
+                else:
+                    remain = item - total
+                    if remain > 0:
+                        if position > offset and view[position - 1] < 0:
+                            view[position - 1] -= remain
+                        else:
+                            view[position] = -remain
+                            position += 1
+                        total = item
+        except (IndexError, ValueError):
+            raise IrgenInputError(f"Buffer too small for {self.protocol}, "
+                                  f"expected room for {self.size} durations") from None
+        return position - offset
+
+    def broadlink_into(self, out, device, function, repeat=0, **kwargs):
+        """Write a broadlink packet into out, returns its length."""
+        length = self.encode_into(self.buffer, device, function, **kwargs)
+        return broadlink_into(out, self.buffer, length, repeat)
+
+    def pronto_into(self, out, device, function, **kwargs):
+        """Write pronto hex text into out, returns its length."""
+        length = self.encode_into(self.buffer, device, function, **kwargs)
+        return pronto_into(out, self.buffer, length)
+
+
+_local = threading.local()
+
+
+def get_encoder(protocol):
+    """Encoder of a protocol for the calling thread."""
+    try:
+        encoders = _local.encoders
+    except AttributeError:
+        encoders = _local.encoders = {}
+    try:
+        return encoders[protocol]
+    except KeyError:
+        encoder = encoders[protocol] = Encoder(protocol)
+        return encoder
+
+
+def encode_into(protocol, device, function, out, offset=0, **kwargs):
+    """Write durations of a code into out at offset, returns the count written.
+
+    Protocols without a declarative definition, such as those registered
+    by plugins, are encoded with their generator and copied.
+    """
+    try:
+        encoder = get_encoder(protocol)
+    except IrgenInputError:
+        encoder = None
+    if encoder is not None:
+        return encoder.encode_into(out, device, function, offset=offset, **kwargs)
+
+    data = array('d', registry.encoders.get(protocol.lower())(protocol.lower(), device, function,
+                                                              **kwargs))
+    view = _double_view(out)
+    if len(view) - offset < len(data):
+        raise IrgenInputError(f"Buffer too small for {protocol}, expected room for {len(data)} durations")
+    view[offset:offset + len(data)] = memoryview(data)
+    return len(data)
+
+
+def _write_merged(view, index, data, length, put, silence):
+    """Write simplified and paired durations with put, returns the end index.
+
+    A trailing burst is paired with silence, also when it is 0.
+    """
+    value = 0
+    for position in range(length):
+        duration = data[position]
+        if duration == 0:
+            continue
+        if value == 0:
+            if duration > 0:
+                value = duration
+        elif (value > 0) == (duration > 0):
+            value += duration
+        else:
+            index = put(view, index, value)
+            value = duration
+    if value > 0:
+        index = put(view, index, value)
+        index = put(view, index, silence)
+    elif value:
+        index = put(view, index, value)
+    return index
+
+
+def _put_broadlink(view, index, duration):
+    value = abs(round(duration * 269 / 8192))
+    if value > 255:
+        view[index] = 0
+        view[index + 1] = value >> 8
+        view[index + 2] = value & 0xFF
+        return index + 3
+    view[index] = value
+    return index + 1
+
+
+def broadlink_size(count):
+    """Upper bound of the length of a broadlink packet of count durations."""
+    return 4 + 3 * (count + 1) + 16
+
+
+def broadlink_into(out, data, length=None, repeat=0):
+    """Write a broadlink packet for the first length durations of data into out.
+
+    Returns the length of the packet, including padding.
+    """
+    view = _byte_view(out)
+    if length is None:
+        length = len(data)
+    try:
+        index = _write_merged(view, 4, data, length, _put_broadlink, broadlink_trailing_silence)
+
+        count = index - 4
+        padding = (index + 4) % 16  # rm.send_data() 4 byte header (not seen here)
+        end = index + (16 - padding if padding else 0)
+        while index < end:
+            view[index] = 0
+            index += 1
+
+        view[0] = 0x26  # IR
+        view[1] = repeat
+        view[2] = count & 0xFF
+        view[3] = count >> 8
+    except IndexError:
+        raise IrgenInputError(f"Buffer too small for broadlink data, "
+                              f"expected {broadlink_size(length)} bytes") from None
+    return index
+
+
+def _put_pronto_word(view, index, value):
+    if value > 0xFFFF:
+        raise IrgenInputError(f"Pronto duration {value} out of range")
+    view[index] = _hex_digits[value >> 12]
+    view[index + 1] = _hex_digits[(value >> 8) & 0xF]
+    view[index + 2] = _hex_digits[(value >> 4) & 0xF]
+    view[index + 3] = _hex_digits[value & 0xF]
+    view[index + 4] = 0x20
+    return index + 5
+
+
+def _put_pronto(view, index, duration):
+    return _put_pronto_word(view, index, int(abs(duration) * pronto_frequency))
+
+
+def pronto_size(count):
+    """Upper bound of the length of pronto text of count durations."""
+    return 5 * (count + 5)
+
+
+def pronto_into(out, data, length=None):
+    """Write pronto hex text for the first length durations of data into out.
+
+    Matches the pronto output format, with a base of 0x73. Returns the
+    length of the text.
+    """
+    view = _byte_view(out)
+    if length is None:
+        length = len(data)
+    try:
+        index = _write_merged(view, 20, data, length, _put_pronto, 0)
+        _put_pronto_word(view, 0, 0)
+        _put_pronto_word(view, 5, pronto_base)
+        _put_pronto_word(view, 10, 0)
+        _put_pronto_word(view, 15, (index - 20) // 10)
+    except IndexError:
+        raise IrgenInputError(f"Buffer too small for pronto data, "
+                              f"expected {pronto_size(length)} bytes") from None
+    # no separator after the last word
+    return index - 1
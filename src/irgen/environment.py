@@ -0,0 +1,19 @@
+"""Version and user cache directory of the installation."""
+from functools import lru_cache
+import os
+
+
+@lru_cache(maxsize=None)
+def version():
+    """Installed version of irgen, "unknown" when not installed."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version("irgen")
+    except (ImportError, PackageNotFoundError):
+        return "unknown"
+
+
+def cache_dir():
+    """Directory of irgen in the user cache directory."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "irgen")
@@ -0,0 +1,144 @@
+"""Export of complete code sets for Home Assistant.
+
+Codes of any input, such as an irdb device, a command table or a device of
+the library, are written as a single json code set keyed by entity name,
+either as a SmartIR device file or as Broadlink remote codes for
+``remote.send_command``. Commands are encoded across a process pool and
+written as they complete, in input order, so the whole set is never held
+in memory.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+from . import convert
+from . import raw
+from .batch import gen_chunks
+from .exceptions import IrgenError, IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+# encoding: (SmartIR controller, SmartIR commands encoding)
+encodings = {
+    'broadlink_base64': ('Broadlink', 'Base64'),
+    'pronto': ('Broadlink', 'Pronto'),
+    'raw': ('ESPHome', 'Raw'),
+}
+
+layouts = ['smartir', 'hass']
+
+
+def gen_hass_entityname(text):
+    text = text.lower()
+    text = text.replace(" ", "_")
+    text = text.replace(":", "_")
+    text = text.replace("+", "_plus_")
+    text = text.replace("-", "_minus_")
+    text = text.replace("__", "_")
+    text = text.strip("_")
+    return text
+
+
+def export_value(code, encoding):
+    """Encode a code into its json value."""
+    if encoding == 'raw':
+        return [round(x) for x in raw.paired(raw.simplify(code['raw']))]
+    (ok, text), = convert.gen_output(encoding, [code])
+    if not ok:
+        raise IrgenInputError(text)
+    return text
+
+
+def export_code(code, encoding):
+    """Encode a code, returns (functionname, value, error)."""
+    try:
+        return code['functionname'], export_value(code, encoding), None
+    except (IrgenError, ValueError) as exc:
+        return code['functionname'], None, str(exc) or type(exc).__name__
+
+
+def export_chunk(codes, encoding):
+    return [export_code(code, encoding) for code in codes]
+
+
+def _portable(code):
+    # generators can not be sent to worker processes
+    return dict(code, raw=list(code['raw']))
+
+
+def gen_exported(codes, encoding, workers=None, chunksize=64):
+    """Encode codes across a process pool, yielding (functionname, value, error) in order."""
+    if encoding not in encodings:
+        raise IrgenInputError(f"Unsupported export encoding {encoding}")
+
+    if workers == 1:
+        for code in codes:
+            yield export_code(code, encoding)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in gen_chunks(map(_portable, codes), chunksize):
+            pending.append(executor.submit(export_chunk, chunk, encoding))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def gen_entities(results):
+    """Generate (entity name, value) of results, skipping errors and renaming duplicates."""
+    seen = set()
+    for functionname, value, error in results:
+        if error:
+            LOG.warning("Skipping %s: %s", functionname, error)
+            continue
+        name = base = gen_hass_entityname(functionname) or "command"
+        index = 1
+        while name in seen:
+            index += 1
+            name = f"{base}_{index}"
+        seen.add(name)
+        yield name, value
+
+
+def _header(layout, encoding, name, manufacturer, models):
+    if encoding not in encodings:
+        raise IrgenInputError(f"Unsupported export encoding {encoding}")
+    if layout == 'smartir':
+        controller, commands_encoding = encodings[encoding]
+        header = {
+            'manufacturer': manufacturer or name or "Unknown",
+            'supportedModels': list(models or ([name] if name else [])),
+            'supportedController': controller,
+            'commandsEncoding': commands_encoding,
+        }
+        return json.dumps(header, indent=2)[:-2] + ',\n  "commands": {', '\n  }\n}\n'
+    if layout == 'hass':
+        entity = gen_hass_entityname(name or "irgen")
+        header = {
+            'version': 1,
+            'minor_version': 1,
+            'key': f"broadlink_remote_{entity}_codes",
+        }
+        return (json.dumps(header, indent=2)[:-2] +
+                f',\n  "data": {{\n    {json.dumps(entity)}: {{', '\n    }\n  }\n}\n')
+    raise IrgenInputError(f"Unknown export layout {layout}")
+
+
+def write_export(file, codes, encoding='broadlink_base64', layout='smartir', name=None,
+                 manufacturer=None, models=None, workers=None, chunksize=64):
+    """Write codes as a json code set to a text file, returns number of commands written."""
+    head, tail = _header(layout, encoding, name, manufacturer, models)
+    indent = ' ' * (4 if layout == 'smartir' else 6)
+
+    file.write(head)
+    count = 0
+    for entity, value in gen_entities(gen_exported(codes, encoding, workers, chunksize)):
+        file.write(',\n' if count else '\n')
+        file.write(f"{indent}{json.dumps(entity)}: {json.dumps(value)}")
+        count += 1
+    file.write(tail)
+    return count
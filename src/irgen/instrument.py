@@ -0,0 +1,159 @@
+"""Opt-in per stage timers and counters.
+
+Instrumentation is disabled by default, in which case instrumented
+functions are called directly with only a flag check as overhead. When
+enabled, calls, time and bytes are accumulated per stage, and decode
+failures are counted by reason, once at the stage that raised them. Times
+are inclusive of nested stages and, for generator stages, of the upstream
+generators they pull from.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+import re
+
+enabled = False
+
+_stages = {}
+_errors = Counter()
+
+# inspect.CO_GENERATOR, inspect itself is slow to import
+_CO_GENERATOR = 0x20
+
+_reason_pattern = re.compile(r"[-+]?\b0x[0-9A-Fa-f]+\b|"
+                             r"[-+]?\b\d+(?:\.\d+)?\b|"
+                             r"\[[^\]]*\]")
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    _stages.clear()
+    _errors.clear()
+
+
+def _stage_stats(name):
+    try:
+        return _stages[name]
+    except KeyError:
+        stats = _stages[name] = [0, 0.0, 0]
+        return stats
+
+
+def add(name, seconds=0.0, calls=1, bytes=0):
+    """Add a measurement to a stage."""
+    stats = _stage_stats(name)
+    stats[0] += calls
+    stats[1] += seconds
+    stats[2] += bytes
+
+
+def record_error(name, exc):
+    """Count a failure of a stage, by reason with values stripped.
+
+    Failures propagating through enclosing stages are only counted once.
+    """
+    if getattr(exc, '_instrument_recorded', False):
+        return
+    exc._instrument_recorded = True
+    _errors[(name, _reason_pattern.sub("#", str(exc)))] += 1
+
+
+@contextmanager
+def timer(name):
+    """Time a block of code as a stage, when enabled."""
+    if not enabled:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        add(name, perf_counter() - start)
+
+
+def _timed_generator(name, generator, errors):
+    stats = _stage_stats(name)
+    stats[0] += 1
+    try:
+        while True:
+            start = perf_counter()
+            try:
+                value = next(generator)
+            except StopIteration as exc:
+                return exc.value
+            except errors as exc:
+                record_error(name, exc)
+                raise
+            finally:
+                stats[1] += perf_counter() - start
+            yield value
+    finally:
+        generator.close()
+
+
+def stage(name, errors=()):
+    """Decorate a function or generator function as an instrumented stage.
+
+    Exceptions of the given types are counted as failures of the stage.
+    """
+    def decorator(func):
+        if func.__code__.co_flags & _CO_GENERATOR:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not enabled:
+                    return func(*args, **kwargs)
+                return _timed_generator(name, func(*args, **kwargs), errors)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except errors as exc:
+                    record_error(name, exc)
+                    raise
+                finally:
+                    add(name, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def report():
+    """Return collected statistics as a dict."""
+    return {
+        'stages': {
+            name: {'calls': calls, 'seconds': seconds, 'bytes': size}
+            for name, (calls, seconds, size) in sorted(_stages.items())
+        },
+        'errors': [
+            {'stage': name, 'reason': reason, 'count': count}
+            for (name, reason), count in _errors.most_common()
+        ],
+    }
+
+
+def format_report():
+    """Format collected statistics as a table."""
+    lines = ["{:32} {:>10} {:>12} {:>12}".format("stage", "calls", "ms", "bytes")]
+    for name, stats in report()['stages'].items():
+        lines.append("{:32} {:10d} {:12.3f} {:12d}".format(
+            name, stats['calls'], stats['seconds'] * 1000, stats['bytes']))
+    errors = report()['errors']
+    if errors:
+        lines.append("")
+        lines.append("{:32} {:>10} {}".format("failed stage", "count", "reason"))
+        for error in errors:
+            lines.append("{:32} {:10d} {}".format(error['stage'], error['count'], error['reason']))
+    return "\n".join(lines)
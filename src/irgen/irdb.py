@@ -0,0 +1,206 @@
+"""Offline index of the irdb code database.
+
+Imports a local checkout of https://github.com/probonopd/irdb into a
+sqlite index with precomputed raw timings, so lookups work without network.
+The irdb ``codes`` tree is laid out as
+``<manufacturer>/<device type>/<device>,<subdevice>.csv``.
+"""
+from array import array
+import csv
+import logging
+import os
+import sqlite3
+import irgen
+from . import irp
+from . import raw
+from . import registry
+from .environment import cache_dir
+from .exceptions import IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS codes (
+    manufacturer TEXT NOT NULL,
+    device_type TEXT NOT NULL,
+    device INTEGER NOT NULL,
+    subdevice INTEGER NOT NULL,
+    functionname TEXT NOT NULL,
+    protocol TEXT NOT NULL,
+    function INTEGER NOT NULL,
+    raw BLOB
+);
+CREATE INDEX IF NOT EXISTS codes_device
+    ON codes (manufacturer, device_type, device, subdevice);
+CREATE INDEX IF NOT EXISTS codes_function
+    ON codes (manufacturer, device_type, device, subdevice, functionname);
+"""
+
+
+def default_path():
+    """Default location of the index, in the user cache directory."""
+    return os.path.join(cache_dir(), "irdb.sqlite")
+
+
+# irdb names of protocols named differently in irgen
+protocol_names = {
+    'sony12': 'sirc12',
+    'sony15': 'sirc15',
+    'sony20': 'sirc20',
+}
+
+
+def parse_path(path):
+    """Split an irdb code path into manufacturer, device type, device and subdevice."""
+    parts = path.replace(os.sep, "/").strip("/").split("/")
+    if parts[0] == "codes":
+        parts = parts[1:]
+    if len(parts) != 3 or not parts[2].endswith(".csv"):
+        raise IrgenInputError(f"Expected irdb path <manufacturer>/<type>/<device>,<subdevice>.csv, got {path}")
+    manufacturer, device_type, name = parts
+    try:
+        device, subdevice = (int(x) for x in name[:-4].split(","))
+    except ValueError:
+        raise IrgenInputError(f"Invalid irdb device file name {name}") from None
+    return manufacturer, device_type, device, subdevice
+
+
+def resolve_protocol(protocol, device, subdevice):
+    """Map irdb protocol and subdevice onto an irgen protocol, device and subdevice.
+
+    The nec subdevice is merged into the device. Other protocols keep it
+    only when they have a subdevice parameter, else it is returned as 0.
+    """
+    protocol = protocol.lower()
+    protocol = protocol_names.get(protocol, protocol)
+    if protocol in irgen.gen_raw_nec_protocols and subdevice >= 0:
+        if protocol.startswith("necx"):
+            device |= subdevice << 8
+        elif subdevice != device ^ 0xFF:
+            protocol = "necx" + protocol[3:]
+            device |= subdevice << 8
+        return protocol, device, 0
+    definition = irp.protocols.get(protocol)
+    if subdevice < 0 or definition is None or 'S' not in definition.params:
+        subdevice = 0
+    return protocol, device, subdevice
+
+
+def gen_raw_from_row(protocol, device, subdevice, function):
+    """Precompute simplified and paired raw timings for an irdb row."""
+    protocol, device, subdevice = resolve_protocol(protocol, device, subdevice)
+    if protocol not in registry.encoders:
+        return None
+    kwargs = {'subdevice': subdevice} if subdevice else {}
+    try:
+        return array('d', raw.paired(raw.simplify(
+            irgen.gen_raw_general(protocol, device, function, **kwargs))))
+    except IrgenInputError as exc:
+        LOG.debug("Unable to generate %s %s %s: %s", protocol, device, function, exc)
+        return None
+
+
+class Irdb:
+    """Sqlite backed irdb index."""
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def import_tree(self, root):
+        """Import all code files below an irdb checkout, returns rows imported."""
+        if os.path.isdir(os.path.join(root, "codes")):
+            root = os.path.join(root, "codes")
+
+        count = 0
+        with self._db:
+            self._db.execute("DELETE FROM codes")
+            for directory, _, files in os.walk(root):
+                for name in sorted(files):
+                    if not name.endswith(".csv"):
+                        continue
+                    path = os.path.relpath(os.path.join(directory, name), root)
+                    try:
+                        key = parse_path(path)
+                    except IrgenInputError as exc:
+                        LOG.warning("Skipping %s: %s", path, exc)
+                        continue
+                    with open(os.path.join(directory, name), newline='', encoding='utf-8') as file:
+                        count += self._import_rows(key, csv.DictReader(file))
+        return count
+
+    def _import_rows(self, key, rows):
+        def gen_values():
+            for row in rows:
+                try:
+                    device = int(row['device'])
+                    subdevice = int(row['subdevice'])
+                    function = int(row['function'])
+                except (KeyError, TypeError, ValueError):
+                    LOG.warning("Skipping invalid row %s in %s", row, key)
+                    continue
+                data = gen_raw_from_row(row['protocol'], device, subdevice, function)
+                yield (*key, row['functionname'], row['protocol'], function,
+                       data.tobytes() if data else None)
+
+        cursor = self._db.executemany(
+            "INSERT INTO codes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", gen_values())
+        return cursor.rowcount
+
+    def manufacturers(self):
+        return [row[0] for row in self._db.execute(
+            "SELECT DISTINCT manufacturer FROM codes ORDER BY manufacturer")]
+
+    def devices(self, manufacturer=None):
+        """List (manufacturer, device type, device, subdevice) entries."""
+        query = "SELECT DISTINCT manufacturer, device_type, device, subdevice FROM codes"
+        params = ()
+        if manufacturer is not None:
+            query += " WHERE manufacturer = ?"
+            params = (manufacturer,)
+        return list(self._db.execute(query + " ORDER BY 1, 2, 3, 4", params))
+
+    def lookup(self, manufacturer, device_type, device, subdevice, functionname=None):
+        """Look up codes of a device, optionally a single function.
+
+        Returns list of dicts with functionname, protocol, device, subdevice,
+        function and raw, where raw is None for protocols irgen cannot generate.
+        """
+        query = ("SELECT functionname, protocol, device, subdevice, function, raw FROM codes "
+                 "WHERE manufacturer = ? AND device_type = ? AND device = ? AND subdevice = ?")
+        params = [manufacturer, device_type, device, subdevice]
+        if functionname is not None:
+            query += " AND functionname = ?"
+            params.append(functionname)
+
+        result = []
+        rows = self._db.execute(query + " ORDER BY rowid", params)
+        for functionname, protocol, device, subdevice, function, data in rows:
+            if data is not None:
+                values = array('d')
+                values.frombytes(data)
+                data = values
+            result.append({'functionname': functionname,
+                           'protocol': protocol,
+                           'device': device,
+                           'subdevice': subdevice,
+                           'function': function,
+                           'raw': data})
+        return result
+
+    def lookup_path(self, path, functionname=None):
+        """Look up codes by irdb file path."""
+        return self.lookup(*parse_path(path), functionname=functionname)
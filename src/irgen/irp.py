@@ -0,0 +1,330 @@
+"""Declarative protocol definitions.
+
+Protocols are described in the spirit of IRP notation: a time unit, the
+durations of a zero and a one bit in units, bit order and a sequence of
+items. Items are
+
+* numbers, a burst (positive) or space (negative) in units,
+* field strings ``"D:8"``, ``"~F:8"``, ``"D:8:8"`` or ``"F^0x7F:8"``, being
+  an optionally inverted parameter, optionally xored with a constant,
+  with a bit width and an optional bit offset, or ``"1:1"`` for constant bits,
+* tuples ``(field, zero, one)`` for a field with its own bit encoding,
+* ``"^108000"`` to extend the frame to a total duration in microseconds.
+
+Parameters are ``D`` device, ``S`` subdevice, ``F`` function, ``T`` toggle
+and ``M`` mode. Definitions are compiled into lookup tables with the
+timings of every possible byte, built on first use of a field, and a table
+mapping the timings of a bit back to its value for decoding.
+"""
+from itertools import chain, repeat
+import re
+from . import bits
+from . import raw
+from .exceptions import IrgenInputError
+
+param_names = {
+    'D': 'device',
+    'S': 'subdevice',
+    'F': 'function',
+    'T': 'toggle',
+    'M': 'mode',
+}
+
+_field_pattern = re.compile(r"^(~)?([A-Z])(?:\^(0x[0-9A-Fa-f]+|\d+))?:(\d+)(?::(\d+))?$")
+_constant_pattern = re.compile(r"^(\d+):(\d+)$")
+
+_silence = -(1 << 30)
+
+
+def _sign(value):
+    return 1 if value > 0 else -1
+
+
+class Field:
+    """A compiled field of a protocol sequence."""
+
+    __slots__ = ('name', 'constant', 'invert', 'xor', 'width', 'offset',
+                 'zero', 'one', 'lsb', 'unit', '_chunks', 'decode_table', 'length', 'tail_table')
+
+    def __init__(self, spec, zero, one):
+        match = _field_pattern.match(spec)
+        if match:
+            invert, self.name, xor, width, offset = match.groups()
+            self.constant = None
+            self.invert = bool(invert)
+            self.xor = int(xor, 0) if xor else 0
+            self.offset = int(offset) if offset else 0
+        else:
+            match = _constant_pattern.match(spec)
+            if not match:
+                raise ValueError(f"Invalid field {spec}")
+            constant, width = match.groups()
+            self.name = None
+            self.constant = int(constant)
+            self.invert = False
+            self.xor = 0
+            self.offset = 0
+        self.width = int(width)
+        self.zero = zero
+        self.one = one
+        self.lsb = False
+        self.unit = 1.0
+        self._chunks = None
+
+    @property
+    def chunks(self):
+        """(shift, table) of every byte in send order, tables of durations per value."""
+        if self._chunks is None:
+            self._chunks = [(shift, bits.pattern_table(self.zero, self.one, self.lsb, width, self.unit))
+                            for shift, width in bits.split_chunks(self.width, self.lsb)]
+        return self._chunks
+
+    def value(self, params):
+        """Bits to send for given parameter values."""
+        if self.name is None:
+            value = self.constant
+        else:
+            try:
+                value = params[self.name]
+            except KeyError:
+                raise IrgenInputError(f"Missing {param_names[self.name]}") from None
+            value = (value ^ self.xor) >> self.offset
+            if self.invert:
+                value = ~value
+        return value & bits.mask(self.width)
+
+    def store(self, value, params, known):
+        """Store received bits into parameters, verifying repeated fields."""
+        mask = bits.mask(self.width)
+        if self.invert:
+            value = ~value & mask
+        if self.name is None:
+            if value != self.constant & mask:
+                raise IrgenInputError(f"Expected constant {self.constant}, got {value}")
+            return
+        region = mask << self.offset
+        value = ((value << self.offset) ^ self.xor) & region
+        current = params.get(self.name, 0)
+        overlap = known.get(self.name, 0) & region
+        if (current ^ value) & overlap:
+            raise IrgenInputError(f"Mismatching {param_names[self.name]} data {current:X} {value:X}")
+        params[self.name] = (current & ~region) | value
+        known[self.name] = known.get(self.name, 0) | region
+
+
+class Protocol:
+    """A protocol compiled from a declarative definition."""
+
+    def __init__(self, name, unit, zero, one, sequence, lsb=False,
+                 frequency=None, period=None, limits=None):
+        self.name = name
+        self.unit = unit
+        self.lsb = lsb
+        self.frequency = frequency
+        self.period = period
+        self.limits = limits or {}
+        self.items = []
+        self.params = []
+
+        for item in sequence:
+            if isinstance(item, (int, float)):
+                self.items.append(('literal', item))
+            elif isinstance(item, str) and item.startswith('^'):
+                self.items.append(('extent', float(item[1:])))
+            else:
+                if isinstance(item, str):
+                    field = Field(item, zero, one)
+                else:
+                    field = Field(*item)
+                field.lsb = lsb
+                field.unit = unit
+                if field.name and field.name not in self.params:
+                    self.params.append(field.name)
+                self.items.append(('field', field))
+
+        fields = [field for kind, field in self.items if kind == 'field']
+        encodings = [encoding for field in fields for encoding in (field.zero, field.one)]
+        self.biphase = not all(encoding[0] > 0 and encoding[-1] < 0 for encoding in encodings)
+
+        for field in fields:
+            if self.biphase:
+                keys = [tuple(_sign(x) for x in encoding for _ in range(abs(x)))
+                        for encoding in (field.zero, field.one)]
+            else:
+                keys = [tuple(encoding) for encoding in (field.zero, field.one)]
+            if len(keys[0]) != len(keys[1]):
+                raise ValueError(f"Bit encodings of {name} differ in length")
+            field.decode_table = {keys[0]: 0, keys[1]: 1}
+            field.length = len(keys[0])
+            field.tail_table = None
+
+        # items after the last burst are the gap after the frame
+        self.trailing = len(self.items)
+        while self.trailing and (self.items[self.trailing - 1][0] == 'extent' or
+                                 (self.items[self.trailing - 1][0] == 'literal' and
+                                  self.items[self.trailing - 1][1] < 0)):
+            self.trailing -= 1
+
+        # a leading space is lost with the silence before the frame
+        self.leading = self._leading_space()
+
+        # the last bit may merge with the gap after the frame
+        kind, field = self.items[self.trailing - 1]
+        if kind == 'field' and not self.biphase:
+            if field.zero[:-1] != field.one[:-1]:
+                field.tail_table = {field.zero[:-1]: (0, field.zero[-1]),
+                                    field.one[:-1]: (1, field.one[-1])}
+
+    def _leading_space(self):
+        """Units of space the frame starts with, independent of parameters."""
+        kind, item = self.items[0]
+        if kind == 'literal':
+            return -item if item < 0 else 0
+        if kind != 'field':
+            return 0
+        if item.constant is not None:
+            bit = next(bits.gen_bits(item.constant & bits.mask(item.width), item.width, self.lsb))
+            encodings = [(item.zero, item.one)[bit]]
+        else:
+            encodings = [item.zero, item.one]
+        if all(encoding[0] < 0 and encoding[0] == encodings[0][0] for encoding in encodings):
+            return -encodings[0][0]
+        return 0
+
+    def encode(self, **params):
+        """Encode parameters into a list of durations in microseconds."""
+        for name, bits in self.limits.items():
+            value = params.get(name, 0)
+            if value >> bits:
+                raise IrgenInputError(
+                    f"{param_names[name].capitalize()} {value} exceeds {bits} bits for {self.name}")
+
+        output = []
+        for kind, item in self.items:
+            if kind == 'literal':
+                output.append(item * self.unit)
+            elif kind == 'field':
+                value = item.value(params)
+                for shift, table in item.chunks:
+                    output.extend(table[(value >> shift) & (len(table) - 1)])
+            else:
+                remain = item - sum(abs(x) for x in output)
+                if remain > 0:
+                    if output and output[-1] < 0:
+                        output[-1] -= remain
+                    else:
+                        output.append(-remain)
+        return output
+
+    def _gen_symbols(self, data):
+        """Generate unit signs for biphase, or durations in units, after leading silence."""
+        data = iter(raw.simplify(data))
+        for duration in data:
+            if duration > 0:
+                break
+        else:
+            raise IrgenInputError("No signal found")
+
+        data = chain((duration,), data)
+        if self.biphase:
+            return chain(repeat(-1, self.leading),
+                         (_sign(x) for x in data for _ in range(abs(round(x / self.unit)))),
+                         repeat(-1))
+        return chain((-self.leading,) if self.leading else (),
+                     (round(x / self.unit) for x in data), repeat(_silence))
+
+    def decode(self, data):
+        """Decode durations into a dict of parameter values."""
+        symbols = self._gen_symbols(data)
+        params = {}
+        known = {}
+
+        for index, (kind, item) in enumerate(self.items):
+            if kind == 'extent':
+                break
+
+            if kind == 'literal':
+                trailing = index >= self.trailing
+                if self.biphase:
+                    for _ in range(abs(item)):
+                        value = next(symbols)
+                        if value != _sign(item):
+                            raise IrgenInputError(f"Expected {item} units, got {value}")
+                else:
+                    value = next(symbols)
+                    if value != item and not (trailing and value < item):
+                        raise IrgenInputError(f"Expected {item} units, got {value}")
+                if trailing:
+                    break
+                continue
+
+            value = 0
+            for bit_index in range(item.width):
+                key = tuple(next(symbols) for _ in range(item.length))
+                try:
+                    bit = item.decode_table[key]
+                except KeyError:
+                    tail = item.tail_table and bit_index == item.width - 1 and item.tail_table.get(key[:-1])
+                    if not tail or key[-1] > tail[1]:
+                        raise IrgenInputError(f"Unexpected bit timing {key}") from None
+                    bit = tail[0]
+                if self.lsb:
+                    value |= bit << bit_index
+                else:
+                    value = (value << 1) | bit
+            item.store(value, params, known)
+
+        return params
+
+
+def nec_sequence(leading, suffix, extended):
+    device = ["D:8", "D:8:8"] if extended else ["D:8", "~D:8"]
+    function = {
+        'y1': ["F:8", "F^0x7F:8"],
+        'y2': ["F:8", "F^0xFE:8"],
+        'y3': ["F:8", "F^0x7E:8"],
+        'f16': ["F:8", "F:8:8"],
+    }.get(suffix, ["F:8", "~F:8"])
+    return [leading, -8, *device, *function, 1, -3]
+
+
+def gen_nec_protocols():
+    for base, leading, extended in (('nec1', 16, False),
+                                    ('nec2', 8, False),
+                                    ('necx1', 16, True),
+                                    ('necx2', 8, True)):
+        for suffix in ('', 'y1', 'y2', 'y3', 'f16'):
+            name = base + ('-' + suffix if suffix else '')
+            yield name, Protocol(name, 562.5, (1, -1), (1, -3),
+                                 nec_sequence(leading, suffix, extended),
+                                 lsb=True, frequency=38000, period=108000.0,
+                                 limits=None if extended else {'D': 8})
+
+
+protocols = {
+    **dict(gen_nec_protocols()),
+    'rc5': Protocol('rc5', 889.0, (1, -1), (-1, 1),
+                    ["1:1", "~F:1:6", "T:1", "D:5", "F:6", -100],
+                    frequency=36000, period=128 * 889.0),
+    'rc6': Protocol('rc6', 444.0, (-1, 1), (1, -1),
+                    [6, -2, "1:1", "M:3", ("T:1", (-2, 2), (2, -2)), "D:8", "F:8", -6],
+                    frequency=36000, period=107000.0),
+    'rca38': Protocol('rca38', 460.0, (1, -2), (1, -4),
+                      [8, -8, "D:4", "F:8", "~D:4", "~F:8", 1, -16],
+                      frequency=58000),
+    'sirc12': Protocol('sirc12', 600.0, (1, -1), (2, -1),
+                       [4, -1, "F:7", "D:5", "^45000"],
+                       lsb=True, frequency=40000, period=45000.0),
+    'sirc15': Protocol('sirc15', 600.0, (1, -1), (2, -1),
+                       [4, -1, "F:7", "D:8", "^45000"],
+                       lsb=True, frequency=40000, period=45000.0),
+    'sirc20': Protocol('sirc20', 600.0, (1, -1), (2, -1),
+                       [4, -1, "F:7", "D:5", "S:8", "^45000"],
+                       lsb=True, frequency=40000, period=45000.0),
+    'samsung32': Protocol('samsung32', 564.0, (1, -1), (1, -3),
+                          [8, -8, "D:8", "D:8:8", "F:8", "~F:8", 1, "^108000"],
+                          lsb=True, frequency=38000, period=108000.0),
+    'jvc': Protocol('jvc', 527.0, (1, -1), (1, -3),
+                    [16, -8, "D:8", "F:8", 1, "^59080"],
+                    lsb=True, frequency=38000, period=59080.0),
+}
@@ -0,0 +1,116 @@
+"""Carrier modulated sample output.
+
+Requires numpy. Renders raw durations into 16 bit PCM samples with the
+carrier switched on during bursts, for blasters driven from an audio output
+or a PWM pin. Samples are generated in chunks, so long signals are never
+held in memory at once. The carrier phase follows absolute sample time,
+keeping it continuous across chunks.
+
+Registered as the ``wav`` output format, which renders each code into a
+complete wav file.
+"""
+import struct
+import numpy as np
+from .exceptions import IrgenInputError
+
+
+def _validate(carrier, rate, duty):
+    if not 0 < carrier * 2 <= rate:
+        raise IrgenInputError(f"Sample rate {rate} too low for carrier {carrier}")
+    if not 0 < duty <= 1:
+        raise IrgenInputError(f"Duty cycle {duty} out of range 0-1")
+
+
+def _frame(segments, channels):
+    samples = np.concatenate(segments)
+    if channels == 2:
+        # second channel inverted, doubles the swing over a led pair
+        samples = np.column_stack((samples, -samples))
+    return samples.astype('<i2').tobytes()
+
+
+def gen_pcm_chunks(data, carrier=38000, rate=192000, duty=1 / 3,
+                   amplitude=0.9, channels=1, chunksize=65536):
+    """Generate bytes of little endian 16 bit samples, chunksize frames at a time."""
+    _validate(carrier, rate, duty)
+    if channels not in (1, 2):
+        raise IrgenInputError(f"Expected 1 or 2 channels, got {channels}")
+
+    level = int(amplitude * 32767)
+    threshold = duty * rate
+    position = 0
+    elapsed = 0.0
+    segments = []
+    pending = 0
+
+    for duration in data:
+        elapsed += abs(duration)
+        end = round(elapsed * rate / 1e6)
+        while position < end:
+            count = min(end - position, chunksize - pending)
+            if duration > 0:
+                index = np.arange(position, position + count, dtype=np.int64)
+                segment = np.where((index * carrier) % rate < threshold, level, 0)
+            else:
+                segment = np.zeros(count, dtype=np.int64)
+            segments.append(segment)
+            pending += count
+            position += count
+            if pending >= chunksize:
+                yield _frame(segments, channels)
+                segments = []
+                pending = 0
+
+    if pending:
+        yield _frame(segments, channels)
+
+
+def count_frames(data, rate=192000):
+    """Number of sample frames for given durations."""
+    return round(sum(abs(duration) for duration in data) * rate / 1e6)
+
+
+def wav_header(frames, rate=192000, channels=1):
+    """Header of a 16 bit PCM wav file of given number of frames."""
+    size = frames * channels * 2
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + size, b'WAVE',
+                       b'fmt ', 16, 1, channels, rate, rate * channels * 2, channels * 2, 16,
+                       b'data', size)
+
+
+def gen_wav_chunks(data, carrier=38000, rate=192000, channels=1, **kwargs):
+    """Generate bytes of a modulated wav file, the header followed by sample chunks.
+
+    The frame count is in the header, so the output does not need to be
+    seekable and may be a pipe.
+    """
+    data = list(data)
+    yield wav_header(count_frames(data, rate), rate, channels)
+    yield from gen_pcm_chunks(data, carrier, rate, channels=channels, **kwargs)
+
+
+def write_wav(file, data, carrier=38000, rate=192000, channels=1, **kwargs):
+    """Write durations as a modulated wav file, returns number of frames."""
+    data = list(data)
+    for chunk in gen_wav_chunks(data, carrier, rate, channels, **kwargs):
+        file.write(chunk)
+    return count_frames(data, rate)
+
+
+def gen_output_wav(codes, carrier=None, rate=192000, channels=1, chunked=False, **kwargs):
+    """Render each code into wav file bytes, carrier defaults to the code frequency.
+
+    With chunked, the file of a code is yielded in parts as it is rendered.
+    """
+    for code in codes:
+        frequency = (carrier or code.get('frequency') or
+                     getattr(code['raw'], 'frequency', None) or 38000)
+        try:
+            chunks = gen_wav_chunks(code['raw'], frequency, rate, channels, **kwargs)
+            if chunked:
+                for chunk in chunks:
+                    yield True, chunk
+            else:
+                yield True, b''.join(chunks)
+        except IrgenInputError as exc:
+            yield False, "Error '{}' while rendering".format(str(exc))
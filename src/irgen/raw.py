@@ -1,5 +1,8 @@
+from array import array
+from . import instrument
 
 
+@instrument.stage("raw.simplify")
 def simplify(x):
     """
     Simplify raw string.
@@ -24,6 +27,7 @@ def simplify(x):
         yield value
 
 
+@instrument.stage("raw.paired")
 def paired(x, silence=0):
     """Create pairs of on, off."""
     sign = 1
@@ -52,3 +56,104 @@ def ltrim(x):
 def rtrim(x):
     """Drop trailing silence"""
     yield from reversed(list(ltrim(reversed(list(x)))))
+
+
+class RawSignal:
+    """
+    Compact raw signal.
+
+    Durations are stored as signed microseconds in a typed array of
+    doubles, keeping sub-microsecond protocol timings exact, with an
+    optional carrier frequency in Hz. Slicing is zero-copy, while
+    concatenation and repetition operate on the underlying buffers.
+    """
+
+    __slots__ = ('_data', 'frequency')
+
+    typecode = 'd'
+
+    def __init__(self, data=(), frequency=None):
+        if isinstance(data, RawSignal):
+            if frequency is None:
+                frequency = data.frequency
+            self._data = data._data
+        else:
+            self._data = self._buffer(data)
+        self.frequency = frequency
+
+    @classmethod
+    def _buffer(cls, data):
+        try:
+            view = memoryview(data)
+        except TypeError:
+            pass
+        else:
+            if view.ndim == 1 and view.format == cls.typecode:
+                return view
+        return memoryview(array(cls.typecode, data))
+
+    @staticmethod
+    def _bytes(view):
+        if view.contiguous:
+            return view.cast('B')
+        return view.tobytes()
+
+    @property
+    def durations(self):
+        """Read only view of the durations."""
+        return self._data.toreadonly()
+
+    def to_array(self):
+        """Return a copy of durations as an array."""
+        result = array(self.typecode)
+        result.frombytes(self._bytes(self._data))
+        return result
+
+    def to_numpy(self):
+        """Return a zero-copy numpy view of the durations."""
+        import numpy as np
+        return np.frombuffer(self._data, dtype=np.float64)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __reversed__(self):
+        return reversed(self._data.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RawSignal(self._data[index], self.frequency)
+        return self._data[index]
+
+    def __add__(self, other):
+        result = self.to_array()
+        if isinstance(other, RawSignal):
+            result.frombytes(self._bytes(other._data))
+        else:
+            result.frombytes(self._bytes(self._buffer(other)))
+        return RawSignal(result, self.frequency)
+
+    def __mul__(self, count):
+        return RawSignal(self.to_array() * count, self.frequency)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, RawSignal):
+            return self._data == other._data and self.frequency == other.frequency
+        try:
+            return list(self._data) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    # mutable comparison semantics like list, not hashable
+    __hash__ = None
+
+    def __reduce__(self):
+        return (RawSignal, (self.to_array(), self.frequency))
+
+    def __repr__(self):
+        return f"RawSignal({self._data.tolist()!r}, frequency={self.frequency!r})"
@@ -0,0 +1,133 @@
+"""Registries of protocols and formats.
+
+Encoders, decoders and input/output formats register by name. Targets
+may be given as ``"module:attribute"`` strings, which are only imported
+on first use. Third party packages can add entries through the entry
+point groups ``irgen.encoders``, ``irgen.decoders``, ``irgen.inputs`` and
+``irgen.outputs``, which are also loaded lazily.
+"""
+from importlib import import_module
+import logging
+from .exceptions import IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+
+def load_target(target):
+    """Import a ``"module:attribute"`` target."""
+    module, _, attribute = target.partition(":")
+    value = import_module(module)
+    for name in attribute.split("."):
+        value = getattr(value, name)
+    return value
+
+
+class Registry:
+    """Name to implementation mapping with lazy loading."""
+
+    def __init__(self, kind, group):
+        self.kind = kind
+        self.group = group
+        self._targets = {}
+        self._loaded = {}
+        self._scanned = False
+
+    def register(self, name, target=None):
+        """Register a target by name, usable as a decorator if target is omitted."""
+        if target is None:
+            def decorator(func):
+                self.register(name, func)
+                return func
+            return decorator
+
+        name = name.lower()
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+        return target
+
+    def unregister(self, name):
+        name = name.lower()
+        self._targets.pop(name, None)
+        self._loaded.pop(name, None)
+
+    def _scan(self):
+        """Add entry points of the plugin group, without importing them."""
+        if self._scanned:
+            return
+        self._scanned = True
+        try:
+            from importlib.metadata import entry_points
+            try:
+                found = entry_points(group=self.group)
+            except TypeError:
+                found = entry_points().get(self.group, [])
+        except Exception as exc:
+            LOG.warning("Unable to scan entry points for %s: %s", self.group, exc)
+            return
+
+        for entry_point in found:
+            self._targets.setdefault(entry_point.name.lower(), entry_point)
+
+    def get(self, name):
+        """Return implementation for name, raising IrgenInputError if unknown."""
+        name = name.lower()
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+
+        try:
+            target = self._targets[name]
+        except KeyError:
+            self._scan()
+            try:
+                target = self._targets[name]
+            except KeyError:
+                raise IrgenInputError(f"Unknown {self.kind} {name}") from None
+
+        if isinstance(target, str):
+            value = load_target(target)
+        elif hasattr(target, "load") and hasattr(target, "group"):
+            value = target.load()
+        else:
+            value = target
+
+        self._loaded[name] = value
+        return value
+
+    def names(self):
+        """List all registered names, including plugins."""
+        self._scan()
+        return list(self._targets)
+
+    def __contains__(self, name):
+        name = name.lower()
+        if name in self._targets:
+            return True
+        self._scan()
+        return name in self._targets
+
+
+encoders = Registry("encoder", "irgen.encoders")
+decoders = Registry("decoder", "irgen.decoders")
+inputs = Registry("input format", "irgen.inputs")
+outputs = Registry("output format", "irgen.outputs")
+
+inputs.register('raw', 'irgen.convert:gen_codes_from_raw')
+inputs.register('irdb', 'irgen.convert:gen_codes_from_irdb')
+inputs.register('broadlink', 'irgen.convert:gen_codes_from_broadlink')
+inputs.register('broadlink_base64', 'irgen.convert:gen_codes_from_broadlink_base64')
+inputs.register('pronto', 'irgen.convert:gen_codes_from_pronto')
+inputs.register('wav', 'irgen.convert:gen_codes_from_wav')
+inputs.register('samples', 'irgen.convert:gen_codes_from_samples')
+inputs.register('device', 'irgen.convert:gen_codes_from_device')
+inputs.register('table', 'irgen.convert:gen_codes_from_table')
+
+outputs.register('auto', 'irgen.convert:gen_output_auto')
+outputs.register('broadlink', 'irgen.convert:gen_output_broadlink')
+outputs.register('broadlink_base64', 'irgen.convert:gen_output_broadlink_base64')
+outputs.register('raw', 'irgen.convert:gen_output_raw')
+outputs.register('pronto', 'irgen.convert:gen_output_pronto')
+outputs.register('pronto_short', 'irgen.convert:gen_output_pronto_short')
+outputs.register('identify', 'irgen.signature:gen_output_identify')
+outputs.register('wav', 'irgen.pcm:gen_output_wav')
@@ -0,0 +1,95 @@
+"""Segmentation of long captures into frames and parallel decoding.
+
+Requires numpy. A duration log is merged into alternating bursts and
+spaces and split after every space of at least ``gap`` microseconds, all
+vectorized over the whole array. Frames are then decoded independently,
+across a process pool for long logs, giving a result per frame with its
+position in the log.
+"""
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+from . import registry
+from .batch import gen_chunks
+from .exceptions import IrgenInputError
+
+Segment = namedtuple("Segment", ["index", "offset", "time", "data"])
+Decoded = namedtuple("Decoded", ["index", "offset", "time", "value", "error"])
+
+
+def simplify_array(data):
+    """Merge adjacent durations of equal sign and drop zeros."""
+    data = np.asarray(data, dtype=np.float64)
+    data = data[data != 0]
+    if not len(data):
+        return data
+    signs = data > 0
+    starts = np.concatenate(([0], np.flatnonzero(signs[1:] != signs[:-1]) + 1))
+    return np.add.reduceat(data, starts)
+
+
+def segment(data, gap=10000.0):
+    """Split durations into frames, each ending with its trailing space.
+
+    Returns a list of Segment with the index of the frame, its offset in the
+    simplified durations and its start time in microseconds.
+    """
+    data = simplify_array(data)
+    ends = np.flatnonzero(data <= -gap) + 1
+    if not len(ends) or ends[-1] != len(data):
+        ends = np.append(ends, len(data))
+    starts = np.concatenate(([0], ends[:-1]))
+    times = np.concatenate(([0.0], np.cumsum(np.abs(data))))[starts]
+
+    segments = []
+    for start, end, time in zip(starts.tolist(), ends.tolist(), times.tolist()):
+        frame = data[start:end]
+        # leading silence belongs to no frame
+        if len(frame) and frame[0] < 0:
+            time -= frame[0]
+            frame = frame[1:]
+            start += 1
+        if len(frame):
+            segments.append(Segment(len(segments), start, time, frame.tolist()))
+    return segments
+
+
+def decode_segment(segment, protocol):
+    """Decode a single frame, returning a Decoded with value or error."""
+    try:
+        if protocol == 'auto':
+            from . import dec_raw_auto
+            value = dec_raw_auto(segment.data)
+        else:
+            value = registry.decoders.get(protocol)(iter(segment.data), protocol=protocol)
+    except (IrgenInputError, StopIteration) as exc:
+        return Decoded(segment.index, segment.offset, segment.time, None,
+                       str(exc) or "Truncated frame")
+    return Decoded(segment.index, segment.offset, segment.time, value, None)
+
+
+def decode_segments(segments, protocol):
+    return [decode_segment(segment, protocol) for segment in segments]
+
+
+def gen_decoded_segments(data, protocol, gap=10000.0, workers=None, chunksize=256):
+    """Segment data and decode frames in a process pool, yielding Decoded in order."""
+    protocol = protocol.lower()
+    if protocol != 'auto':
+        registry.decoders.get(protocol)
+
+    segments = segment(data, gap)
+    if workers == 1 or len(segments) <= chunksize:
+        yield from decode_segments(segments, protocol)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in gen_chunks(segments, chunksize):
+            pending.append(executor.submit(decode_segments, chunk, protocol))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
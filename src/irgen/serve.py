@@ -0,0 +1,303 @@
+"""Conversion service over HTTP.
+
+Run with ``irgen serve``. Requests are JSON objects posted to ``/encode``,
+``/decode`` or ``/convert``, or lists of such objects which are answered
+with a list of results in the same order. ``/convert`` only accepts inputs
+given fully by the request data, never files of the server. Results are
+cached in process, so repeated requests for the same code are answered
+without regenerating it.
+Requests are converted in a thread pool bounded by the concurrency limit,
+and large lists in a process pool, to keep the event loop responsive.
+"""
+import asyncio
+from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import json
+import logging
+import irgen
+from . import registry
+from . import stream
+from .cache import default_cache
+from .convert import convert, data_input
+from .exceptions import IrgenError, IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+reasons = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+}
+
+
+def encode(request):
+    protocol = request['protocol']
+    result = default_cache.get(protocol,
+                               request['device'],
+                               request['function'],
+                               toggle=request.get('toggle', 0),
+                               mode=request.get('mode', 0),
+                               subdevice=request.get('subdevice', 0))
+    return {'raw': list(result),
+            'frequency': irgen.gen_raw_protocols_frequency.get(protocol.lower())}
+
+
+def decode(request):
+    protocol = request.get('protocol', 'auto').lower()
+    data = request['raw']
+    if protocol == 'auto':
+        return {'frames': [{'protocol': protocol, 'values': list(values)}
+                           for protocol, values in irgen.dec_raw_auto(data)]}
+
+    errors = []
+
+    def on_error(exc, frame):
+        errors.append(str(exc))
+
+    if protocol in stream.stream_protocols:
+        frames = [list(values) for values in stream.gen_decoded_from_raw(data, protocol, on_error)]
+    else:
+        # no stream decoder, decode as a single frame
+        decoder = registry.decoders.get(protocol)
+        try:
+            frames = [list(decoder(iter(data), protocol=protocol))]
+        except (IrgenInputError, StopIteration) as exc:
+            frames = []
+            on_error(exc, data)
+    return {'frames': [{'protocol': protocol, 'values': values} for values in frames],
+            'errors': errors}
+
+
+@lru_cache(maxsize=4096)
+def convert_cached(input, output, data, repeats):
+    return tuple(convert(input, output, list(data), repeats=repeats))
+
+
+def convert_request(request):
+    input = request['input']
+    if not data_input(input):
+        raise IrgenInputError(f"Unsupported input {input}")
+    data = request.get('data', [])
+    if isinstance(data, str):
+        data = data.split()
+    results = convert_cached(input,
+                             request['output'],
+                             tuple(str(x) for x in data),
+                             int(request.get('repeats', 1)))
+    return {'results': [{'ok': ok, 'text': b64encode(text).decode('ascii')}
+                        if isinstance(text, bytes) else {'ok': ok, 'text': text}
+                        for ok, text in results]}
+
+
+endpoints = {
+    '/encode': encode,
+    '/decode': decode,
+    '/convert': convert_request,
+}
+
+
+def handle(endpoint, request):
+    """Handle a single request, returning a result or error dict."""
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("Expected a json object")
+        return endpoints[endpoint](request)
+    except KeyError as exc:
+        return {'error': "Missing field {}".format(exc)}
+    except (IrgenError, ValueError, TypeError, IndexError, StopIteration) as exc:
+        return {'error': str(exc) or type(exc).__name__}
+
+
+def handle_batch(endpoint, requests):
+    return [handle(endpoint, request) for request in requests]
+
+
+def stats():
+    convert_info = convert_cached.cache_info()
+    return {
+        'encode_cache': default_cache.info()._asdict(),
+        'convert_cache': {'hits': convert_info.hits,
+                          'misses': convert_info.misses,
+                          'maxsize': convert_info.maxsize,
+                          'currsize': convert_info.currsize},
+    }
+
+
+class Server:
+    """Asyncio HTTP/1.1 server for conversion requests."""
+
+    def __init__(self, max_concurrency=64, offload=64, workers=None, max_body=1 << 20):
+        self.max_concurrency = max_concurrency
+        self.offload = offload
+        self.workers = workers
+        self.max_body = max_body
+        self._semaphore = None
+        self._executor = None
+        self._threads = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_threads(self):
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        return self._threads
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._threads is not None:
+            self._threads.shutdown()
+            self._threads = None
+
+    async def dispatch(self, method, path, body):
+        """Return status and json payload for a request."""
+        path = path.split('?', 1)[0]
+        if path in ('/health', '/stats'):
+            if method != 'GET':
+                return 405, {'error': 'Method not allowed'}
+            return 200, stats() if path == '/stats' else {'status': 'ok'}
+
+        if path not in endpoints:
+            return 404, {'error': 'Unknown endpoint {}'.format(path)}
+        if method != 'POST':
+            return 405, {'error': 'Method not allowed'}
+
+        try:
+            request = json.loads(body)
+        except ValueError as exc:
+            return 400, {'error': 'Invalid json: {}'.format(exc)}
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            if not isinstance(request, list):
+                result = await loop.run_in_executor(self._get_threads(), handle, path, request)
+                return 400 if 'error' in result else 200, result
+
+            if self.offload and len(request) >= self.offload:
+                executor = self._get_executor()
+            else:
+                executor = self._get_threads()
+            result = await loop.run_in_executor(executor, handle_batch, path, request)
+            return 200, result
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # longer than the stream limit
+                    await self._respond(writer, 400, {'error': 'Request line too long'}, False)
+                    break
+                if not line:
+                    break
+                try:
+                    method, path, version = line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Invalid request line'}, False)
+                    break
+
+                headers = {}
+                try:
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    await self._respond(writer, 431, {'error': 'Header line too long'}, False)
+                    break
+
+                keep_alive = (version == 'HTTP/1.1' and
+                              headers.get('connection', '').lower() != 'close')
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Invalid content length'}, False)
+                    break
+                if length > self.max_body:
+                    await self._respond(writer, 413, {'error': 'Request too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write("HTTP/1.1 {} {}\r\n"
+                     "Content-Type: application/json\r\n"
+                     "Content-Length: {}\r\n"
+                     "Connection: {}\r\n\r\n".format(
+                         status, reasons[status], len(body),
+                         'keep-alive' if keep_alive else 'close').encode('latin-1'))
+        writer.write(body)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8080, unix=None):
+        """Start listening, on a unix socket if given, else on host and port."""
+        if unix:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(host='127.0.0.1', port=8080, unix=None, **kwargs):
+    server = Server(**kwargs)
+    try:
+        listener = await server.start(host, port, unix)
+        for socket in listener.sockets:
+            LOG.info("Listening on %s", socket.getsockname())
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='irgen serve',
+                                     description='Serve IR code conversion over HTTP')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port to listen on')
+    parser.add_argument('--unix',
+                        help='Listen on unix socket path instead of tcp')
+    parser.add_argument('--max-concurrency', type=int, default=64,
+                        help='Maximum number of requests handled at once')
+    parser.add_argument('--offload', type=int, default=64,
+                        help='Lists of at least this many requests are converted '
+                             'in worker processes, 0 to disable')
+    parser.add_argument('-j', '--jobs', dest='workers', type=int,
+                        help='Number of worker processes for offloaded requests')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix,
+                          max_concurrency=args.max_concurrency,
+                          offload=args.offload,
+                          workers=args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,143 @@
+"""Signature index for identification of known codes.
+
+A signal is reduced to its first frame, normalized by its base unit and
+each duration quantized to the nearest of a set of levels spaced widely
+enough that ordinary timing errors stay in the same level. The levels are
+hashed into a compact signature, so identifying a capture is a single
+dictionary probe, independent of whether its protocol can be decoded.
+"""
+from hashlib import blake2b
+import json
+import math
+from . import raw
+from .exceptions import IrgenInputError
+
+# levels in base units, alternating 1 and 1.5 times powers of two
+levels = [1, 1.5] + [factor * 2 ** exponent for exponent in range(1, 12) for factor in (1, 1.5)]
+
+_log_levels = [math.log(level) for level in levels]
+_boundaries = [(a + b) / 2 for a, b in zip(_log_levels, _log_levels[1:])]
+
+
+def gen_frame(data, frame_gap=10000.0):
+    """Generate the first frame of a signal, without its trailing space."""
+    for duration in raw.paired(raw.simplify(data)):
+        if duration <= -frame_gap:
+            return
+        if duration:
+            yield duration
+
+
+def base_unit(frame):
+    """Estimate the base unit of a frame from its shortest durations."""
+    if not frame:
+        raise IrgenInputError("No durations for a base unit")
+    shortest = min(abs(duration) for duration in frame)
+    short = [abs(duration) for duration in frame if abs(duration) < shortest * 1.5]
+    return sum(short) / len(short)
+
+
+def quantize(duration, base):
+    """Index of nearest level of a duration, negative for spaces."""
+    value = math.log(abs(duration) / base)
+    index = 0
+    while index < len(_boundaries) and value > _boundaries[index]:
+        index += 1
+    return index + 1 if duration > 0 else -index - 1
+
+
+def signature(data, frame_gap=10000.0):
+    """Return (key, base unit) for a signal."""
+    frame = list(gen_frame(data, frame_gap))
+    if frame and frame[-1] < 0:
+        frame.pop()
+    if len(frame) < 2:
+        raise IrgenInputError("Signal too short for a signature")
+    base = base_unit(frame)
+    quantized = bytes(quantize(duration, base) & 0xFF for duration in frame)
+    return blake2b(quantized, digest_size=8).hexdigest(), base
+
+
+class SignatureIndex:
+    """Mapping of signal signatures to labels."""
+
+    def __init__(self, tolerance=0.25):
+        self.tolerance = tolerance
+        self._entries = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def add(self, data, label):
+        """Add a signal under a label tuple, returns its signature key."""
+        key, base = signature(data)
+        entries = self._entries.setdefault(key, [])
+        entry = [base, list(label)]
+        if entry not in entries:
+            entries.append(entry)
+        return key
+
+    def lookup(self, data):
+        """Return labels of known signals matching data."""
+        key, base = signature(data)
+        return [tuple(label)
+                for known, label in self._entries.get(key, [])
+                if abs(base - known) <= known * self.tolerance]
+
+    def add_protocol(self, protocol, devices, functions, **kwargs):
+        """Add (protocol, device, function) labels for all combinations."""
+        from . import gen_raw_general
+        for device in devices:
+            for function in functions:
+                try:
+                    data = list(gen_raw_general(protocol, device, function, **kwargs))
+                except IrgenInputError:
+                    continue
+                self.add(data, (protocol, device, function))
+
+    def add_library(self, library):
+        """Add (device, command) labels of a device library."""
+        for device in library.devices():
+            for command in library.commands(device):
+                compiled = library.lookup(device, command)
+                self.add(compiled['durations'], (device, command))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'tolerance': self.tolerance, 'entries': self._entries}, file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        index = cls(data['tolerance'])
+        index._entries = data['entries']
+        return index
+
+
+_default_index = None
+
+
+def default_index():
+    """Index of the device library, built on first use."""
+    global _default_index
+    if _default_index is None:
+        from .devices import Library
+        index = SignatureIndex()
+        index.add_library(Library())
+        _default_index = index
+    return _default_index
+
+
+def gen_output_identify(codes):
+    index = default_index()
+    for code in codes:
+        try:
+            labels = index.lookup(code['raw'])
+        except IrgenInputError as exc:
+            yield False, "Error '{}' while identifying".format(str(exc))
+            continue
+        if not labels:
+            yield False, "No known code matched"
+        for label in labels:
+            yield True, " ".join(str(x) for x in label)
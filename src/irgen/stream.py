@@ -0,0 +1,181 @@
+"""Incremental push based decoders for continuous raw streams."""
+from abc import ABC, abstractmethod
+import logging
+from . import instrument
+from . import (dec_raw_nec,
+               dec_raw_rc5,
+               dec_raw_rc6,
+               gen_raw_nec_protocols)
+from .exceptions import IrgenInputError
+
+LOG = logging.getLogger(__name__)
+
+
+class StreamDecoder(ABC):
+    """Base class for stateful stream decoders.
+
+    Durations are pushed with feed() in chunks of any size. Frames are
+    decoded as soon as they complete, and on errors the decoder drops the
+    current frame and resynchronizes on the next leading burst. Only the
+    current frame is buffered, so memory use is bounded by frame length.
+    """
+
+    max_length = 128
+
+    def __init__(self, protocol, on_error=None):
+        self.protocol = protocol
+        self.on_error = on_error
+        self.errors = 0
+        self._value = 0
+        self._frame = []
+        self._output = []
+
+    def feed(self, durations):
+        """Push durations, returning list of frames completed by them."""
+        value = self._value
+        for duration in durations:
+            if duration == 0:
+                continue
+            elif value == 0:
+                value = duration
+            elif (value > 0) == (duration > 0):
+                value += duration
+            else:
+                self._push(value)
+                value = duration
+        self._value = value
+        return self._take()
+
+    def flush(self):
+        """Signal end of stream, returning any frame still pending."""
+        if self._value:
+            self._push(self._value)
+            self._value = 0
+        if self._frame:
+            self._complete()
+        return self._take()
+
+    def reset(self):
+        """Drop all buffered state."""
+        self._value = 0
+        self._frame = []
+
+    def _take(self):
+        output, self._output = self._output, []
+        return output
+
+    def _error(self, exc):
+        self.errors += 1
+        if instrument.enabled:
+            instrument.record_error(f"stream.{self.protocol}", exc)
+        LOG.debug("Dropping frame %s: %s", self._frame, exc)
+        if self.on_error:
+            self.on_error(exc, self._frame)
+        self._frame = []
+
+    def _complete(self):
+        frame = self._frame
+        try:
+            self._output.append(self._decode(frame))
+        except (IrgenInputError, StopIteration) as exc:
+            if isinstance(exc, StopIteration):
+                exc = IrgenInputError("Truncated frame")
+            self._error(exc)
+        else:
+            self._frame = []
+
+    @abstractmethod
+    def _push(self, duration):
+        """Handle a merged duration, completing the frame when it ends."""
+
+    @abstractmethod
+    def _decode(self, frame):
+        """Decode a complete frame, raising IrgenInputError when invalid."""
+
+
+class NecStreamDecoder(StreamDecoder):
+    """Stream decoder for nec variants."""
+
+    def __init__(self, protocol, on_error=None):
+        super().__init__(protocol, on_error)
+        base = protocol.split('-')[0]
+        self._leading_count = 16 if base in ('nec1', 'necx1') else 8
+        self._logical_bit = 562.5
+
+    def _is_leading(self, duration):
+        logical_bit = duration / self._leading_count
+        return abs((logical_bit - 562.5) / 562.5) < 0.2
+
+    def _push(self, duration):
+        frame = self._frame
+        if not frame:
+            if duration > 0 and self._is_leading(duration):
+                frame.append(duration)
+                self._logical_bit = duration / self._leading_count
+            return
+
+        if duration > 0 and self._is_leading(duration):
+            self._error(IrgenInputError("Truncated frame"))
+            self._push(duration)
+            return
+
+        frame.append(duration)
+        if len(frame) == 2:
+            space = round(duration / self._logical_bit)
+            if space not in (-8, -4):
+                self._error(IrgenInputError(f"Space after burst failed with value {space}"))
+        elif len(frame) == 3 and round(frame[1] / self._logical_bit) == -4:
+            self._complete()
+        elif len(frame) == 66:
+            self._complete()
+
+    def _decode(self, frame):
+        return dec_raw_nec(iter(frame), protocol=self.protocol)
+
+
+class BiphaseStreamDecoder(StreamDecoder):
+    """Stream decoder for bi-phase protocols, frames end on a long space."""
+
+    def __init__(self, protocol, decoder, logical_bit, on_error=None):
+        super().__init__(protocol, on_error)
+        self._decoder = decoder
+        self._gap = logical_bit * 4.5
+
+    def _push(self, duration):
+        frame = self._frame
+        if not frame:
+            if duration > 0:
+                frame.append(duration)
+            return
+
+        frame.append(duration)
+        if duration < -self._gap:
+            self._complete()
+        elif len(frame) > self.max_length:
+            self._error(IrgenInputError("Frame too long"))
+
+    def _decode(self, frame):
+        return self._decoder(iter(frame))
+
+
+stream_protocols = [*gen_raw_nec_protocols, 'rc5', 'rc6']
+
+
+def create_stream_decoder(protocol, on_error=None):
+    """Create a stream decoder for given protocol."""
+    protocol = protocol.lower()
+    if protocol in gen_raw_nec_protocols:
+        return NecStreamDecoder(protocol, on_error)
+    if protocol == 'rc5':
+        return BiphaseStreamDecoder(protocol, dec_raw_rc5, 889.0, on_error)
+    if protocol == 'rc6':
+        return BiphaseStreamDecoder(protocol, dec_raw_rc6, 444.0, on_error)
+    raise IrgenInputError(f"No stream decoder for protocol {protocol}")
+
+
+def gen_decoded_from_raw(data, protocol, on_error=None):
+    """Decode all frames in a raw stream."""
+    decoder = create_stream_decoder(protocol, on_error)
+    for duration in data:
+        yield from decoder.feed((duration,))
+    yield from decoder.flush()
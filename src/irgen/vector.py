@@ -0,0 +1,444 @@
+"""Vectorized batch generation and decoding of raw codes.
+
+Requires numpy. All functions operate on whole tables of codes at once.
+Generators return two dimensional arrays with one row per code and a fixed
+number of durations per protocol, matching the output of the scalar
+generators. Protocols without a vectorized generator, such as sirc,
+samsung32 and jvc, are encoded row by row from their definition. Decoders take a zero padded matrix of frames and return a
+structured array with one record per frame instead of raising.
+"""
+import numpy as np
+from . import (gen_raw_irp_protocols,
+               gen_raw_nec_protocols,
+               gen_raw_rc5_protocols,
+               gen_raw_rc6_protocols,
+               gen_raw_rca38_protocols)
+from . import irp
+from .exceptions import IrgenInputError
+
+
+def _as_array(value, name):
+    if isinstance(value, (str, bytes)):
+        value = int(value, 0)
+    value = np.asarray(value)
+    if value.dtype.kind not in "iub":
+        raise IrgenInputError(f"Expected integer values for {name}, got {value.dtype}")
+    return np.atleast_1d(value.astype(np.int64))
+
+
+def _check_range(value, name, limit):
+    if np.any((value < 0) | (value >= limit)):
+        raise IrgenInputError(f"Value of {name} out of range 0-{limit - 1}")
+
+
+def bits_from_values(values, width, lsb_first=False):
+    """Extract a (N, width) array of bits from an integer array."""
+    shifts = np.arange(width, dtype=np.int64)
+    if not lsb_first:
+        shifts = shifts[::-1]
+    return ((values[:, None] >> shifts) & 1).astype(bool)
+
+
+def _pulse_distance(bits, burst, one, zero):
+    out = np.empty((bits.shape[0], bits.shape[1] * 2), dtype=np.float64)
+    out[:, 0::2] = burst
+    out[:, 1::2] = np.where(bits, one, zero)
+    return out
+
+
+def _manchester(bits, one):
+    """Bi-phase encode bits, one being the first half of a set bit."""
+    first = np.where(bits, one, -one)
+    out = np.empty((bits.shape[0], bits.shape[1] * 2), dtype=np.float64)
+    out[:, 0::2] = first
+    out[:, 1::2] = -first
+    return out
+
+
+def _constant(count, values):
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (count, len(values)))
+
+
+def gen_raw_nec_batch(protocol, device, function):
+    """Generate raw nec codes for arrays of device and function."""
+    protocol_base, protocol_suffix = (protocol.split('-') + [None])[:2]
+    device, function = np.broadcast_arrays(_as_array(device, "device"),
+                                           _as_array(function, "function"))
+    count = len(device)
+
+    if protocol_base.startswith("necx"):
+        _check_range(device, "device", 1 << 16)
+        device_2 = (device >> 8) & 0xFF
+    else:
+        _check_range(device, "device", 1 << 8)
+        device_2 = device ^ 0xFF
+
+    if protocol_suffix == 'f16':
+        _check_range(function, "function", 1 << 16)
+        function_2 = (function >> 8) & 0xFF
+    else:
+        _check_range(function, "function", 1 << 8)
+        function_2 = function ^ {'y1': 0x7F,
+                                 'y2': 0xFE,
+                                 'y3': 0x7E}.get(protocol_suffix, 0xFF)
+
+    value = ((device & 0xFF) |
+             (device_2 << 8) |
+             ((function & 0xFF) << 16) |
+             (function_2 << 24))
+
+    leading = 16 if protocol_base in ('nec1', 'necx1') else 8
+    units = np.hstack([
+        _constant(count, [leading, -8]),
+        _pulse_distance(bits_from_values(value, 32, lsb_first=True), 1, -3, -1),
+        _constant(count, [1, -3]),
+    ])
+    return units * 562.5
+
+
+def gen_raw_rc5_batch(device, function, toggle=0):
+    """Generate raw rc5 codes for arrays of device, function and toggle."""
+    device, function, toggle = np.broadcast_arrays(_as_array(device, "device"),
+                                                   _as_array(function, "function"),
+                                                   _as_array(toggle, "toggle"))
+    _check_range(device, "device", 1 << 5)
+    _check_range(function, "function", 1 << 7)
+    _check_range(toggle, "toggle", 2)
+    count = len(device)
+
+    value = ((1 << 13) |
+             ((function < 64).astype(np.int64) << 12) |
+             (toggle << 11) |
+             (device << 6) |
+             (function % 64))
+
+    units = np.hstack([
+        _manchester(bits_from_values(value, 14), -1),
+        _constant(count, [-100]),
+    ])
+    return units * 889.0
+
+
+def gen_raw_rc6_batch(device, function, toggle=0, mode=0):
+    """Generate raw rc6 codes for arrays of device, function, toggle and mode."""
+    device, function, toggle, mode = np.broadcast_arrays(_as_array(device, "device"),
+                                                         _as_array(function, "function"),
+                                                         _as_array(toggle, "toggle"),
+                                                         _as_array(mode, "mode"))
+    _check_range(device, "device", 1 << 8)
+    _check_range(function, "function", 1 << 8)
+    _check_range(toggle, "toggle", 2)
+    _check_range(mode, "mode", 1 << 3)
+    count = len(device)
+
+    toggle_units = np.where(toggle[:, None].astype(bool), [2, -2], [-2, 2])
+    units = np.hstack([
+        _constant(count, [6, -2]),
+        _manchester(bits_from_values((1 << 3) | mode, 4), 1),
+        toggle_units,
+        _manchester(bits_from_values((device << 8) | function, 16), 1),
+        _constant(count, [-6]),
+    ])
+    return units * 444.0
+
+
+def gen_raw_rca38_batch(device, function):
+    """Generate raw rca38 codes for arrays of device and function."""
+    device, function = np.broadcast_arrays(_as_array(device, "device"),
+                                           _as_array(function, "function"))
+    _check_range(device, "device", 1 << 4)
+    _check_range(function, "function", 1 << 8)
+    count = len(device)
+
+    value = (device << 8) | function
+    value = (value << 12) | (value ^ 0xFFF)
+
+    units = np.hstack([
+        _constant(count, [8, -8]),
+        _pulse_distance(bits_from_values(value, 24), 1, -4, -2),
+        _constant(count, [1, -16]),
+    ])
+    return units * 460.0
+
+
+def gen_raw_irp_batch(protocol, device, function, subdevice=0, toggle=0, mode=0):
+    """Generate raw codes of a defined protocol row by row, zero padded to the longest."""
+    definition = irp.protocols[protocol]
+    values = np.broadcast_arrays(_as_array(device, "device"),
+                                 _as_array(function, "function"),
+                                 _as_array(subdevice, "subdevice"),
+                                 _as_array(toggle, "toggle"),
+                                 _as_array(mode, "mode"))
+    return frames_to_matrix([definition.encode(D=int(d), F=int(f), S=int(s), T=int(t), M=int(m))
+                             for d, f, s, t, m in zip(*values)])
+
+
+gen_raw_batch_protocols = [
+    *gen_raw_nec_protocols,
+    *gen_raw_rc5_protocols,
+    *gen_raw_rc6_protocols,
+    *gen_raw_rca38_protocols,
+    *gen_raw_irp_protocols,
+]
+
+
+def gen_raw_batch(protocol, device, function, toggle=0, mode=0, subdevice=0):
+    """Generate a (N, width) array of raw codes for any supported protocol."""
+    protocol = protocol.lower()
+    if protocol in gen_raw_nec_protocols:
+        return gen_raw_nec_batch(protocol, device, function)
+    if protocol in gen_raw_rc5_protocols:
+        return gen_raw_rc5_batch(device, function, toggle)
+    if protocol in gen_raw_rc6_protocols:
+        return gen_raw_rc6_batch(device, function, toggle, mode)
+    if protocol in gen_raw_rca38_protocols:
+        return gen_raw_rca38_batch(device, function)
+    if protocol in gen_raw_irp_protocols:
+        return gen_raw_irp_batch(protocol, device, function, subdevice, toggle, mode)
+    raise IrgenInputError(f"Unsupported protocol {protocol}")
+
+
+DECODE_OK = 0
+DECODE_TRUNCATED = 1
+DECODE_LEADING = 2
+DECODE_BIT = 3
+DECODE_CHECK = 4
+DECODE_TRAILER = 5
+
+decode_dtype = np.dtype([('device', np.int32),
+                         ('function', np.int32),
+                         ('toggle', np.int8),
+                         ('mode', np.int8),
+                         ('error', np.int8)])
+
+
+def frames_to_matrix(frames):
+    """Create a zero padded (N, width) float matrix from frames."""
+    if isinstance(frames, np.ndarray) and frames.ndim == 2:
+        matrix = frames.astype(np.float64)
+    else:
+        frames = [np.asarray(frame, dtype=np.float64).ravel() for frame in frames]
+        width = max((len(frame) for frame in frames), default=0)
+        matrix = np.zeros((len(frames), width), dtype=np.float64)
+        for row, frame in enumerate(frames):
+            matrix[row, :len(frame)] = frame
+    return np.nan_to_num(matrix, nan=0.0)
+
+
+def simplify_matrix(matrix):
+    """Vectorized raw.simplify applied to each row of a padded matrix."""
+    rows, cols = np.nonzero(matrix)
+    values = matrix[rows, cols]
+    if not len(values):
+        return np.zeros((matrix.shape[0], 0), dtype=np.float64)
+
+    positive = values > 0
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = (rows[1:] != rows[:-1]) | (positive[1:] != positive[:-1])
+    run_index = np.flatnonzero(starts)
+    run_values = np.add.reduceat(values, run_index)
+    run_rows = rows[run_index]
+
+    # drop leading negative run of each row
+    first = np.ones(len(run_rows), dtype=bool)
+    first[1:] = run_rows[1:] != run_rows[:-1]
+    keep = ~(first & (run_values < 0))
+    run_values = run_values[keep]
+    run_rows = run_rows[keep]
+
+    counts = np.bincount(run_rows, minlength=matrix.shape[0])
+    offsets = np.cumsum(counts) - counts
+    position = np.arange(len(run_rows)) - offsets[run_rows]
+    result = np.zeros((matrix.shape[0], counts.max(initial=0)), dtype=np.float64)
+    result[run_rows, position] = run_values
+    return result
+
+
+def bitstream_matrix(matrix, logical_bit):
+    """Vectorized gen_bitstream_from_raw, returning padded bits and row lengths."""
+    counts = np.abs(np.round(matrix / logical_bit)).astype(np.int64)
+    signs = np.where(matrix > 0, 1, -1).astype(np.int8)
+    lengths = counts.sum(axis=1)
+    flat = np.repeat(signs.ravel(), counts.ravel())
+    rows = np.repeat(np.arange(matrix.shape[0]), lengths)
+    position = np.arange(len(flat)) - (np.cumsum(lengths) - lengths)[rows]
+    result = np.zeros((matrix.shape[0], lengths.max(initial=0)), dtype=np.int8)
+    result[rows, position] = flat
+    return result, lengths
+
+
+def _gather(matrix, lengths, start, count):
+    """Gather count columns per row starting at start, with validity mask."""
+    index = start[:, None] + np.arange(count)
+    valid = index < lengths[:, None]
+    if matrix.shape[1] == 0:
+        return np.zeros(index.shape, dtype=matrix.dtype), valid
+    values = np.take_along_axis(matrix, np.minimum(index, matrix.shape[1] - 1), axis=1)
+    return np.where(valid, values, 0), valid
+
+
+def _biphase(values, one):
+    """Decode bi-phase pairs, one being the first half of a set bit."""
+    x1 = values[:, 0::2]
+    x2 = values[:, 1::2]
+    bits = (x1 == one) & (x2 == -one)
+    valid = bits | ((x1 == -one) & (x2 == one))
+    return bits, valid.all(axis=1)
+
+
+def _value_from_bits(bits, lsb_first=False):
+    width = bits.shape[1]
+    shifts = np.arange(width, dtype=np.int64)
+    if not lsb_first:
+        shifts = shifts[::-1]
+    return (bits.astype(np.int64) << shifts).sum(axis=1)
+
+
+def _set_error(result, mask, error):
+    result['error'][mask & (result['error'] == DECODE_OK)] = error
+
+
+def _decoded(result, device, function):
+    """Set device and function of a result, zero on rows with errors."""
+    ok = result['error'] == DECODE_OK
+    result['device'] = np.where(ok, device, 0)
+    result['function'] = np.where(ok, function, 0)
+
+
+def dec_raw_nec_batch(protocol, frames):
+    """Decode a batch of nec frames into a structured array."""
+    protocol_base, protocol_suffix = (protocol.split('-') + [None])[:2]
+    matrix = simplify_matrix(frames_to_matrix(frames))
+    count = matrix.shape[0]
+    if matrix.shape[1] < 67:
+        matrix = np.hstack([matrix, np.zeros((count, 67 - matrix.shape[1]))])
+    result = np.zeros(count, dtype=decode_dtype)
+
+    leading = 16 if protocol_base in ('nec1', 'necx1') else 8
+    logical_bit = matrix[:, 0] / leading
+    _set_error(result, np.abs((logical_bit - 562.5) / 562.5) >= 0.2, DECODE_LEADING)
+    logical_bit = np.where(logical_bit > 0, logical_bit, 562.5)
+
+    units = np.round(matrix / logical_bit[:, None]).astype(np.int64)
+    space = units[:, 1]
+    repeat = space == -4
+    _set_error(result, (space != -8) & ~repeat, DECODE_LEADING)
+
+    # Repeat
+    _set_error(result, repeat & (units[:, 2] == 0), DECODE_TRUNCATED)
+    _set_error(result, repeat & (units[:, 2] != 1), DECODE_BIT)
+    result['toggle'][repeat] = 1
+
+    # Normal data
+    data = ~repeat
+    bursts = units[:, 2:66:2]
+    spaces = units[:, 3:67:2]
+    _set_error(result, data & (bursts == 0).any(axis=1), DECODE_TRUNCATED)
+    _set_error(result, data & ((bursts != 1) |
+                               ((spaces != -1) & (spaces != -3))).any(axis=1), DECODE_BIT)
+
+    value = _value_from_bits(spaces == -3, lsb_first=True)
+    device = value & 0xFF
+    device_2 = (value >> 8) & 0xFF
+    function = (value >> 16) & 0xFF
+    function_2 = (value >> 24) & 0xFF
+
+    if protocol_base.startswith("necx"):
+        device |= device_2 << 8
+    else:
+        _set_error(result, data & (device_2 != device ^ 0xFF), DECODE_CHECK)
+
+    if protocol_suffix == 'f16':
+        function |= function_2 << 8
+    else:
+        invert = {'y1': 0x7F, 'y2': 0xFE, 'y3': 0x7E}.get(protocol_suffix, 0xFF)
+        _set_error(result, data & (function ^ invert != function_2), DECODE_CHECK)
+
+    result['device'] = np.where(data, device, 0)
+    result['function'] = np.where(data, function, 0)
+    return result
+
+
+def dec_raw_rc5_batch(frames):
+    """Decode a batch of rc5 frames into a structured array."""
+    bits, lengths = bitstream_matrix(frames_to_matrix(frames), 889.0)
+    count = bits.shape[0]
+    result = np.zeros(count, dtype=decode_dtype)
+    if bits.shape[1] == 0:
+        result['error'] = DECODE_TRUNCATED
+        return result
+
+    start = np.argmax(bits == 1, axis=1)
+    _set_error(result, ~(bits == 1).any(axis=1), DECODE_TRUNCATED)
+
+    values, valid = _gather(bits, lengths, start + 1, 26)
+    _set_error(result, ~valid.all(axis=1), DECODE_TRUNCATED)
+    data, ok = _biphase(values, -1)
+    _set_error(result, ~ok, DECODE_BIT)
+
+    trailer, valid = _gather(bits, lengths, start + 27, 100)
+    _set_error(result, (valid & (trailer != -1)).any(axis=1), DECODE_TRAILER)
+
+    command = _value_from_bits(data[:, 7:13])
+    _decoded(result, _value_from_bits(data[:, 2:7]), np.where(data[:, 0], command, command + 64))
+    result['toggle'] = data[:, 1]
+    return result
+
+
+def dec_raw_rc6_batch(frames):
+    """Decode a batch of rc6 frames into a structured array."""
+    bits, lengths = bitstream_matrix(frames_to_matrix(frames), 444.0)
+    count = bits.shape[0]
+    result = np.zeros(count, dtype=decode_dtype)
+    if bits.shape[1] == 0:
+        result['error'] = DECODE_TRUNCATED
+        return result
+
+    start = np.argmax(bits == 1, axis=1)
+    values, valid = _gather(bits, lengths, start, 52)
+    _set_error(result, ~valid.all(axis=1), DECODE_TRUNCATED)
+
+    leading = np.array([1] * 6 + [-1] * 2)
+    _set_error(result, (values[:, 0:8] != leading).any(axis=1), DECODE_LEADING)
+
+    header, ok = _biphase(values[:, 8:16], 1)
+    _set_error(result, ~ok | ~header[:, 0], DECODE_BIT)
+
+    toggle = values[:, 16:20]
+    toggle_set = (toggle == [1, 1, -1, -1]).all(axis=1)
+    toggle_clear = (toggle == [-1, -1, 1, 1]).all(axis=1)
+    _set_error(result, ~(toggle_set | toggle_clear), DECODE_BIT)
+
+    data, ok = _biphase(values[:, 20:52], 1)
+    _set_error(result, ~ok, DECODE_BIT)
+
+    trailer, valid = _gather(bits, lengths, start + 52, 6)
+    _set_error(result, (valid & (trailer != -1)).any(axis=1), DECODE_TRAILER)
+
+    result['mode'] = _value_from_bits(header[:, 1:4])
+    result['toggle'] = toggle_set
+    _decoded(result, _value_from_bits(data[:, 0:8]), _value_from_bits(data[:, 8:16]))
+    return result
+
+
+dec_raw_batch_protocols = [
+    *gen_raw_nec_protocols,
+    *gen_raw_rc5_protocols,
+    *gen_raw_rc6_protocols,
+]
+
+
+def dec_raw_batch(protocol, frames):
+    """Decode a padded matrix or list of frames for any decodable protocol.
+
+    Returns a structured array with fields device, function, toggle, mode
+    and error, where error is one of the DECODE_* codes.
+    """
+    protocol = protocol.lower()
+    if protocol in gen_raw_nec_protocols:
+        return dec_raw_nec_batch(protocol, frames)
+    if protocol in gen_raw_rc5_protocols:
+        return dec_raw_rc5_batch(frames)
+    if protocol in gen_raw_rc6_protocols:
+        return dec_raw_rc6_batch(frames)
+    raise IrgenInputError(f"Unsupported protocol {protocol}")
@@ -0,0 +1,31 @@
+from irgen import batch
+import pytest
+
+
+def test_rows_from_csv():
+    lines = ["input,output,data,repeats", "nec1,,16 0,", "rc5,raw,16 3,2"]
+    assert list(batch.gen_rows_from_csv(lines)) == [
+        {'input': 'nec1', 'data': ['16', '0']},
+        {'input': 'rc5', 'output': 'raw', 'data': ['16', '3'], 'repeats': '2'},
+    ]
+
+
+def test_rows_from_jsonl():
+    lines = ['{"input": "nec1", "data": "16 0"}', '', '{"input": "rc5", "data": [16, 3]}']
+    assert list(batch.gen_rows_from_jsonl(lines)) == [
+        {'input': 'nec1', 'data': ['16', '0']},
+        {'input': 'rc5', 'data': [16, 3]},
+    ]
+
+
+def test_convert_row_error():
+    result = batch.convert_row({'input': 'nec1', 'data': [256, 0]}, output='raw')
+    assert len(result) == 1
+    assert result[0][0] is False
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_in_order(workers):
+    rows = [{'input': 'rc5', 'data': [device, 3]} for device in range(20)]
+    results = list(batch.gen_batch(rows, output='rc5', workers=workers, chunksize=3))
+    assert results == [[(True, str((device, 3, 0)))] for device in range(20)]
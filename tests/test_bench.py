@@ -0,0 +1,24 @@
+import json
+from irgen import bench
+
+
+def test_bench_run():
+    results = bench.run(count=4, repeat=1, select=['rc5', 'convert/'])
+    names = [result['name'] for result in results]
+    assert 'encode/rc5' in names
+    assert 'decode/rc5' in names
+    assert 'convert/broadlink_base64_to_raw' in names
+    assert all(result['codes'] == 4 for result in results)
+
+
+def test_bench_devices_corpus():
+    codes = list(bench.gen_broadlink_from_devices(bench.default_devices_path()))
+    assert codes
+    assert all(code.startswith(b"Jg") for code in codes)
+
+
+def test_bench_main_output(tmp_path):
+    output = tmp_path / "bench.json"
+    bench.main(['-n', '2', '-r', '1', '-k', 'encode/rc6', '-o', str(output)])
+    report = json.loads(output.read_text())
+    assert [result['name'] for result in report['results']] == ['encode/rc6']
@@ -0,0 +1,71 @@
+import irgen
+from irgen import bits
+import pytest
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("width", [1, 3, 4, 5, 6, 8, 12, 16])
+def test_bits_match_strings(width):
+    for value in range(0, 1 << width, max(1, (1 << width) // 97)):
+        string = irgen.uX_to_bin(value, width)
+        assert list(bits.gen_bits(value, width)) == [int(x) for x in string]
+        assert list(bits.gen_bits(value, width, lsb=True)) == [int(x) for x in reversed(string)]
+        assert bits.from_bits(bits.gen_bits(value, width)) == irgen.bin_to_uX(string)
+        assert bits.from_bits(bits.gen_bits(value, width, lsb=True), lsb=True) == value
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_negative_matches_strings():
+    assert list(bits.gen_bits(-3 & bits.mask(8), 8)) == [int(x) for x in irgen.uX_to_bin(-3, 8)]
+
+
+@pytest.mark.parametrize("value, width, expected", [
+    (0b1, 1, 0b1),
+    (0b10110, 5, 0b01101),
+    (0x0F0, 12, 0x0F0),
+    (0x123, 12, 0xC48),
+])
+def test_reverse(value, width, expected):
+    assert bits.reverse(value, width) == expected
+
+
+def test_split_chunks():
+    assert bits.split_chunks(12, lsb=True) == [(0, 8), (8, 4)]
+    assert bits.split_chunks(12) == [(8, 4), (0, 8)]
+    assert bits.split_chunks(5) == [(0, 5)]
+
+
+def test_deprecated_string_helpers():
+    with pytest.deprecated_call():
+        assert irgen.uX_to_bin(5, 4) == '0101'
+    with pytest.deprecated_call():
+        assert irgen.bin_to_uX('0101') == 5
+
+
+@pytest.mark.parametrize("lsb", [False, True])
+def test_pattern_table_matches_bits(lsb):
+    table = bits.pattern_table((1, -1), (1, -3), lsb, 8)
+    for value in (0, 1, 0x5A, 0xFF):
+        expected = []
+        for bit in (range(8) if lsb else range(7, -1, -1)):
+            expected.extend((1, -3) if value >> bit & 1 else (1, -1))
+        assert list(table[value]) == expected
+
+
+def test_pattern_table_unit():
+    table = bits.pattern_table((1, -1), (1, -3), True, 4, 562.5)
+    assert len(table) == 16
+    assert table[0b0001] == (562.5, -1687.5, *(562.5, -562.5) * 3)
+
+
+def test_pattern_table_chunks_cover_field():
+    zero, one = (1, -1), (1, -3)
+    for lsb in (False, True):
+        for value in (0, 1, 0x5A, 0x3C5, 0xFFF):
+            durations = []
+            for shift, width in bits.split_chunks(12, lsb):
+                durations.extend(bits.pattern_table(zero, one, lsb, width)[(value >> shift) & bits.mask(width)])
+            expected = []
+            for bit in bits.gen_bits(value, 12, lsb):
+                expected.extend(one if bit else zero)
+            assert durations == expected
@@ -0,0 +1,127 @@
+import sqlite3
+import irgen
+from irgen import cache, convert, raw
+from irgen.cache import EncodeCache
+import pytest
+
+
+def test_cache_matches_generator():
+    cache = EncodeCache()
+    expected = tuple(raw.paired(raw.simplify(irgen.gen_raw_general('nec1', 1, 4))))
+    assert cache.get('NEC1', '0x01', 4) == expected
+    assert cache.get('nec1', 1, '4') is cache.get('nec1', 1, 4)
+    assert cache.info().hits == 2
+    assert cache.info().misses == 1
+
+
+def test_cache_toggle_mode_in_key():
+    cache = EncodeCache()
+    assert cache.get('rc6', 5, 66, toggle=0) != cache.get('rc6', 5, 66, toggle=1)
+    assert len(cache) == 2
+
+
+def test_cache_subdevice_in_key():
+    cache = EncodeCache()
+    expected = tuple(raw.paired(raw.simplify(irgen.gen_raw_general('sirc20', 1, 2, subdevice=3))))
+    assert cache.get('sirc20', 1, 2, subdevice=3) == expected
+    assert cache.get('sirc20', 1, 2) != expected
+    assert len(cache) == 2
+
+
+def test_cache_eviction():
+    cache = EncodeCache(maxsize=2)
+    cache.get('rc5', 1, 1)
+    cache.get('rc5', 1, 2)
+    cache.get('rc5', 1, 1)
+    cache.get('rc5', 1, 3)
+    assert ('rc5', 1, 1) in cache
+    assert ('rc5', 1, 2) not in cache
+    assert cache.info().evictions == 1
+
+
+def test_cache_invalidate():
+    cache = EncodeCache()
+    cache.get('rc5', 1, 1)
+    cache.get('rc5', 2, 1)
+    cache.get('nec1', 1, 1)
+    assert cache.invalidate(protocol='rc5', device=1) == 1
+    assert cache.invalidate(protocol='rc5') == 1
+    assert len(cache) == 1
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 1024, 0)
+
+
+def test_cache_invalid_size():
+    with pytest.raises(ValueError):
+        EncodeCache(maxsize=0)
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    store = cache.enable_disk_cache(str(tmp_path / "conversions.sqlite"))
+    yield store
+    cache.disable_disk_cache()
+
+
+def test_disk_cache_get_put(tmp_path):
+    store = cache.DiskCache(str(tmp_path / "conversions.sqlite"))
+    key = cache.disk_key('broadlink_base64', b'Jg', 'raw')
+    assert store.get(key) is None
+    store.put(key, [1.0, -2.0])
+    assert store.get(key) == [1.0, -2.0]
+    assert store.info().hits == 1
+    store.close()
+
+    # persists across instances
+    assert cache.DiskCache(store.path).get(key) == [1.0, -2.0]
+
+
+def test_disk_key_code_version(tmp_path, monkeypatch):
+    key = cache.disk_key('nec1', ['16', '0'], 'raw')
+    monkeypatch.setattr(cache, 'code_version', lambda: 'other')
+    assert cache.disk_key('nec1', ['16', '0'], 'raw') != key
+
+
+def test_disk_key_options():
+    assert cache.disk_key('nec1', ['16', '0'], 'raw') != cache.disk_key('nec1', ['16', '0'], 'pronto')
+    assert cache.disk_key('nec1', ['16', '0'], 'raw', (1,)) != cache.disk_key('nec1', ['16', '0'], 'raw', (2,))
+
+
+def test_disk_cache_eviction(tmp_path):
+    store = cache.DiskCache(str(tmp_path / "conversions.sqlite"), max_size=1000)
+    for index in range(50):
+        store.put(cache.disk_key('raw', [index], 'raw'), "x" * 80)
+    info = store.info()
+    assert info.evictions > 0
+    assert info.currsize <= 1000
+    assert store.get(cache.disk_key('raw', [49], 'raw')) == "x" * 80
+    assert store.get(cache.disk_key('raw', [0], 'raw')) is None
+
+
+def test_disk_cache_convert(disk_cache):
+    expected = list(convert.convert('nec1', 'pronto', ['16', '0']))
+    misses = disk_cache.info().misses
+    assert list(convert.convert('nec1', 'pronto', ['16', '0'])) == expected
+    assert disk_cache.info().hits == 1
+    assert disk_cache.info().misses == misses
+
+    # only the conversion as a whole is stored
+    with sqlite3.connect(disk_cache.path) as db:
+        assert db.execute("SELECT COUNT(*) FROM conversions").fetchone()[0] == 1
+
+    # failed conversions are not stored
+    with pytest.raises(irgen.IrgenInputError):
+        list(convert.convert('nec1', 'pronto', ['256', '0']))
+
+
+def test_disk_cache_library_converters(disk_cache):
+    data = irgen.gen_broadlink_base64_from_raw(irgen.gen_raw_general('nec1', 16, 0))
+    expected = list(irgen.gen_raw_from_broadlink_base64(data))
+    assert list(irgen.gen_raw_from_broadlink_base64(data)) == expected
+
+    signal = irgen.gen_signal_general('rc5', 1, 2)
+    expected = list(irgen.gen_pronto_from_raw([], signal))
+    assert list(irgen.gen_pronto_from_raw([], signal)) == expected
+    assert disk_cache.info().hits == 2
+    cache.disable_disk_cache()
+    assert list(irgen.gen_pronto_from_raw([], signal)) == expected
@@ -0,0 +1,57 @@
+import irgen
+from irgen import convert, stream
+import pytest
+
+np = pytest.importorskip("numpy")
+from irgen import capture, pcm  # noqa: E402
+
+
+def test_runs_from_samples():
+    samples = np.array([0, 0, 1, 1, 1, 0, 0, 1, 0, 0, 0], dtype='u1')
+    assert list(capture.gen_raw_from_samples(samples, 1e6, gap=1.0)) == [3.0, -2.0, 1.0, -3.0]
+
+
+def test_blocks_match_single_block():
+    data = list(irgen.gen_raw_general('rc6', 5, 66)) * 2
+    samples = np.frombuffer(b"".join(pcm.gen_pcm_chunks(data, carrier=36000, rate=192000)), '<i2')
+    whole = list(capture.gen_raw_from_samples(samples, 192000, level=1000))
+    blocks = list(capture.gen_raw_from_samples(samples, 192000, level=1000, blocksize=777))
+    assert blocks == whole
+
+
+@pytest.mark.parametrize("protocol, device, function, expected", [
+    ('nec1', 16, 4, (16, 4, 0)),
+    ('rc5', 16, 3, (16, 3, 0)),
+    ('rc6', 5, 66, (5, 66, 0, 0)),
+])
+def test_wav_roundtrip(tmp_path, protocol, device, function, expected):
+    path = str(tmp_path / "capture.wav")
+    with open(path, "wb") as file:
+        pcm.write_wav(file, irgen.gen_raw_repeated(protocol, device, function, repeats=3),
+                      carrier=38000, rate=96000, channels=2)
+    data = list(capture.gen_raw_from_wav(path, channel=1, blocksize=4096))
+    frames = list(stream.gen_decoded_from_raw(data, protocol))
+    assert frames[0] == expected
+    assert len(frames) == 3
+
+
+def test_sample_dump_bit(tmp_path):
+    # logic analyzer on an active low receiver output, bit 3 of each sample
+    rate = 100000
+    data = list(irgen.gen_raw_general('rc5', 7, 12)) * 2
+    levels = np.concatenate([np.full(round(abs(x) * rate / 1e6), x < 0, dtype=bool) for x in data])
+    samples = np.where(levels, 0x08, 0x00).astype('u1') | 0x41
+    path = str(tmp_path / "capture.bin")
+    samples.tofile(path)
+
+    data = list(capture.gen_raw_from_sample_dump(path, rate, bit=3, invert=True))
+    assert list(stream.gen_decoded_from_raw(data, 'rc5')) == [(7, 12, 0)] * 2
+    assert list(convert.convert('samples', 'rc5', [path, str(rate), '3', 'low'])) == [
+        (True, '(7, 12, 0)')] * 2
+
+
+def test_convert_wav(tmp_path):
+    path = str(tmp_path / "capture.wav")
+    with open(path, "wb") as file:
+        pcm.write_wav(file, irgen.gen_raw_general('nec1', 1, 2))
+    assert list(convert.convert('wav', 'nec1', [path])) == [(True, '(1, 2, 0)')]
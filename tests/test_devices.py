@@ -0,0 +1,85 @@
+import json
+import os
+import irgen
+from irgen import convert, devices
+from irgen.exceptions import IrgenInputError
+import pytest
+
+markdown = """Test - RC5 Format
+=================
+
+| Remote | Address |
+| ------ | ------- |
+| A      | 10h     |
+| B      | 0x11    |
+
+| Command | Hex |
+| ------- | --- |
+| POWER   | 0Ch |
+| MUTE    | 0Dh |
+"""
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / "devices"
+    directory.mkdir()
+    (directory / "TEST - IRCODES.txt").write_text(markdown)
+    code = irgen.gen_broadlink_base64_from_raw(irgen.gen_raw_general('nec1', 4, 8)).decode()
+    (directory / "OTHER - IRCODES.txt").write_text('"power": "{}",\n'.format(code))
+    return devices.Library(str(tmp_path / "devices.json"), str(directory))
+
+
+def test_parse_markdown():
+    result = list(devices.parse_markdown("TEST", markdown))
+    assert [device.name for device in result] == ["TEST A", "TEST B"]
+    assert result[1].protocol == 'rc5'
+    assert [(command.name, command.params) for command in result[1].commands] == [
+        ('POWER', ('rc5', 0x11, 0x0C)), ('MUTE', ('rc5', 0x11, 0x0D))]
+
+
+def test_default_directory_package_data():
+    directory = devices.default_directory()
+    assert os.path.commonpath([directory, os.path.dirname(devices.__file__)]) == \
+        os.path.dirname(devices.__file__)
+    assert devices.gen_device_files(directory)
+
+
+def test_parse_devices_directory():
+    result = {device.name: device for path in devices.gen_device_files(devices.default_directory())
+              for device in devices.parse_device_file(path)}
+    assert result['SMSL A'].protocol == 'necx1'
+    assert result['SMSL A'].commands[0].params == ('necx1', 0x3412, 1)
+    assert result['LOXJIE'].commands[0].params == ('necx1', 0x2222, 1)
+
+
+def test_library_lookup(library):
+    assert library.devices() == ["OTHER", "TEST A", "TEST B"]
+    assert library.commands("test b") == ["POWER", "MUTE"]
+    compiled = library.lookup("TEST A", "power")
+    assert compiled['formats']['broadlink_base64'] == irgen.gen_broadlink_base64_from_raw(
+        irgen.gen_raw_general('rc5', 0x10, 0x0C)).decode()
+    assert library.lookup("OTHER", "power")['params'] == ['nec1', 4, 8]
+    with pytest.raises(IrgenInputError):
+        library.lookup("TEST A", "nosuch")
+
+
+def test_library_stored_and_rebuilt(library, tmp_path):
+    library.devices()
+    with open(library.path) as file:
+        assert "TEST A" in json.load(file)['devices']
+
+    assert devices.Library(library.path, library.directory).data == library.data
+
+    path = tmp_path / "devices" / "TEST - IRCODES.txt"
+    path.write_text(markdown.replace("| B      | 0x11    |\n", ""))
+    os.utime(path, (1, 1))
+    assert devices.Library(library.path, library.directory).devices() == ["OTHER", "TEST A"]
+
+
+def test_convert_device(library, monkeypatch):
+    monkeypatch.setattr(devices, "default_path", lambda: library.path)
+    monkeypatch.setattr(devices, "default_directory", lambda: library.directory)
+    assert list(convert.convert('device', 'rc5', ['TEST A', 'MUTE'])) == [(True, '(16, 13, 0)')]
+    assert [text for _, text in convert.convert('device', 'pronto', ['TEST B'])] == [
+        library.lookup('TEST B', command)['formats']['pronto'] for command in ('POWER', 'MUTE')]
@@ -0,0 +1,96 @@
+from array import array
+import irgen
+from irgen import encode
+import pytest
+
+
+@pytest.mark.parametrize("protocol, device, function, kwargs", [
+    ('nec1', 16, 0x45, {}),
+    ('necx1-f16', 0x1234, 0xABCD, {}),
+    ('rc5', 5, 35, {'toggle': 1}),
+    ('rc6', 0, 12, {'toggle': 1, 'mode': 0}),
+    ('rca38', 15, 0x80, {}),
+    ('sirc20', 3, 7, {'subdevice': 9}),
+    ('samsung32', 7, 2, {}),
+    ('jvc', 3, 23, {}),
+])
+def test_encode_into_matches_generator(protocol, device, function, kwargs):
+    expected = list(irgen.gen_raw_general(protocol, device, function, **kwargs))
+    out = array('d', bytes(8 * 200))
+    count = encode.encode_into(protocol, device, function, out, **kwargs)
+    assert list(out[:count]) == expected
+
+    # encoders are reused, a second call overwrites in place
+    count = encode.encode_into(protocol, device, function, out, offset=10, **kwargs)
+    assert list(out[10:10 + count]) == expected
+
+
+def test_encode_into_numpy():
+    np = pytest.importorskip("numpy")
+    out = np.zeros(100)
+    count = encode.encode_into('nec1', 16, 0, out)
+    assert out[:count].tolist() == list(irgen.gen_raw_general('nec1', 16, 0))
+
+
+def test_encode_into_errors():
+    with pytest.raises(irgen.IrgenInputError):
+        encode.encode_into('nec1', 16, 0, array('d', bytes(8 * 10)))
+    with pytest.raises(irgen.IrgenInputError):
+        encode.encode_into('nec1', 16, 0, array('i', bytes(4 * 100)))
+    with pytest.raises(irgen.IrgenInputError):
+        encode.encode_into('nec1', 256, 0, array('d', bytes(8 * 100)))
+
+
+def test_get_encoder_per_thread():
+    from concurrent.futures import ThreadPoolExecutor
+    encoder = encode.get_encoder('rc5')
+    assert encode.get_encoder('rc5') is encoder
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(encode.get_encoder, 'rc5').result() is not encoder
+
+
+@pytest.mark.parametrize("protocol, device, function", [
+    ('nec1', 16, 0x45),
+    ('rc5', 5, 35),
+    ('rc6', 0, 12),
+])
+def test_broadlink_into(protocol, device, function):
+    data = list(irgen.gen_raw_general(protocol, device, function))
+    out = bytearray(b'\xff' * encode.broadlink_size(len(data)))
+    length = encode.broadlink_into(out, data)
+    assert bytes(out[:length]) == bytes(irgen.gen_broadlink_bytes_from_raw(data))
+
+    out = bytearray(256)
+    length = encode.get_encoder(protocol).broadlink_into(memoryview(out), device, function)
+    assert bytes(out[:length]) == bytes(irgen.gen_broadlink_bytes_from_raw(data))
+
+
+@pytest.mark.parametrize("data", [
+    list(irgen.gen_raw_general('nec1', 16, 0x45)),
+    [9000.0, -4500.0, 562.5, -562.5, 562.5],
+])
+def test_pronto_into_matches_generator(data):
+    out = bytearray(encode.pronto_size(len(data)))
+    length = encode.pronto_into(out, data)
+    assert out[:length].decode() == " ".join(irgen.gen_pronto_from_raw([], data, base=0x73))
+    out = bytearray(encode.broadlink_size(len(data)))
+    length = encode.broadlink_into(out, data)
+    assert bytes(out[:length]) == bytes(irgen.gen_broadlink_bytes_from_raw(data))
+
+
+def test_pronto_into():
+    data = list(irgen.gen_raw_general('nec1', 16, 0x45))
+    out = bytearray(encode.pronto_size(len(data)))
+    length = encode.pronto_into(out, data)
+    assert out[:length].decode() == " ".join(irgen.gen_pronto_from_raw([], data, base=0x73))
+
+    length = encode.get_encoder('nec1').pronto_into(out, 16, 0x45)
+    assert out[:length].decode() == " ".join(irgen.gen_pronto_from_raw([], data, base=0x73))
+
+
+def test_into_buffer_too_small():
+    data = list(irgen.gen_raw_general('nec1', 16, 0))
+    with pytest.raises(irgen.IrgenInputError):
+        encode.broadlink_into(bytearray(10), data)
+    with pytest.raises(irgen.IrgenInputError):
+        encode.pronto_into(bytearray(10), data)
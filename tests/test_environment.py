@@ -0,0 +1,13 @@
+import os
+from irgen import cache, devices, environment, irdb
+
+
+def test_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert environment.cache_dir() == os.path.join(str(tmp_path), "irgen")
+    for path in (cache.default_disk_path(), devices.default_path(), irdb.default_path()):
+        assert os.path.dirname(path) == environment.cache_dir()
+
+
+def test_version():
+    assert environment.version() in cache.code_version()
@@ -0,0 +1,67 @@
+import io
+import json
+import irgen
+from irgen import convert, export
+import pytest
+
+table = """functionname,protocol,device,subdevice,function
+Power,NEC1,16,-1,12
+Vol+,NEC1,16,-1,13
+Vol-,RC5,5,,14
+Power,NEC1,16,-1,12
+Unknown,FOO,1,-1,1
+"""
+
+
+@pytest.fixture
+def codes(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text(table)
+    return list(convert.gen_codes('table', [str(path)]))
+
+
+def test_hass_entityname():
+    assert export.gen_hass_entityname("Vol +") == "vol_plus"
+    assert export.gen_hass_entityname("Ch:-") == "ch_minus"
+
+
+def test_codes_from_table(codes):
+    assert [code['params'] for code in codes] == [
+        ('nec1', 16, 12), ('nec1', 16, 13), ('rc5', 5, 14), ('nec1', 16, 12)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_smartir(codes, workers):
+    file = io.StringIO()
+    count = export.write_export(file, codes, name="Test", workers=workers, chunksize=1)
+    assert count == 4
+
+    data = json.loads(file.getvalue())
+    assert data['supportedController'] == 'Broadlink'
+    assert data['commandsEncoding'] == 'Base64'
+    assert list(data['commands']) == ['power', 'vol_plus', 'vol_minus', 'power_2']
+    expected = irgen.gen_broadlink_base64_from_raw(irgen.gen_raw_general('nec1', 16, 13)).decode()
+    assert data['commands']['vol_plus'] == expected
+
+
+def test_export_hass_raw(codes):
+    file = io.StringIO()
+    export.write_export(file, codes, encoding='raw', layout='hass', name="Living Room", workers=1)
+
+    data = json.loads(file.getvalue())
+    assert data['key'] == 'broadlink_remote_living_room_codes'
+    commands = data['data']['living_room']
+    assert commands['power'][:2] == [9000, -4500]
+
+
+def test_export_empty():
+    file = io.StringIO()
+    assert export.write_export(file, [], encoding='pronto', workers=1) == 0
+    assert json.loads(file.getvalue())['commands'] == {}
+
+
+def test_export_errors(codes):
+    with pytest.raises(irgen.IrgenInputError):
+        export.write_export(io.StringIO(), codes, encoding='broadlink')
+    with pytest.raises(irgen.IrgenInputError):
+        export.write_export(io.StringIO(), codes, layout='other')
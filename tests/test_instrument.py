@@ -0,0 +1,62 @@
+import irgen
+from irgen import instrument
+import pytest
+
+
+@pytest.fixture
+def enabled():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+
+def test_disabled_records_nothing():
+    instrument.reset()
+    list(irgen.gen_raw_general('rc5', 1, 1))
+    assert instrument.report() == {'stages': {}, 'errors': []}
+
+
+def test_stages(enabled):
+    irgen.gen_broadlink_base64_from_raw(irgen.gen_raw_general('rc5', 1, 1))
+    stages = instrument.report()['stages']
+    assert stages['encode.rc5']['calls'] == 1
+    assert stages['raw.simplify']['calls'] == 1
+    assert stages['format.broadlink']['bytes'] == 44
+
+
+def test_errors_by_reason(enabled):
+    for device in (0x10, 0x20):
+        data = list(irgen.gen_raw_nec('necx1', device | 0x3400, 1))
+        with pytest.raises(irgen.IrgenInputError):
+            irgen.dec_raw_nec(iter(data), protocol='nec1')
+    errors = instrument.report()['errors']
+    assert errors == [{'stage': 'decode.nec',
+                       'reason': 'Not expected inverted device data # #',
+                       'count': 2}]
+    assert 'decode.nec' in instrument.format_report()
+
+
+def test_nested_error_counted_once(enabled):
+    with pytest.raises(irgen.IrgenInputError):
+        irgen.dec_raw_nec(iter([9000.0, -4500.0, 562.5, -5000.0]), protocol='nec1')
+    assert instrument.report()['errors'] == [{'stage': 'decode.nec.bytes',
+                                              'reason': 'Bit value unexpected #',
+                                              'count': 1}]
+
+
+@pytest.mark.parametrize("reason, expected", [
+    ("Unexpected 0x1F at -889.5", "Unexpected # at #"),
+    ("Values [1, 2] of BAD code", "Values # of BAD code"),
+    ("Unknown protocol dead1", "Unknown protocol dead1"),
+])
+def test_reason_values_stripped(enabled, reason, expected):
+    instrument.record_error('custom', ValueError(reason))
+    assert instrument.report()['errors'][0]['reason'] == expected
+
+
+def test_timer(enabled):
+    with instrument.timer('custom'):
+        pass
+    assert instrument.report()['stages']['custom']['calls'] == 1
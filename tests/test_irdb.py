@@ -0,0 +1,78 @@
+import irgen
+from irgen import raw
+from irgen.irdb import Irdb, parse_path, resolve_protocol
+from irgen.convert import convert
+from irgen.exceptions import IrgenInputError
+import pytest
+
+
+@pytest.fixture
+def index(tmp_path):
+    device = tmp_path / "irdb" / "codes" / "Yamaha" / "Receiver"
+    device.mkdir(parents=True)
+    (device / "122,-1.csv").write_text(
+        "functionname,protocol,device,subdevice,function\n"
+        "POWER,NEC1,122,-1,29\n"
+        "MUTE,NEC1,122,-1,28\n"
+        "OTHER,Kaseikyo,122,-1,28\n")
+    (device / "18,52.csv").write_text(
+        "functionname,protocol,device,subdevice,function\n"
+        "POWER,NEC1,18,52,1\n")
+    (device / "README.md").write_text("ignored")
+
+    with Irdb(str(tmp_path / "irdb.sqlite")) as db:
+        assert db.import_tree(str(tmp_path / "irdb")) == 4
+        yield db
+
+
+def test_parse_path():
+    assert parse_path("codes/Yamaha/Receiver/122,-1.csv") == ("Yamaha", "Receiver", 122, -1)
+    with pytest.raises(IrgenInputError):
+        parse_path("Yamaha/Receiver.csv")
+
+
+def test_resolve_protocol():
+    assert resolve_protocol("NEC1", 122, -1) == ("nec1", 122, 0)
+    assert resolve_protocol("NEC1", 122, 122 ^ 0xFF) == ("nec1", 122, 0)
+    assert resolve_protocol("NEC1", 0x12, 0x34) == ("necx1", 0x3412, 0)
+    assert resolve_protocol("Sony12", 1, -1) == ("sirc12", 1, 0)
+    assert resolve_protocol("Sony15", 1, 3) == ("sirc15", 1, 0)
+    assert resolve_protocol("Sony20", 1, 3) == ("sirc20", 1, 3)
+    assert resolve_protocol("Kaseikyo", 1, 3) == ("kaseikyo", 1, 0)
+
+
+def test_lookup(index):
+    assert index.manufacturers() == ["Yamaha"]
+    assert index.devices() == [("Yamaha", "Receiver", 18, 52), ("Yamaha", "Receiver", 122, -1)]
+
+    rows = index.lookup_path("Yamaha/Receiver/122,-1.csv")
+    assert [row['functionname'] for row in rows] == ["POWER", "MUTE", "OTHER"]
+    expected = list(raw.paired(raw.simplify(irgen.gen_raw_general('nec1', 122, 29))))
+    assert list(rows[0]['raw']) == expected
+    assert rows[2]['raw'] is None
+
+    rows = index.lookup("Yamaha", "Receiver", 18, 52, functionname="POWER")
+    assert len(rows) == 1
+    assert list(rows[0]['raw']) == list(raw.paired(raw.simplify(irgen.gen_raw_general('necx1', 0x3412, 1))))
+
+
+def test_convert_from_index(index):
+    result = list(convert('irdb', 'nec1', ['POWER'], path="Yamaha/Receiver/122,-1.csv", irdb=index.path))
+    assert result == [(True, "(122, 29, 0)")]
+    with pytest.raises(IrgenInputError):
+        list(convert('irdb', 'nec1', None, path="Yamaha/Receiver/1,-1.csv", irdb=index.path))
+
+
+def test_sirc20_subdevice(tmp_path):
+    device = tmp_path / "irdb" / "codes" / "Sony" / "Receiver"
+    device.mkdir(parents=True)
+    (device / "1,7.csv").write_text(
+        "functionname,protocol,device,subdevice,function\n"
+        "POWER,Sony20,1,7,21\n")
+    with Irdb(str(tmp_path / "irdb.sqlite")) as db:
+        db.import_tree(str(tmp_path / "irdb"))
+        rows = db.lookup_path("Sony/Receiver/1,7.csv")
+        expected = list(raw.paired(raw.simplify(irgen.gen_raw_general('sirc20', 1, 21, subdevice=7))))
+        assert list(rows[0]['raw']) == expected
+        result = list(convert('irdb', 'sirc20', [], path="Sony/Receiver/1,7.csv", irdb=db.path))
+        assert result == [(True, "(1, 21, 7)")]
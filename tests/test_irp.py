@@ -0,0 +1,93 @@
+import irgen
+from irgen import bits, convert, irp, raw
+from irgen.exceptions import IrgenInputError
+import pytest
+
+
+def test_nec_matches_definition():
+    assert list(irgen.gen_raw_nec('nec1', 0x12, 0x34)) == [
+        9000.0, -4500.0,
+        *bits.pattern_table((1, -1), (1, -3), True, 8, 562.5)[0x12],
+        *bits.pattern_table((1, -1), (1, -3), True, 8, 562.5)[0xED],
+        *bits.pattern_table((1, -1), (1, -3), True, 8, 562.5)[0x34],
+        *bits.pattern_table((1, -1), (1, -3), True, 8, 562.5)[0xCB],
+        562.5, -1687.5]
+
+
+def test_nec_device_limit():
+    with pytest.raises(IrgenInputError):
+        list(irgen.gen_raw_nec('nec1', 0x100, 1))
+
+
+@pytest.mark.parametrize("protocol, device, function, subdevice, expected", [
+    ('sirc12', 1, 21, 0, (1, 21)),
+    ('sirc15', 0xA4, 0x7F, 0, (0xA4, 0x7F)),
+    ('sirc20', 0x1A, 0x33, 0x5B, (0x1A, 0x33, 0x5B)),
+    ('samsung32', 0x0707, 2, 0, (0x0707, 2)),
+    ('jvc', 3, 23, 0, (3, 23)),
+    ('rca38', 12, 123, 0, (12, 123)),
+])
+def test_roundtrip(protocol, device, function, subdevice, expected):
+    data = list(irgen.gen_raw_general(protocol, device, function, subdevice=subdevice))
+    assert irgen.dec_raw_irp(iter(data), protocol=protocol) == expected
+
+
+@pytest.mark.parametrize("protocol, period", [
+    ('sirc12', 45000.0),
+    ('samsung32', 108000.0),
+    ('jvc', 59080.0),
+])
+def test_extent(protocol, period):
+    data = list(irgen.gen_raw_general(protocol, 1, 2))
+    assert sum(abs(x) for x in data) == pytest.approx(period)
+    assert data[-1] < 0
+
+
+def _field_widths(definition):
+    widths = {}
+    for kind, item in definition.items:
+        if kind == 'field' and item.name:
+            widths[item.name] = max(widths.get(item.name, 0), item.offset + item.width)
+    return widths
+
+
+@pytest.mark.parametrize("name", sorted(irp.protocols))
+@pytest.mark.parametrize("pattern", [0, 0x5A5A, 0xFFFF])
+def test_definition_roundtrip(name, pattern):
+    definition = irp.protocols[name]
+    params = {param: pattern & bits.mask(width)
+              for param, width in _field_widths(definition).items()}
+    assert definition.decode(definition.encode(**params)) == params
+
+
+def test_decode_rc5_definition():
+    data = list(irgen.gen_raw_general('rc5', 16, 3))
+    assert irp.protocols['rc5'].decode(data) == {'F': 3, 'T': 0, 'D': 16}
+
+
+def test_decode_biphase_definition():
+    data = irgen.gen_raw_rc6(5, 66, 1, 2)
+    assert irp.protocols['rc6'].decode(raw.simplify(data)) == {'M': 2, 'T': 1, 'D': 5, 'F': 66}
+
+
+def test_decode_mismatch():
+    data = list(irgen.gen_raw_general('rca38', 1, 2))
+    # flip a bit of the inverted function
+    data[-4] = -1840.0 if data[-4] == -920.0 else -920.0
+    with pytest.raises(IrgenInputError):
+        irgen.dec_raw_irp(iter(raw.simplify(data)), protocol='rca38')
+
+
+def test_auto_detects_irp():
+    data = irgen.gen_raw_general('sirc12', 1, 21)
+    assert ('sirc12', (1, 21)) in irgen.dec_raw_auto(data)
+
+
+def test_convert_irp():
+    assert list(convert.convert('jvc', 'jvc', ['3', '23'])) == [(True, '(3, 23)')]
+
+
+@pytest.mark.parametrize("protocol", irgen.gen_raw_irp_protocols)
+def test_irp_protocols_listed(protocol):
+    assert protocol in irgen.gen_raw_protocols
+    assert irgen.dec_raw_protocols[protocol] is irgen.dec_raw_irp
@@ -1,5 +1,7 @@
 from base64 import b64decode
+from itertools import islice
 import irgen
+from irgen import convert, stream
 import pytest
 
 
@@ -16,6 +18,25 @@ def test_broadlink_decode_encode(data):
     assert  b64decode(data2).hex() == b64decode(data).hex()
 
 
+def test_broadlink_bulk():
+    data = [
+        b"JgAaAB0dOh0dHR0dHR0dHR0dHR0dOh0dOh0dAA0FAAAAAAAAAAAAAAAAAAA=",
+        b"JgA6AJdPJhwPHCYcJxw+HAACGxwOHA8cDhwPHA8bDxwPGwAHIxw+HFYcJxw+HCYcPxs/HCYcJwAChJ4ADQUAAAAAAAAAAAAAAAAAAA==",
+    ]
+    arrays = irgen.gen_raw_arrays_from_broadlink_base64(data)
+    assert [list(x) for x in arrays] == [list(irgen.gen_raw_from_broadlink_base64(x)) for x in data]
+    assert irgen.gen_broadlink_base64_from_raw_arrays(arrays) == data
+
+
+def test_broadlink_buffer():
+    data = b64decode(b"JgAaAB0dOh0dHR0dHR0dHR0dHR0dOh0dOh0dAA0FAAAAAAAAAAAAAAAAAAA=")
+    raw = irgen.gen_raw_array_from_broadlink(memoryview(data))
+    assert list(raw) == list(irgen.gen_raw_from_broadlink(iter(data)))
+    assert irgen.gen_broadlink_bytes_from_raw(raw) == data
+    with pytest.raises(irgen.IrgenInputError):
+        irgen.gen_raw_array_from_broadlink(data[:3])
+
+
 
 def test_rca38_decode_encode():
     """
@@ -65,3 +86,96 @@ def test_nec_round_about(protocol, device, function):
     data.extend(irgen.gen_raw_nec(protocol, device, function))
     x = iter(data)
     assert irgen.dec_raw_nec(x, protocol=protocol) == (device, function, 0)
+
+
+@pytest.mark.parametrize("protocol, device, function", [
+    ("nec1", 1, 4),
+    ("nec2-y2", 1, 4),
+    ("necx1-f16", 13330, 0x1234),
+])
+def test_auto_nec(protocol, device, function):
+    data = irgen.gen_raw_nec(protocol, device, function)
+    candidates = irgen.dec_raw_auto(data)
+    assert (protocol, (device, function, 0)) in candidates
+    assert all(candidate.startswith(protocol[:3]) for candidate, _ in candidates)
+
+
+def test_auto_nec_repeat():
+    assert irgen.dec_raw_auto([9000, -2250, 562.5]) == [('nec1', (0, 0, 1)), ('necx1', (0, 0, 1))]
+
+
+def test_auto_biphase():
+    assert irgen.dec_raw_auto(irgen.gen_raw_rc5(5, 66, 1)) == [('rc5', (5, 66, 1))]
+    assert irgen.dec_raw_auto(irgen.gen_raw_rc6(5, 66, 1, 2)) == [('rc6', (5, 66, 1, 2))]
+
+
+def test_auto_unknown():
+    with pytest.raises(irgen.IrgenInputError):
+        irgen.dec_raw_auto(irgen.gen_raw_rca38(1, 1))
+
+
+def test_auto_trailing_data():
+    data = list(irgen.gen_raw_rc5(5, 66, 1)) + [396.0, -152.0]
+    assert irgen.dec_raw_auto(data) == [('rc5', (5, 66, 1))]
+
+
+@pytest.mark.parametrize("protocol, device, function, pronto", [
+    ("rc5", 16, 3, "5000 0073 0000 0001 0010 0003"),
+    ("rc6", 5, 66, "6000 0073 0000 0002 0005 0042"),
+    ("nec1", 4, 8, "900a 006d 0000 0001 04fb 08f7"),
+    ("nec1-y1", 4, 8, "900a 006d 0000 0001 04fb 0877"),
+    ("necx1", 0x3412, 8, "900a 006d 0000 0001 1234 08f7"),
+    ("necx1-f16", 0x3412, 0x1234, "900a 006d 0000 0001 1234 3412"),
+])
+def test_pronto_short(protocol, device, function, pronto):
+    assert " ".join(irgen.gen_pronto_short(protocol, device, function)) == pronto
+    data = [int(x, 16) for x in pronto.split()]
+    assert irgen.dec_pronto_short(data) == (protocol, device, function)
+    assert list(irgen.gen_raw_from_pronto(data)) == list(irgen.gen_raw_general(protocol, device, function))
+
+
+def test_pronto_short_unsupported():
+    with pytest.raises(irgen.IrgenInputError):
+        list(irgen.gen_pronto_short("nec2", 1, 1))
+    with pytest.raises(irgen.IrgenInputError):
+        list(irgen.gen_pronto_short("rc6", 1, 1, mode=6))
+    with pytest.raises(irgen.IrgenInputError):
+        irgen.dec_pronto_short([0x5001, 0x73, 0, 2, 1, 1, 1, 0])
+
+
+def test_repeated_nec_ditto():
+    data = list(irgen.gen_raw_repeated('nec1', 16, 0, repeats=3))
+    assert sum(abs(x) for x in data) == pytest.approx(3 * 108000.0)
+    frames = list(stream.gen_decoded_from_raw(data, 'nec1'))
+    assert frames == [(16, 0, 0), (0, 0, 1), (0, 0, 1)]
+
+
+@pytest.mark.parametrize("protocol, period, expected", [
+    ('rc5', 128 * 889.0, (16, 3, 1)),
+    ('rc6', 107000.0, (16, 3, 1, 0)),
+])
+def test_repeated_toggle_kept(protocol, period, expected):
+    data = list(irgen.gen_raw_repeated(protocol, 16, 3, repeats=4, toggle=1))
+    assert sum(abs(x) for x in data) == pytest.approx(4 * period)
+    assert list(stream.gen_decoded_from_raw(data, protocol)) == [expected] * 4
+
+
+def test_repeated_lazy():
+    data = irgen.gen_raw_repeated('nec1', 16, 0, repeats=10**9)
+    assert len(list(islice(data, 1000))) == 1000
+
+
+def test_convert_repeats_protocol():
+    result = list(convert.convert('nec1', 'nec1', ['16', '0'], repeats=2))
+    assert result == [(True, '(16, 0, 0)'), (True, '(0, 0, 1)')]
+
+
+def test_code_repeated_lazy():
+    code = next(convert.gen_codes('rc5', ['16', '3']))
+    repeated = convert.gen_code_repeated(code, 10**9)
+    assert repeated['frequency'] == 36000
+    assert len(list(islice(repeated['raw'], 100))) == 100
+
+    frame = list(irgen.gen_raw_general('rc5', 16, 3))
+    repeated = convert.gen_code_repeated({'functionname': 'raw', 'raw': iter(frame)}, 3)
+    assert list(repeated['raw']) == frame * 3
@@ -0,0 +1,91 @@
+import io
+import wave
+import irgen
+from irgen.exceptions import IrgenInputError
+import pytest
+
+np = pytest.importorskip("numpy")
+from irgen import pcm  # noqa: E402
+
+
+def samples(chunks, channels=1):
+    data = np.frombuffer(b"".join(chunks), dtype='<i2')
+    return data.reshape(-1, channels) if channels > 1 else data
+
+
+def test_carrier_cycles():
+    data = samples(pcm.gen_pcm_chunks([1000.0, -1000.0], carrier=38000, rate=1000000, duty=0.5))
+    assert len(data) == 2000
+    assert not data[1000:].any()
+    rising = np.count_nonzero((data[1:1000] > 0) & (data[:999] == 0))
+    assert rising == 37
+    assert np.count_nonzero(data[:1000]) == pytest.approx(500, abs=20)
+
+
+def test_chunks_match_single_buffer():
+    raw = list(irgen.gen_raw_general('rc5', 16, 3)) * 3
+    whole = b"".join(pcm.gen_pcm_chunks(raw, chunksize=10 ** 9))
+    chunks = list(pcm.gen_pcm_chunks(raw, chunksize=1000))
+    assert max(len(chunk) for chunk in chunks) == 2000
+    assert b"".join(chunks) == whole
+
+
+def test_stereo_inverted():
+    data = samples(pcm.gen_pcm_chunks([500.0, -500.0], channels=2), channels=2)
+    assert (data[:, 0] == -data[:, 1]).all()
+
+
+def test_invalid_rate():
+    with pytest.raises(IrgenInputError):
+        list(pcm.gen_pcm_chunks([500.0], carrier=38000, rate=48000))
+
+
+class Pipe(io.RawIOBase):
+    """Non seekable output."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data.extend(data)
+        return len(data)
+
+
+def test_write_wav_pipe():
+    raw = irgen.gen_raw_repeated('nec1', 16, 0, repeats=2)
+    pipe = Pipe()
+    frames = pcm.write_wav(pipe, raw, rate=96000, channels=2)
+    assert frames == round(2 * 108000 * 96000 / 1e6)
+    with wave.open(io.BytesIO(bytes(pipe.data))) as result:
+        assert result.getnframes() == frames
+        assert result.getnchannels() == 2
+        assert result.getframerate() == 96000
+
+
+def test_wav_output_format():
+    from irgen import convert
+    (ok, data), = convert.convert('nec1', 'wav', ['16', '0'])
+    assert ok
+    with wave.open(io.BytesIO(data)) as result:
+        raw = list(irgen.gen_raw_general('nec1', 16, 0))
+        assert result.getnframes() == pcm.count_frames(raw, 192000)
+
+
+def test_wav_output_chunked():
+    code = {'functionname': 'nec1', 'raw': [500.0, -500.0] * 3}
+    whole, = pcm.gen_output_wav([code], carrier=36000)
+    chunks = list(pcm.gen_output_wav([code], carrier=36000, chunked=True))
+    assert len(chunks) > 1
+    assert b"".join(chunk for ok, chunk in chunks) == whole[1]
+
+
+def test_wav_output_served():
+    from base64 import b64decode
+    from irgen import convert, serve
+    result, = serve.handle('/convert', {'input': 'nec1', 'output': 'wav', 'data': '16 0'})['results']
+    (ok, data), = convert.convert('nec1', 'wav', ['16', '0'])
+    assert result['ok']
+    assert b64decode(result['text']) == data
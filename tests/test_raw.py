@@ -1,3 +1,4 @@
+import irgen
 import pytest
 from irgen import raw
 
@@ -28,3 +29,48 @@ def test_simplified(input, output):
 ])
 def test_rtrim(input, output):
     assert list(raw.rtrim(input)) == output
+
+
+def test_raw_signal():
+    signal = raw.RawSignal([889.4, -889.0, 1778.0, -88900.0], frequency=36000)
+    assert len(signal) == 4
+    assert list(signal) == [889.4, -889, 1778, -88900]
+    assert signal == [889.4, -889, 1778, -88900]
+    assert signal[1] == -889
+    assert signal[-1] == -88900
+
+
+def test_raw_signal_keeps_fractions():
+    data = list(irgen.gen_raw_general('nec1', 4, 8))
+    signal = irgen.gen_signal_general('nec1', 4, 8)
+    assert list(signal) == list(raw.paired(raw.simplify(data)))
+    assert 562.5 in signal and -1687.5 in signal
+
+
+def test_raw_signal_unhashable():
+    with pytest.raises(TypeError):
+        hash(raw.RawSignal([1, -2]))
+
+
+def test_raw_signal_slice_zero_copy():
+    signal = raw.RawSignal([1, -2, 3, -4])
+    part = signal[1:3]
+    assert part == [-2, 3]
+    assert part.durations.obj is signal.durations.obj
+    assert raw.RawSignal(part) == part
+
+
+def test_raw_signal_concat_repeat():
+    signal = raw.RawSignal([1, -2], frequency=38000)
+    assert signal + [3, -4] == [1, -2, 3, -4]
+    assert signal + raw.RawSignal([3, -4]) == [1, -2, 3, -4]
+    repeated = signal * 3
+    assert repeated == [1, -2] * 3
+    assert repeated.frequency == 38000
+    assert list(reversed(signal)) == [-2, 1]
+
+
+def test_raw_signal_pickle():
+    import pickle
+    signal = raw.RawSignal([1, -2], frequency=38000)
+    assert pickle.loads(pickle.dumps(signal)) == signal
@@ -0,0 +1,46 @@
+import irgen
+from irgen import registry
+from irgen.convert import convert, input_formats, output_formats
+from irgen.exceptions import IrgenInputError
+import pytest
+
+
+def test_builtin_names():
+    assert 'nec1' in registry.encoders
+    assert 'RC6' in registry.decoders
+    assert 'pronto' in input_formats()
+    assert 'broadlink_base64' in output_formats()
+
+
+def test_unknown_raises():
+    with pytest.raises(IrgenInputError, match="Unknown encoder"):
+        registry.encoders.get('nosuchprotocol')
+    with pytest.raises(IrgenInputError):
+        list(irgen.gen_raw_general('nosuchprotocol', 1, 2))
+
+
+def test_lazy_string_target():
+    reg = registry.Registry("test", "irgen.test")
+    reg.register('paired', 'irgen.raw:paired')
+    assert 'paired' in reg._targets and 'paired' not in reg._loaded
+    assert reg.get('paired') is irgen.raw.paired
+    reg.unregister('paired')
+    assert 'paired' not in reg
+
+
+def test_custom_encoder():
+    @registry.encoders.register('test-proto')
+    def gen_raw_test(protocol, device, function, **kwargs):
+        yield from (device, -function)
+
+    try:
+        assert list(irgen.gen_raw_general('test-proto', 100, 200)) == [100, -200]
+        assert list(convert('test-proto', 'raw', [100, 200])) == [(True, "+100.0 -200.0")]
+    finally:
+        registry.encoders.unregister('test-proto')
+
+
+def test_builtin_codecs_registered_lazily():
+    assert registry.encoders._targets['nec1'] == 'irgen:gen_raw_general_nec'
+    assert registry.decoders._targets['rc5'] == 'irgen:dec_raw_rc5'
+    assert registry.decoders.get('jvc') is irgen.dec_raw_irp
@@ -0,0 +1,53 @@
+import irgen
+import pytest
+
+np = pytest.importorskip("numpy")
+from irgen import segment  # noqa: E402
+
+
+def gen_log():
+    data = [-5000.0]
+    for function in range(40):
+        data.extend(irgen.gen_raw_general('nec1', 16, function))
+        data.append(-30000.0)
+    return data
+
+
+def test_simplify_array():
+    assert segment.simplify_array([1, 2, 0, -3, -4, 5]).tolist() == [3, -7, 5]
+
+
+def test_segment_positions():
+    data = [100.0, 200.0, -300.0, -20000.0, 400.0, -500.0]
+    segments = segment.segment(data, gap=10000.0)
+    assert [s.data for s in segments] == [[300.0, -20300.0], [400.0, -500.0]]
+    assert [s.offset for s in segments] == [0, 2]
+    assert [s.time for s in segments] == [0.0, 20600.0]
+
+
+def test_leading_silence_skipped():
+    segments = segment.segment([-1000.0, 500.0, -20000.0], gap=10000.0)
+    assert segments == [segment.Segment(0, 1, 1000.0, [500.0, -20000.0])]
+
+
+@pytest.mark.parametrize("workers, chunksize", [(1, 256), (2, 7)])
+def test_decode_in_order(workers, chunksize):
+    results = list(segment.gen_decoded_segments(gen_log(), 'nec1', workers=workers, chunksize=chunksize))
+    assert [result.value for result in results] == [(16, function, 0) for function in range(40)]
+    assert all(result.error is None for result in results)
+
+
+def test_decode_error_position():
+    data = gen_log()
+    frame = list(irgen.gen_raw_general('nec1', 16, 0))
+    start = 1 + 3 * (len(frame) + 1)
+    data[start + 10] = -5000.0
+    results = list(segment.gen_decoded_segments(data, 'nec1', workers=1))
+    errors = [result for result in results if result.error]
+    assert [error.index for error in errors] == [3]
+    assert errors[0].time == pytest.approx(5000.0 + 3 * (sum(abs(x) for x in frame) + 30000.0))
+
+
+def test_decode_auto():
+    results = list(segment.gen_decoded_segments(gen_log()[:200], 'auto', workers=1))
+    assert ('nec1', (16, 0, 0)) in results[0].value
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import irgen
+from irgen import raw, serve
+import pytest
+
+
+def test_handle_encode():
+    result = serve.handle('/encode', {'protocol': 'nec1', 'device': 16, 'function': 0})
+    assert result['raw'] == list(raw.paired(raw.simplify(irgen.gen_raw_general('nec1', 16, 0))))
+    assert result['frequency'] == 38000
+
+
+def test_handle_encode_subdevice():
+    result = serve.handle('/encode', {'protocol': 'sirc20', 'device': 1, 'function': 2, 'subdevice': 3})
+    assert result['raw'] == list(raw.paired(raw.simplify(
+        irgen.gen_raw_general('sirc20', 1, 2, subdevice=3))))
+
+
+def test_handle_decode():
+    data = list(irgen.gen_raw_general('rc5', 16, 3)) * 2
+    result = serve.handle('/decode', {'protocol': 'rc5', 'raw': data})
+    assert [frame['values'] for frame in result['frames']] == [[16, 3, 0]] * 2
+    result = serve.handle('/decode', {'raw': list(irgen.gen_raw_general('rc5', 16, 3))})
+    assert {'protocol': 'rc5', 'values': [16, 3, 0]} in result['frames']
+
+
+@pytest.mark.parametrize("protocol", ['rca38', 'sirc12', 'samsung32', 'jvc'])
+def test_handle_decode_single_frame(protocol):
+    data = list(irgen.gen_raw_general(protocol, 5, 9))
+    result = serve.handle('/decode', {'protocol': protocol, 'raw': data})
+    assert result == {'frames': [{'protocol': protocol, 'values': [5, 9]}], 'errors': []}
+    result = serve.handle('/decode', {'protocol': protocol, 'raw': data[:3]})
+    assert result['frames'] == []
+    assert len(result['errors']) == 1
+
+
+def test_handle_errors():
+    assert 'error' in serve.handle('/encode', {'protocol': 'nec1'})
+    assert 'error' in serve.handle('/encode', {'protocol': 'nosuch', 'device': 1, 'function': 1})
+    assert 'error' in serve.handle('/convert', [])
+
+
+def test_handle_convert_cached():
+    request = {'input': 'rc5', 'output': 'rc5', 'data': '16 3'}
+    assert serve.handle('/convert', request) == {'results': [{'ok': True, 'text': '(16, 3, 0)'}]}
+    hits = serve.convert_cached.cache_info().hits
+    serve.handle('/convert', request)
+    assert serve.convert_cached.cache_info().hits == hits + 1
+
+
+def test_handle_convert_rejects_file_inputs(tmp_path):
+    path = tmp_path / "codes.csv"
+    path.write_text("secret\n")
+    for input in ('table', 'samples', 'wav', 'device', 'irdb'):
+        result = serve.handle('/convert', {'input': input, 'output': 'raw', 'path': str(path)})
+        assert result == {'error': f"Unsupported input {input}"}
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write("{} {} HTTP/1.1\r\nContent-Length: {}\r\n\r\n".format(
+        method, path, len(body)).encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, json.loads(body)
+
+
+def test_server_roundtrip():
+    async def run():
+        server = serve.Server(offload=2, workers=1)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            status, result = await request(reader, writer, 'POST', '/encode',
+                                           {'protocol': 'rc5', 'device': 1, 'function': 2})
+            assert status == 200
+            assert result['frequency'] == 36000
+
+            status, result = await request(reader, writer, 'POST', '/convert', [
+                {'input': 'rc5', 'output': 'rc5', 'data': [16, 3]},
+                {'input': 'nosuch', 'output': 'rc5', 'data': [16, 3]},
+            ])
+            assert status == 200
+            assert result[0] == {'results': [{'ok': True, 'text': '(16, 3, 0)'}]}
+            assert 'error' in result[1]
+
+            status, result = await request(reader, writer, 'GET', '/stats')
+            assert status == 200 and 'encode_cache' in result
+
+            status, result = await request(reader, writer, 'POST', '/nosuch', {})
+            assert status == 404
+            writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_server_invalid_content_length():
+    async def run():
+        server = serve.Server()
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"POST /encode HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+            await writer.drain()
+            assert int((await reader.readline()).split()[1]) == 400
+            writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_server_header_too_long():
+    async def run():
+        server = serve.Server()
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"POST /encode HTTP/1.1\r\nX-Long: " + b"a" * (1 << 17) + b"\r\n\r\n")
+            await writer.drain()
+            assert int((await reader.readline()).split()[1]) == 431
+            writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_server_concurrent_requests():
+    async def run():
+        server = serve.Server(max_concurrency=4)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        async def client(device):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return await request(reader, writer, 'POST', '/encode',
+                                     {'protocol': 'nec1', 'device': device, 'function': 1})
+            finally:
+                writer.close()
+
+        try:
+            results = await asyncio.gather(*(client(device) for device in range(8)))
+            assert [status for status, _ in results] == [200] * 8
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import irgen
+from irgen import signature
+from irgen.exceptions import IrgenInputError
+import pytest
+
+
+def distort(data, burst=80.0, scale=1.0):
+    """Simulate a receiver widening bursts and shortening spaces."""
+    return [(x + burst) * scale for x in data]
+
+
+def test_quantize_levels():
+    assert signature.quantize(560.0, 562.5) == 1
+    assert signature.quantize(-1687.5 * 1.1, 562.5) == signature.quantize(-1687.5 * 0.9, 562.5) == -4
+    assert signature.quantize(9000.0 * 0.9, 562.5) == signature.quantize(9000.0 * 1.1, 562.5)
+
+
+def test_identify_distorted_capture():
+    index = signature.SignatureIndex()
+    index.add_protocol('nec1', [16], range(256))
+    index.add_protocol('rc5', range(4), range(64))
+    assert len(index) == 256 + 256
+
+    data = distort(irgen.gen_raw_general('nec1', 16, 77)) + [-40000.0] + list(irgen.gen_raw_general('nec1', 16, 1))
+    assert index.lookup(data) == [('nec1', 16, 77)]
+    assert index.lookup(distort(irgen.gen_raw_general('rc5', 3, 12), burst=60.0)) == [('rc5', 3, 12)]
+
+
+def test_base_unit_checked():
+    index = signature.SignatureIndex()
+    index.add(irgen.gen_raw_general('nec1', 1, 2), ('a',))
+    assert index.lookup(irgen.gen_raw_general('nec1', 1, 2)) == [('a',)]
+    assert index.lookup([x * 2 for x in irgen.gen_raw_general('nec1', 1, 2)]) == []
+
+
+def test_unknown_protocol_by_name():
+    index = signature.SignatureIndex()
+    data = [3000.0, -1000.0, 500.0, -500.0, 500.0, -1500.0, 500.0, -20000.0]
+    index.add(data, ('remote', 'power'))
+    assert index.lookup([x * 1.05 for x in data]) == [('remote', 'power')]
+
+
+def test_too_short():
+    with pytest.raises(IrgenInputError):
+        signature.signature([500.0, -20000.0])
+
+
+def test_frame_ending_on_burst():
+    data = [9000.0, -4500.0, 562.0, -562.0, 562.0]
+    assert signature.signature(data) == signature.signature(data + [-40000.0])
+    index = signature.SignatureIndex()
+    index.add(data + [-40000.0], ('remote', 'power'))
+    assert index.lookup(data) == [('remote', 'power')]
+    with pytest.raises(IrgenInputError):
+        signature.base_unit([])
+
+
+def test_save_load(tmp_path):
+    index = signature.SignatureIndex()
+    index.add_protocol('rc6', [1], range(8))
+    path = str(tmp_path / "index.json")
+    index.save(path)
+    loaded = signature.SignatureIndex.load(path)
+    assert loaded.lookup(irgen.gen_raw_general('rc6', 1, 5)) == [('rc6', 1, 5)]
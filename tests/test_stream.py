@@ -0,0 +1,74 @@
+import irgen
+from irgen.stream import StreamDecoder, create_stream_decoder, gen_decoded_from_raw
+from irgen.exceptions import IrgenInputError
+import pytest
+
+
+def test_nec_stream_chunked():
+    data = []
+    data.extend(irgen.gen_raw_nec('nec1', 1, 4))
+    data.extend([9000.0, -2250.0, 562.5, -40000.0])
+    data.extend(irgen.gen_raw_nec('nec1', 1, 5))
+
+    decoder = create_stream_decoder('nec1')
+    frames = []
+    for i in range(0, len(data), 7):
+        frames.extend(decoder.feed(data[i:i + 7]))
+    frames.extend(decoder.flush())
+    assert frames == [(1, 4, 0), (0, 0, 1), (1, 5, 0)]
+
+
+def test_nec_stream_resync():
+    errors = []
+    data = []
+    data.extend(list(irgen.gen_raw_nec('nec1', 1, 4))[:20])
+    data.extend(irgen.gen_raw_nec('nec1', 1, 5))
+    data.extend([562.5, -562.5] * 5)
+    data.extend(irgen.gen_raw_nec('nec1', 2, 6))
+
+    frames = list(gen_decoded_from_raw(data, 'nec1', lambda exc, frame: errors.append(exc)))
+    assert frames == [(1, 5, 0), (2, 6, 0)]
+    assert len(errors) == 1
+
+
+@pytest.mark.parametrize("protocol, generator", [
+    ('rc5', irgen.gen_raw_rc5),
+    ('rc6', irgen.gen_raw_rc6),
+])
+def test_biphase_stream(protocol, generator):
+    data = []
+    data.extend(generator(2, 4, 0))
+    data.extend(generator(5, 66, 1))
+    data.extend([889.0, -889.0, 889.0, -100000.0])
+    data.extend(generator(5, 66, 0))
+
+    decoder = create_stream_decoder(protocol)
+    frames = []
+    for duration in data:
+        frames.extend(decoder.feed([duration]))
+    frames.extend(decoder.flush())
+    assert [frame[:3] for frame in frames] == [(2, 4, 0), (5, 66, 1), (5, 66, 0)]
+    assert decoder.errors == 1
+
+
+def test_unknown_stream_protocol():
+    with pytest.raises(IrgenInputError):
+        create_stream_decoder('rca38')
+
+
+def test_nec_stream_truncated_flush():
+    errors = []
+    data = [9000, -4500, 562, -562, 562]
+    assert list(gen_decoded_from_raw(data, 'nec1', lambda exc, frame: errors.append(exc))) == []
+    assert len(errors) == 1
+
+
+def test_stream_decoder_abstract():
+    class Incomplete(StreamDecoder):
+        def _push(self, duration):
+            pass
+
+    with pytest.raises(TypeError):
+        StreamDecoder('nec1')
+    with pytest.raises(TypeError):
+        Incomplete('nec1')
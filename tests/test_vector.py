@@ -0,0 +1,140 @@
+import irgen
+from irgen.exceptions import IrgenInputError
+import pytest
+
+np = pytest.importorskip("numpy")
+from irgen import vector  # noqa: E402
+
+
+@pytest.mark.parametrize("protocol", irgen.gen_raw_nec_protocols)
+def test_nec_batch_matches_generator(protocol):
+    functions = np.arange(256)
+    device = 0x3412 if protocol.startswith("necx") else 0x12
+    table = vector.gen_raw_batch(protocol, device, functions)
+    assert table.shape == (256, 68)
+    for function in (0, 1, 127, 255):
+        assert list(table[function]) == list(irgen.gen_raw_nec(protocol, device, function))
+
+
+@pytest.mark.parametrize("device, function, toggle", [
+    (0, 0, 0),
+    (2, 4, 1),
+    (5, 66, 0),
+    (31, 127, 1),
+])
+def test_rc5_batch_matches_generator(device, function, toggle):
+    table = vector.gen_raw_batch('rc5', [device], [function], toggle)
+    assert list(table[0]) == list(irgen.gen_raw_rc5(device, function, toggle))
+
+
+@pytest.mark.parametrize("device, function, toggle, mode", [
+    (0, 0, 0, 0),
+    (2, 4, 1, 0),
+    (5, 66, 0, 6),
+    (255, 255, 1, 7),
+])
+def test_rc6_batch_matches_generator(device, function, toggle, mode):
+    table = vector.gen_raw_batch('rc6', device, function, toggle, mode)
+    assert list(table[0]) == list(irgen.gen_raw_rc6(device, function, toggle, mode))
+
+
+def test_rca38_batch_matches_generator():
+    devices, functions = np.meshgrid(np.arange(16), np.arange(256))
+    table = vector.gen_raw_batch('rca38', devices.ravel(), functions.ravel())
+    assert table.shape == (16 * 256, 52)
+    index = 123 * 16 + 12
+    assert list(table[index]) == list(irgen.gen_raw_rca38(12, 123))
+
+
+@pytest.mark.parametrize("protocol", irgen.gen_raw_irp_protocols)
+def test_irp_batch_matches_generator(protocol):
+    functions = np.arange(0, 128, 7)
+    table = vector.gen_raw_batch(protocol, 3, functions, subdevice=5)
+    assert len(table) == len(functions)
+    for row, function in zip(table, functions):
+        expected = list(irgen.gen_raw_general(protocol, 3, int(function), subdevice=5))
+        assert list(row[:len(expected)]) == expected
+        assert not row[len(expected):].any()
+
+
+def test_batch_range_errors():
+    with pytest.raises(IrgenInputError):
+        vector.gen_raw_batch('nec1', 256, 0)
+    with pytest.raises(IrgenInputError):
+        vector.gen_raw_batch('rc5', 0, 128)
+    with pytest.raises(IrgenInputError):
+        vector.gen_raw_batch('unknown', 0, 0)
+
+
+@pytest.mark.parametrize("protocol", ['nec1', 'necx1-f16', 'nec2-y1', 'necx2-y3'])
+def test_nec_batch_decode(protocol):
+    device = 0x3412 if protocol.startswith("necx") else 0x12
+    functions = np.arange(256)
+    frames = vector.gen_raw_batch(protocol, device, functions)
+    result = vector.dec_raw_batch(protocol, frames)
+    assert (result['error'] == vector.DECODE_OK).all()
+    assert (result['device'] == device).all()
+    assert (result['function'] == functions).all()
+
+
+def test_nec_batch_decode_errors():
+    frames = [
+        list(irgen.gen_raw_nec('nec1', 1, 4)),
+        list(irgen.gen_raw_nec('necx1', 0x3412, 4)),
+        list(irgen.gen_raw_nec('nec2', 1, 4)),
+        [9000, -2250, 562.5],
+        [-500, 9000, -4500, 562.5, -562.5],
+    ]
+    result = vector.dec_raw_batch('nec1', frames)
+    assert list(result['error']) == [vector.DECODE_OK,
+                                     vector.DECODE_CHECK,
+                                     vector.DECODE_LEADING,
+                                     vector.DECODE_OK,
+                                     vector.DECODE_TRUNCATED]
+    assert tuple(result[3][['device', 'function', 'toggle']]) == (0, 0, 1)
+
+
+@pytest.mark.parametrize("protocol, device, function, toggle, mode", [
+    ('rc5', 2, 4, 0, 0),
+    ('rc5', 5, 66, 1, 0),
+    ('rc6', 2, 4, 1, 0),
+    ('rc6', 5, 66, 0, 6),
+])
+def test_biphase_batch_decode(protocol, device, function, toggle, mode):
+    frames = vector.gen_raw_batch(protocol, device, function, toggle, mode)
+    result = vector.dec_raw_batch(protocol, frames)
+    assert tuple(result[0]) == (device, function, toggle, mode, vector.DECODE_OK)
+
+
+def test_biphase_batch_decode_errors():
+    frames = [
+        list(irgen.gen_raw_rc5(2, 4, 0)),
+        list(irgen.gen_raw_rc5(2, 4, 0))[:10],
+        [889.0, 889.0, -889.0] * 10,
+    ]
+    result = vector.dec_raw_batch('rc5', frames)
+    assert list(result['error']) == [vector.DECODE_OK,
+                                     vector.DECODE_TRUNCATED,
+                                     vector.DECODE_BIT]
+    assert list(result['device']) == [2, 0, 0]
+    assert list(result['function']) == [4, 0, 0]
+
+
+@pytest.mark.parametrize("protocol", ['rc5', 'rc6'])
+@pytest.mark.parametrize("frames, count", [([], 0), ([[]], 1), ([[0, 0]], 1)])
+def test_biphase_batch_decode_empty(protocol, frames, count):
+    result = vector.dec_raw_batch(protocol, frames)
+    assert len(result) == count
+    assert (result['error'] == vector.DECODE_TRUNCATED).all()
+    assert not result['device'].any()
+    assert not result['function'].any()
+
+
+def test_simplify_matrix():
+    from irgen import raw
+    frames = [[-2, 1, -1, 1, 1, 0, -3], [1, -1, 0, 0, 0, 0, 0], [0] * 7]
+    matrix = vector.simplify_matrix(vector.frames_to_matrix(frames))
+    for row, frame in zip(matrix, frames):
+        expected = list(raw.simplify(frame))
+        assert list(row[:len(expected)]) == expected
+        assert not row[len(expected):].any()